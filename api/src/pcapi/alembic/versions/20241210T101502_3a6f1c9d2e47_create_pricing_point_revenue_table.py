@@ -0,0 +1,34 @@
+"""
+Create pricing_point_revenue table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "3a6f1c9d2e47"
+down_revision = "741084b8cec2"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pricing_point_revenue",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("pricingPointId", sa.BigInteger(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["pricingPointId"],
+            ["venue.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("pricingPointId", "year", name="unique_pricing_point_revenue_year"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pricing_point_revenue")
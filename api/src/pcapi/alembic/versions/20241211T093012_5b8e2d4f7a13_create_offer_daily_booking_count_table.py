@@ -0,0 +1,31 @@
+"""
+Create offer_daily_booking_count table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "5b8e2d4f7a13"
+down_revision = "3a6f1c9d2e47"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "offer_daily_booking_count",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("offerId", sa.BigInteger(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("bookingCount", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["offerId"], ["offer.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("offerId", "day", name="unique_offer_daily_booking_count_day"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("offer_daily_booking_count")
@@ -0,0 +1,47 @@
+"""Create unaccented indexes on offer.name, collective_offer.name and collective_offer_template.name
+"""
+
+from alembic import op
+
+from pcapi import settings
+
+
+# pre/post deployment: post
+# revision identifiers, used by Alembic.
+revision = "8c41e7b2a9d5"
+down_revision = "ffc1d7402c8a"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+INDEXES = (
+    ("ix_offer_trgm_unaccent_name", "offer"),
+    ("ix_collective_offer_trgm_unaccent_name", "collective_offer"),
+    ("ix_collective_offer_template_trgm_unaccent_name", "collective_offer_template"),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # The offer table is large: building its index takes a while.
+        op.execute("SET SESSION statement_timeout='1800s'")
+        for index_name, table_name in INDEXES:
+            op.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS
+                "{index_name}" ON public."{table_name}"
+                USING gin (immutable_unaccent("name") gin_trgm_ops);
+                """
+            )
+        op.execute(f"SET SESSION statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name in INDEXES:
+            op.drop_index(
+                index_name=index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,56 @@
+"""Create indexes for the search of educational institutions by name, city and postal code
+"""
+
+from alembic import op
+
+from pcapi import settings
+
+
+# pre/post deployment: post
+# revision identifiers, used by Alembic.
+revision = "2f7d9a0c6b84"
+down_revision = "8c41e7b2a9d5"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("SET SESSION statement_timeout='300s'")
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS
+            "ix_educational_institution_trgm_unaccent_name" ON public."educational_institution"
+            USING gin (immutable_unaccent("name") gin_trgm_ops);
+            """
+        )
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS
+            "ix_educational_institution_trgm_unaccent_city" ON public."educational_institution"
+            USING gin (immutable_unaccent("city") gin_trgm_ops);
+            """
+        )
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS
+            "ix_educational_institution_trgm_postal_code" ON public."educational_institution"
+            USING gin ("postalCode" gin_trgm_ops);
+            """
+        )
+        op.execute(f"SET SESSION statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in (
+            "ix_educational_institution_trgm_unaccent_name",
+            "ix_educational_institution_trgm_unaccent_city",
+            "ix_educational_institution_trgm_postal_code",
+        ):
+            op.drop_index(
+                index_name=index_name,
+                table_name="educational_institution",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
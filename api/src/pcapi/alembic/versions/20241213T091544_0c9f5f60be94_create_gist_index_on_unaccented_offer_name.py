@@ -0,0 +1,38 @@
+"""Create a GiST trigram index on unaccented offer.name, to rank offers by relevance
+"""
+
+from alembic import op
+
+from pcapi import settings
+
+
+# pre/post deployment: post
+# revision identifiers, used by Alembic.
+revision = "0c9f5f60be94"
+down_revision = "2f7d9a0c6b84"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # The offer table is large: building its index takes a while.
+        op.execute("SET SESSION statement_timeout='3600s'")
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS
+            "ix_offer_gist_trgm_unaccent_name" ON public."offer"
+            USING gist (immutable_unaccent("name") gist_trgm_ops);
+            """
+        )
+        op.execute(f"SET SESSION statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name="ix_offer_gist_trgm_unaccent_name",
+            table_name="offer",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -2,6 +2,7 @@ import datetime
 from functools import partial
 import json
 import logging
+import time
 import typing
 
 from flask import current_app
@@ -25,7 +26,6 @@ from pcapi.core.educational.models import CollectiveStock
 from pcapi.core.external import batch
 from pcapi.core.external.attributes.api import update_external_pro
 from pcapi.core.external.attributes.api import update_external_user
-from pcapi.core.external.batch import track_offer_booked_event
 import pcapi.core.external_bookings.api as external_bookings_api
 from pcapi.core.external_bookings.ems import constants as ems_constants
 from pcapi.core.external_bookings.ems.client import EMSClientAPI
@@ -70,6 +70,7 @@ from pcapi.workers import user_emails_job
 
 from . import constants
 from . import exceptions
+from . import side_effects
 from . import utils
 from . import validation
 from .exceptions import BookingIsAlreadyCancelled
@@ -257,38 +258,198 @@ def _book_offer(
             booking.mark_as_used(BookingValidationAuthorType.AUTO)
 
         is_cinema_external_ticket_applicable = providers_repository.is_cinema_external_ticket_applicable(stock.offer)
-
         if is_cinema_external_ticket_applicable:
             offers_validation.check_offer_is_from_current_cinema_provider(stock.offer)
-            _book_cinema_external_ticket(booking, stock, beneficiary)
 
+        # In two-phase mode, the quantity is reserved and locks on the
+        # stock and the user are released before calling the provider,
+        # so that concurrent bookings of the same stock do not wait for
+        # it. A managed transaction cannot be committed here, though.
+        is_two_phase_external_booking = (
+            (is_cinema_external_ticket_applicable or stock.offer.isEventLinkedToTicketingService)
+            and not is_managed_transaction()
+            and FeatureToggle.WIP_TWO_PHASE_EXTERNAL_BOOKINGS.is_active()
+        )
+        if is_two_phase_external_booking:
+            stock.dnBookedQuantity += booking.quantity
+            db.session.add_all((booking, stock))
+            db.session.flush()
+            # Recorded before the commit, so that the reservation is
+            # released even if the process dies before confirming it.
+            current_app.redis_client.zadd(
+                constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME,
+                {str(booking.id): booking.dateCreated.timestamp()},
+            )
+            logger.info(
+                "Reserved stock quantity before booking external ticket",
+                extra={
+                    "booking_id": booking.id,
+                    "booking_quantity": booking.quantity,
+                    "stock_dnBookedQuantity": stock.dnBookedQuantity,
+                },
+            )
+        else:
+            if is_cinema_external_ticket_applicable:
+                _book_cinema_external_ticket(booking, stock, beneficiary)
+
+            if stock.offer.isEventLinkedToTicketingService:
+                remaining_quantity = _book_event_external_ticket(booking, stock, beneficiary)
+                if remaining_quantity is None:
+                    stock.quantity = None
+                else:
+                    stock.quantity = stock.dnBookedQuantity + remaining_quantity + booking.quantity
+
+            stock.dnBookedQuantity += booking.quantity
+            _confirm_booking(booking, stock)
+
+    if is_two_phase_external_booking:
+        _book_external_ticket_of_reserved_booking(booking, beneficiary, is_cinema_external_ticket_applicable)
+    return booking
+
+
+def _confirm_booking(booking: Booking, stock: Stock) -> None:
+    logger.info(
+        "Updating dnBookedQuantity after a successful booking",
+        extra={
+            "booking_id": booking.id,
+            "booking_quantity": booking.quantity,
+            "stock_dnBookedQuantity": stock.dnBookedQuantity,
+        },
+    )
+
+    db.session.add_all((booking, stock))
+    db.session.flush()  # to setup relations on `booking` for `add_event()` below.
+    offers_repository.update_offer_daily_booking_count(stock.offerId, booking.dateCreated, 1)
+
+    if booking.status == BookingStatus.USED:
+        finance_api.add_event(
+            finance_models.FinanceEventMotive.BOOKING_USED,
+            booking=booking,
+        )
+
+
+def _book_external_ticket_of_reserved_booking(
+    booking: Booking,
+    beneficiary: User,
+    is_cinema_external_ticket_applicable: bool,
+) -> None:
+    """Book the external ticket of a booking whose quantity has already
+    been reserved (and committed), then confirm the booking. If the
+    provider or the confirmation fails, the reservation is released.
+    """
+    booking_id, stock_id = booking.id, booking.stockId
+    stock = booking.stock
+    remaining_quantity = None
+    try:
+        if is_cinema_external_ticket_applicable:
+            _book_cinema_external_ticket(booking, stock, beneficiary)
         if stock.offer.isEventLinkedToTicketingService:
             remaining_quantity = _book_event_external_ticket(booking, stock, beneficiary)
-            if remaining_quantity is None:
-                stock.quantity = None
-            else:
-                stock.quantity = stock.dnBookedQuantity + remaining_quantity + booking.quantity
+    except Exception:
+        _release_reserved_booking(booking_id, stock_id)
+        raise
 
-        stock.dnBookedQuantity += booking.quantity
+    barcodes = [external_booking.barcode for external_booking in booking.externalBookings]
+    try:
+        with transaction():
+            # Do not flush tickets before checking that the reservation
+            # has not been released nor cancelled in the meantime.
+            with db.session.no_autoflush:
+                stock = offers_repository.get_and_lock_stock(stock_id=stock_id)
+                booking_status = db.session.query(Booking.status).filter_by(id=booking_id).with_for_update().scalar()
+                if booking_status in (None, BookingStatus.CANCELLED):
+                    raise external_bookings_exceptions.ExternalBookingException(
+                        "Reservation has been released or cancelled before booking confirmation"
+                    )
+            if stock.offer.isEventLinkedToTicketingService:
+                # `dnBookedQuantity` includes the quantity of this booking,
+                # but also the quantity of other reservations, which may
+                # not have booked their tickets yet.
+                stock.quantity = (
+                    None
+                    if remaining_quantity is None
+                    else stock.dnBookedQuantity - _get_reserved_quantity(stock_id, booking_id) + remaining_quantity
+                )
+            _confirm_booking(booking, stock)
+    except Exception:
+        # Tickets that have been booked but not saved are cancelled by
+        # `cancel_unstored_external_bookings()`.
+        logger.exception(
+            "Could not confirm booking after booking external ticket",
+            extra={"booking_id": booking_id, "barcodes": barcodes},
+        )
+        _release_reserved_booking(booking_id, stock_id)
+        raise
+    current_app.redis_client.zrem(constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, str(booking_id))
+
+
+def _get_reserved_quantity(stock_id: int, excluded_booking_id: int) -> int:
+    """Return the quantity reserved by other bookings of the stock that
+    have not been confirmed yet.
+    """
+    reserved_booking_ids = [
+        int(booking_id)
+        for booking_id in current_app.redis_client.zrange(constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, 0, -1)
+        if int(booking_id) != excluded_booking_id
+    ]
+    if not reserved_booking_ids:
+        return 0
+    return (
+        db.session.query(sa.func.coalesce(sa.func.sum(Booking.quantity), 0))
+        .filter(Booking.id.in_(reserved_booking_ids), Booking.stockId == stock_id)
+        .scalar()
+    )
 
+
+def _release_reserved_booking(booking_id: int, stock_id: int) -> None:
+    # Discard changes made to the booking before the failure (tickets
+    # have not been saved).
+    db.session.rollback()
+    redis_client = current_app.redis_client
+    booking_quantity = None
+    with transaction():
+        stock = offers_repository.get_and_lock_stock(stock_id=stock_id)
+        booking = Booking.query.filter_by(id=booking_id).with_for_update().one_or_none()
+        # The reservation may have been released or confirmed meanwhile.
+        if booking is None or booking.externalBookings:
+            pass
+        elif booking.status == BookingStatus.CANCELLED:
+            # The cancellation has already given back the reserved
+            # quantity, and decremented the daily booking count that
+            # has not been incremented by `_confirm_booking()`.
+            if redis_client.zrem(constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, str(booking_id)):
+                offers_repository.update_offer_daily_booking_count(stock.offerId, booking.dateCreated, 1)
+        else:
+            booking_quantity = booking.quantity
+            stock.dnBookedQuantity -= booking_quantity
+            db.session.delete(booking)
+    redis_client.zrem(constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, str(booking_id))
+    if booking_quantity is not None:
         logger.info(
-            "Updating dnBookedQuantity after a successful booking",
+            "Released stock quantity reserved for a failed external booking",
             extra={
-                "booking_id": booking.id,
-                "booking_quantity": booking.quantity,
+                "booking_id": booking_id,
+                "booking_quantity": booking_quantity,
                 "stock_dnBookedQuantity": stock.dnBookedQuantity,
             },
         )
 
-        db.session.add_all((booking, stock))
-        db.session.flush()  # to setup relations on `booking` for `add_event()` below.
 
-        if booking.status == BookingStatus.USED:
-            finance_api.add_event(
-                finance_models.FinanceEventMotive.BOOKING_USED,
-                booking=booking,
-            )
-    return booking
+def release_stale_reserved_external_bookings() -> None:
+    """Release reservations of bookings whose external ticket has not
+    been booked and saved in time, for example because the process was
+    killed during the call to the provider.
+    """
+    max_timestamp = (datetime.datetime.utcnow() - constants.RESERVED_EXTERNAL_BOOKING_TIMEOUT).timestamp()
+    booking_ids = current_app.redis_client.zrangebyscore(
+        constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, "-inf", max_timestamp
+    )
+    for booking_id in booking_ids:
+        stock_id = db.session.query(Booking.stockId).filter_by(id=int(booking_id)).scalar()
+        if stock_id is None:  # reservation could not be committed
+            current_app.redis_client.zrem(constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, booking_id)
+            continue
+        _release_reserved_booking(int(booking_id), stock_id)
 
 
 def book_offer(
@@ -356,19 +517,7 @@ def book_offer(
             "stock_quantity": stock.quantity,
         },
     )
-    track_offer_booked_event(beneficiary.id, stock.offer)
-    external_bookings_api.send_booking_notification_to_external_service(booking, BookingAction.BOOK)
-
-    transactional_mails.send_user_new_booking_to_pro_email(booking, first_venue_booking)
-    transactional_mails.send_individual_booking_confirmation_email_to_beneficiary(booking)
-
-    search.async_index_offer_ids(
-        [stock.offerId],
-        reason=search.IndexationReason.BOOKING_CREATION,
-    )
-
-    update_external_user(booking.user)
-    update_external_pro(stock.offer.venue.bookingEmail)
+    side_effects.on_booking_created(booking, first_venue_booking)
 
     return booking
 
@@ -633,7 +782,10 @@ def _execute_cancel_booking(
             stock.dnBookedQuantity -= booking.quantity
             if booking.activationCode and stock.quantity:
                 stock.quantity -= 1
+            # Read before `save()` expires the booking.
+            booking_date = booking.dateCreated
             repository.save(booking, stock)
+            offers_repository.update_offer_daily_booking_count(stock.offerId, booking_date, -1)
     return True
 
 
@@ -829,6 +981,7 @@ def mark_as_used_with_uncancelling(booking: Booking, validation_author_type: Boo
         stock.dnBookedQuantity += booking.quantity
         db.session.add(stock)
         db.session.flush()
+        offers_repository.update_offer_daily_booking_count(stock.offerId, booking.dateCreated, 1)
     booking.validationAuthorType = validation_author_type
     db.session.add(booking)
     finance_api.add_event(
@@ -980,126 +1133,138 @@ def recompute_dnBookedQuantity(stock_ids: list[int]) -> None:
     db.session.execute(sa.text(query), {"stock_ids": tuple(stock_ids)})
 
 
-def auto_mark_as_used_after_event() -> None:
+def auto_mark_as_used_after_event(chunk_size: int = constants.AUTO_USE_AFTER_EVENT_CHUNK_SIZE) -> None:
     """Automatically mark as used bookings that correspond to events that
     have happened (with a delay).
+
+    Bookings are updated by chunks of ``chunk_size`` bookings. Finance
+    events of each chunk are inserted in bulk, and each chunk is
+    committed on its own.
     """
     if not FeatureToggle.UPDATE_BOOKING_USED.is_active():
         raise ValueError("This function is behind a deactivated feature flag.")
 
     now = datetime.datetime.utcnow()
     threshold = now - constants.AUTO_USE_AFTER_EVENT_TIME_DELAY
-
-    # Revisit with SQLAlchemy 2.
-    #
-    # I tried to update and select bookings in a single query, like this:
-    #     WITH updated AS (
-    #       UPDATE booking
-    #       SET "dateUsed" = :now, status = 'USED'
-    #       FROM stock WHERE ...
-    #       RETURNING booking.id
-    #     )
-    #     SELECT ... FROM booking JOIN ...
-    #     WHERE booking.id IN (select id from updated)
-    #
-    # In SQLAlchemy:
-    #     individual_updated = (
-    #         sa.update(Booking)
-    #         .returning(Booking.id)
-    #         .where(
-    #             Booking.status == BookingStatus.CONFIRMED,
-    #             Booking.stockId == offers_models.Stock.id,
-    #             offers_models.Stock.beginningDatetime < threshold,
-    #         )
-    #         .values(dateUsed=now, status=BookingStatus.USED)
-    #     )
-    #     individual_select = sa.select(Booking).options(
-    #         sa.orm.joinedload(Booking.stock, innerjoin=True),
-    #         sa.orm.joinedload(Booking.venue, innerjoin=True),
-    #     )
-    #     individual_bookings = db.session.execute(
-    #         individual_select.where(Booking.id.in_(sa.select([individual_updated.cte(name="updated").c.id]))),
-    #         execution_options={"synchronize_session": True},
-    #     )
-    #
-    # But it does not work: the SELECT part does not see updated
-    # columns (and here we need to see the newly set value of
-    # `dateUsed`, otherwise `finance.api.add_event()` raises an
-    # error).
-    #
-    # I think that it might be possible to make it work by using
-    # `returning(Booking)` instead of `returning(Booking.id)`, and
-    # joining related tables. SQLAlchemy would know that what it gets
-    # from the CTE must be used to populate `Booking` objects.
-    # However, this is only possible in SQLAlchemy 2.
+    start = time.perf_counter()
 
     # Individual bookings: update and add a finance event for each one.
-    db.session.execute(
-        sa.update(Booking)
+    n_individual_bookings_updated = 0
+    while True:
+        chunk_start = time.perf_counter()
+        booking_ids = _auto_mark_individual_bookings_as_used(now, threshold, chunk_size)
+        if not booking_ids:
+            break
+        # `populate_existing()` because bookings may already be in the
+        # session with the values they had before the update.
+        individual_bookings = (
+            Booking.query.filter(Booking.id.in_(booking_ids))
+            .options(sa.orm.joinedload(Booking.stock, innerjoin=True))
+            .populate_existing()
+            .all()
+        )
+        finance_api.add_events_bulk(finance_models.FinanceEventMotive.BOOKING_USED, individual_bookings)
+        db.session.commit()
+        n_individual_bookings_updated += len(booking_ids)
+        _log_auto_used_chunk("individual", len(booking_ids), chunk_start)
+
+    # Collective bookings: update and add a finance event for each
+    # one. We do the same as above, except that we add a log for data
+    # analysis.
+    n_collective_bookings_updated = 0
+    while True:
+        chunk_start = time.perf_counter()
+        booking_ids = _auto_mark_collective_bookings_as_used(now, threshold, chunk_size)
+        if not booking_ids:
+            break
+        collective_bookings = (
+            CollectiveBooking.query.filter(CollectiveBooking.id.in_(booking_ids))
+            .options(sa.orm.joinedload(CollectiveBooking.collectiveStock, innerjoin=True))
+            .populate_existing()
+            .all()
+        )
+        finance_api.add_events_bulk(finance_models.FinanceEventMotive.BOOKING_USED, collective_bookings)
+        for booking in collective_bookings:
+            educational_utils.log_information_for_data_purpose(
+                event_name="BookingUsed",
+                extra_data={"bookingId": booking.id, "stockId": booking.collectiveStockId},
+                uai=None,
+                user_role=None,
+            )
+        db.session.commit()
+        n_collective_bookings_updated += len(booking_ids)
+        _log_auto_used_chunk("collective", len(booking_ids), chunk_start)
+
+    duration = time.perf_counter() - start
+    logger.info(
+        "Automatically marked bookings as used after event",
+        extra={
+            "dateUsed": now,
+            "individualBookingsUpdatedCount": n_individual_bookings_updated,
+            "collectiveBookingsUpdatedCount": n_collective_bookings_updated,
+            "duration": round(duration, 2),
+            "bookingsPerSecond": round((n_individual_bookings_updated + n_collective_bookings_updated) / duration, 1),
+        },
+    )
+
+
+def _auto_mark_individual_bookings_as_used(
+    now: datetime.datetime, threshold: datetime.datetime, chunk_size: int
+) -> list[int]:
+    chunk = (
+        sa.select(Booking.id)
+        .join(offers_models.Stock, Booking.stockId == offers_models.Stock.id)
         .where(
             Booking.status == BookingStatus.CONFIRMED,
-            Booking.stockId == offers_models.Stock.id,
             offers_models.Stock.beginningDatetime < threshold,
         )
-        .values(dateUsed=now, status=BookingStatus.USED, validationAuthorType=BookingValidationAuthorType.AUTO),
-        execution_options={"synchronize_session": False},
+        .limit(chunk_size)
+        .scalar_subquery()
     )
-    # `dateUsed` is precise enough that it's very unlikely to get a
-    # booking that was marked as used from another channel (and that
-    # would already have an event). If it happened, `add_event` would
-    # fail because of the PostgreSQL partially unique constraint on
-    # `bookingId`.
-    individual_bookings = Booking.query.filter_by(dateUsed=now).options(
-        sa.orm.joinedload(Booking.stock, innerjoin=True),
-        sa.orm.joinedload(Booking.venue, innerjoin=True),
+    # The status is checked again, in case a booking has been updated
+    # by another transaction in the meantime.
+    result = db.session.execute(
+        sa.update(Booking)
+        .where(Booking.id.in_(chunk), Booking.status == BookingStatus.CONFIRMED)
+        .values(dateUsed=now, status=BookingStatus.USED, validationAuthorType=BookingValidationAuthorType.AUTO)
+        .returning(Booking.id),
+        execution_options={"synchronize_session": False},
     )
-    n_individual_bookings_updated = 0
-    for booking in individual_bookings:
-        finance_api.add_event(
-            finance_models.FinanceEventMotive.BOOKING_USED,
-            booking=booking,
-        )
-        n_individual_bookings_updated += 1
+    return [booking_id for (booking_id,) in result]
 
-    # Collective bookings: update and add a finance event for each
-    # one. We do the same as above, except that we add a log for data
-    # analysis.
-    db.session.execute(
-        sa.update(CollectiveBooking)
+
+def _auto_mark_collective_bookings_as_used(
+    now: datetime.datetime, threshold: datetime.datetime, chunk_size: int
+) -> list[int]:
+    chunk = (
+        sa.select(CollectiveBooking.id)
+        .join(CollectiveStock, CollectiveBooking.collectiveStockId == CollectiveStock.id)
         .where(
             CollectiveBooking.status == CollectiveBookingStatus.CONFIRMED,
-            CollectiveBooking.collectiveStockId == CollectiveStock.id,
             CollectiveStock.endDatetime < threshold,
         )
-        .values(dateUsed=now, status=CollectiveBookingStatus.USED),
-        execution_options={"synchronize_session": False},
+        .limit(chunk_size)
+        .scalar_subquery()
     )
-    collective_bookings = CollectiveBooking.query.filter_by(dateUsed=now).options(
-        sa.orm.joinedload(CollectiveBooking.collectiveStock, innerjoin=True),
-        sa.orm.joinedload(CollectiveBooking.venue, innerjoin=True),
+    result = db.session.execute(
+        sa.update(CollectiveBooking)
+        .where(CollectiveBooking.id.in_(chunk), CollectiveBooking.status == CollectiveBookingStatus.CONFIRMED)
+        .values(dateUsed=now, status=CollectiveBookingStatus.USED)
+        .returning(CollectiveBooking.id),
+        execution_options={"synchronize_session": False},
     )
-    n_collective_bookings_updated = 0
-    for booking in collective_bookings:
-        finance_api.add_event(
-            finance_models.FinanceEventMotive.BOOKING_USED,
-            booking=booking,
-        )
-        n_collective_bookings_updated += 1
-        educational_utils.log_information_for_data_purpose(
-            event_name="BookingUsed",
-            extra_data={"bookingId": booking.id, "stockId": booking.collectiveStockId},
-            uai=None,
-            user_role=None,
-        )
+    return [booking_id for (booking_id,) in result]
 
-    db.session.commit()
 
+def _log_auto_used_chunk(booking_type: str, count: int, chunk_start: float) -> None:
+    duration = time.perf_counter() - chunk_start
     logger.info(
-        "Automatically marked bookings as used after event",
+        "Automatically marked a chunk of bookings as used after event",
         extra={
-            "dateUsed": now,
-            "individualBookingsUpdatedCount": n_individual_bookings_updated,
-            "collectiveBookingsUpdatedCount": n_collective_bookings_updated,
+            "bookingType": booking_type,
+            "count": count,
+            "duration": round(duration, 2),
+            "bookingsPerSecond": round(count / duration, 1),
         },
     )
 
@@ -1,9 +1,11 @@
 import logging
 
+from pcapi.models.feature import FeatureToggle
 import pcapi.scheduled_tasks.decorators as cron_decorators
 from pcapi.utils.blueprint import Blueprint
 
 from . import api
+from . import side_effects
 
 
 blueprint = Blueprint(__name__, __name__)
@@ -14,3 +16,10 @@ logger = logging.getLogger(__name__)
 @cron_decorators.log_cron_with_transaction
 def archive_old_bookings() -> None:
     api.archive_old_bookings()
+
+
+@blueprint.cli.command("process_booking_side_effects")
+@cron_decorators.log_cron_with_transaction
+@cron_decorators.cron_require_feature(FeatureToggle.WIP_ASYNC_BOOKING_SIDE_EFFECTS)
+def process_booking_side_effects() -> None:
+    side_effects.process_queued_side_effects()
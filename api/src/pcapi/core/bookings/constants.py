@@ -20,8 +20,20 @@ BOOKS_BOOKINGS_AUTO_EXPIRY_DELAY = datetime.timedelta(days=10)
 BOOKINGS_EXPIRY_NOTIFICATION_DELAY = datetime.timedelta(days=7)
 BOOKS_BOOKINGS_EXPIRY_NOTIFICATION_DELAY = datetime.timedelta(days=5)
 AUTO_USE_AFTER_EVENT_TIME_DELAY = datetime.timedelta(hours=48)
+AUTO_USE_AFTER_EVENT_CHUNK_SIZE = 1_000
 REDIS_EXTERNAL_BOOKINGS_NAME = "api:external_bookings:barcodes"
+REDIS_BOOKING_SIDE_EFFECTS_QUEUE = "api:bookings:side_effects"
+REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE = "api:bookings:side_effects:processing"
+REDIS_BOOKING_SIDE_EFFECTS_NOTIFIED_BOOKINGS = "api:bookings:side_effects:notified"
+BOOKING_SIDE_EFFECTS_BATCH_SIZE = 100
+# Number of bookings fetched from the database (and written) at once in exports
+EXPORT_BATCH_SIZE = 1_000
 EXTERNAL_BOOKINGS_MINIMUM_ITEM_AGE_IN_QUEUE = 60
+# Sorted set of ids of bookings whose quantity has been reserved while
+# their external ticket is being booked, scored by reservation timestamp.
+REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME = "api:external_bookings:reserved"
+# Reservations that have not been confirmed after this delay are released.
+RESERVED_EXTERNAL_BOOKING_TIMEOUT = datetime.timedelta(minutes=5)
 ONE_SIDE_BOOKINGS_CANCELLATION_PROVIDERS = {"CDSStocks", "CGRStocks", "EMSStocks"}
 
 
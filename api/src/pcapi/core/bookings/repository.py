@@ -1,3 +1,4 @@
+import codecs
 import csv
 from datetime import date
 from datetime import datetime
@@ -6,6 +7,7 @@ from datetime import timedelta
 from io import BytesIO
 from io import StringIO
 from operator import and_
+import tempfile
 import typing
 
 from flask_sqlalchemy import BaseQuery
@@ -361,16 +363,22 @@ def _create_export_query(offer_id: int, event_beginning_date: date) -> BaseQuery
     return query.distinct(Booking.id)
 
 
+def get_offer_export_query(offer_id: int, event_beginning_date: date, validated_only: bool = False) -> BaseQuery:
+    query = _create_export_query(offer_id, event_beginning_date)
+    if validated_only:
+        query = query.filter(
+            or_(
+                and_(Booking.isConfirmed, Booking.status != BookingStatus.CANCELLED),
+                Booking.status == BookingStatus.USED,
+            )
+        )
+    return query
+
+
 def export_validated_bookings_by_offer_id(
     offer_id: int, event_beginning_date: date, export_type: BookingExportType
 ) -> str | bytes:
-    offer_validated_bookings_query = _create_export_query(offer_id, event_beginning_date)
-    offer_validated_bookings_query = offer_validated_bookings_query.filter(
-        or_(
-            and_(Booking.isConfirmed, Booking.status != BookingStatus.CANCELLED),
-            Booking.status == BookingStatus.USED,
-        )
-    )
+    offer_validated_bookings_query = get_offer_export_query(offer_id, event_beginning_date, validated_only=True)
     if export_type == BookingExportType.EXCEL:
         return _write_bookings_to_excel(offer_validated_bookings_query)
     return _write_bookings_to_csv(offer_validated_bookings_query)
@@ -379,13 +387,27 @@ def export_validated_bookings_by_offer_id(
 def export_bookings_by_offer_id(
     offer_id: int, event_beginning_date: date, export_type: BookingExportType
 ) -> str | bytes:
-    offer_bookings_query = _create_export_query(offer_id, event_beginning_date)
+    offer_bookings_query = get_offer_export_query(offer_id, event_beginning_date)
     if export_type == BookingExportType.EXCEL:
         return _write_bookings_to_excel(offer_bookings_query)
     return _write_bookings_to_csv(offer_bookings_query)
 
 
-def get_export(
+def stream_offer_export_as_csv(query: BaseQuery) -> typing.Iterator[str]:
+    """Yield the CSV export of the bookings of an offer (see
+    `get_offer_export_query()`), one chunk per batch of bookings.
+    """
+    return _stream_csv(booking_export_header(), query, _write_csv_rows)
+
+
+def write_offer_export_as_excel(query: BaseQuery, output: typing.BinaryIO) -> None:
+    """Write the Excel export of the bookings of an offer (see
+    `get_offer_export_query()`) to `output`.
+    """
+    _write_excel(booking_export_header(), query, _write_excel_rows, output)
+
+
+def get_export_query(
     user: User,
     *,
     booking_period: tuple[date, date] | None = None,
@@ -393,8 +415,7 @@ def get_export(
     event_date: date | None = None,
     venue_id: int | None = None,
     offer_id: int | None = None,
-    export_type: BookingExportType | None = BookingExportType.CSV,
-) -> str | bytes:
+) -> BaseQuery:
     bookings_query = _get_filtered_booking_report(
         pro_user=user,
         period=booking_period,
@@ -403,12 +424,61 @@ def get_export(
         venue_id=venue_id,
         offer_id=offer_id,
     )
-    bookings_query = _duplicate_booking_when_quantity_is_two(bookings_query)
+    return _duplicate_booking_when_quantity_is_two(bookings_query)
+
+
+def get_export(
+    user: User,
+    *,
+    booking_period: tuple[date, date] | None = None,
+    status_filter: BookingStatusFilter | None = BookingStatusFilter.BOOKED,
+    event_date: date | None = None,
+    venue_id: int | None = None,
+    offer_id: int | None = None,
+    export_type: BookingExportType | None = BookingExportType.CSV,
+) -> str | bytes:
+    bookings_query = get_export_query(
+        user,
+        booking_period=booking_period,
+        status_filter=status_filter,
+        event_date=event_date,
+        venue_id=venue_id,
+        offer_id=offer_id,
+    )
     if export_type == BookingExportType.EXCEL:
         return _serialize_excel_report(bookings_query)
     return _serialize_csv_report(bookings_query)
 
 
+def stream_export_as_csv(query: BaseQuery) -> typing.Iterator[str]:
+    """Yield the CSV export of bookings (see `get_export_query()`), one
+    chunk per batch of bookings.
+    """
+    return _stream_csv(LEGACY_BOOKING_EXPORT_HEADER, query, _write_legacy_csv_row)
+
+
+def write_export_as_excel(query: BaseQuery, output: typing.BinaryIO) -> None:
+    """Write the Excel export of bookings (see `get_export_query()`) to
+    `output`.
+    """
+    _write_excel(LEGACY_BOOKING_EXPORT_HEADER, query, _write_legacy_excel_row, output)
+
+
+def get_export_file(query: BaseQuery, export_type: BookingExportType) -> typing.BinaryIO:
+    """Write the export of bookings (see `get_export_query()`) to a
+    temporary file, which is deleted when closed.
+    """
+    output = tempfile.TemporaryFile()
+    if export_type == BookingExportType.EXCEL:
+        write_export_as_excel(query, output)
+    else:
+        output.write(codecs.BOM_UTF8)
+        for chunk in stream_export_as_csv(query):
+            output.write(chunk.encode("utf-8"))
+    output.seek(0)
+    return output
+
+
 def field_to_venue_timezone(
     field: InstrumentedAttribute, column: sa.orm.Mapped[typing.Any] | sa.sql.functions.Function
 ) -> cast:
@@ -674,18 +744,58 @@ def _get_booking_status(status: BookingStatus, is_confirmed: bool) -> str:
     return BOOKING_STATUS_LABELS[status]
 
 
-def _write_bookings_to_csv(query: BaseQuery) -> str:
+def _stream_csv(
+    header: list[str], query: BaseQuery, write_rows: typing.Callable[[typing.Any, typing.Any], None]
+) -> typing.Iterator[str]:
     output = StringIO()
     writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(booking_export_header())
-    for booking in query.yield_per(1000):
-        if booking.quantity == DUO_QUANTITY:
-            _write_csv_row(writer, booking, "DUO 1")
-            _write_csv_row(writer, booking, "DUO 2")
-        else:
-            _write_csv_row(writer, booking, "Non")
+    writer.writerow(header)
+    for index, booking in enumerate(query.yield_per(constants.EXPORT_BATCH_SIZE), 1):
+        write_rows(writer, booking)
+        if index % constants.EXPORT_BATCH_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+
+def _write_excel(
+    header: list[str],
+    query: BaseQuery,
+    write_rows: typing.Callable[[Worksheet, int, typing.Any, Format], int],
+    output: typing.BinaryIO,
+) -> None:
+    # In "constant memory" mode, each row is flushed to a temporary file
+    # as soon as the next one is written, instead of keeping the whole
+    # worksheet in memory.
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
 
-    return output.getvalue()
+    bold = workbook.add_format({"bold": 1})
+    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
+    col_width = 18
+
+    worksheet = workbook.add_worksheet()
+
+    for col_num, title in enumerate(header):
+        worksheet.write(0, col_num, title, bold)
+        worksheet.set_column(col_num, col_num, col_width)
+
+    row = 1
+    for booking in query.yield_per(constants.EXPORT_BATCH_SIZE):
+        row = write_rows(worksheet, row, booking, currency_format)
+    workbook.close()
+
+
+def _write_bookings_to_csv(query: BaseQuery) -> str:
+    return "".join(stream_offer_export_as_csv(query))
+
+
+def _write_csv_rows(csv_writer: typing.Any, booking: Booking) -> None:
+    if booking.quantity == DUO_QUANTITY:
+        _write_csv_row(csv_writer, booking, "DUO 1")
+        _write_csv_row(csv_writer, booking, "DUO 2")
+    else:
+        _write_csv_row(csv_writer, booking, "Non")
 
 
 def _write_csv_row(csv_writer: typing.Any, booking: Booking, booking_duo_column: str) -> None:
@@ -720,30 +830,18 @@ def _write_csv_row(csv_writer: typing.Any, booking: Booking, booking_duo_column:
 
 def _write_bookings_to_excel(query: BaseQuery) -> bytes:
     output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-
-    bold = workbook.add_format({"bold": 1})
-    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
-    col_width = 18
-
-    worksheet = workbook.add_worksheet()
-    row = 0
+    write_offer_export_as_excel(query, output)
+    return output.getvalue()
 
-    for col_num, title in enumerate(booking_export_header()):
-        worksheet.write(row, col_num, title, bold)
-        worksheet.set_column(col_num, col_num, col_width)
 
-    row = 1
-    for booking in query.yield_per(1000):
-        if booking.quantity == DUO_QUANTITY:
-            _write_excel_row(worksheet, row, booking, currency_format, "DUO 1")
-            row += 1
-            _write_excel_row(worksheet, row, booking, currency_format, "DUO 2")
-        else:
-            _write_excel_row(worksheet, row, booking, currency_format, "Non")
+def _write_excel_rows(worksheet: Worksheet, row: int, booking: Booking, currency_format: Format) -> int:
+    if booking.quantity == DUO_QUANTITY:
+        _write_excel_row(worksheet, row, booking, currency_format, "DUO 1")
         row += 1
-    workbook.close()
-    return output.getvalue()
+        _write_excel_row(worksheet, row, booking, currency_format, "DUO 2")
+    else:
+        _write_excel_row(worksheet, row, booking, currency_format, "Non")
+    return row + 1
 
 
 def _write_excel_row(
@@ -783,97 +881,81 @@ def _write_excel_row(
 
 
 def _serialize_csv_report(query: BaseQuery) -> str:
-    output = StringIO()
-    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(LEGACY_BOOKING_EXPORT_HEADER)
-    for booking in query.yield_per(1000):
-        writer.writerow(
-            (
-                booking.venueName,
-                booking.offerName,
-                convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
-                booking.ean,
-                booking.beneficiaryFirstName,
-                booking.beneficiaryLastName,
-                booking.beneficiaryEmail,
-                booking.beneficiaryPhoneNumber,
-                convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
-                convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
-                booking_recap_utils.get_booking_token(
-                    booking.token,
-                    booking.status,
-                    booking.isExternal,
-                    booking.stockBeginningDatetime,
-                ),
-                booking.priceCategoryLabel or "",
-                booking.amount,
-                _get_booking_status(booking.status, booking.isConfirmed),
-                convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
-                # This method is still used in the old Payment model
-                serialize_offer_type_educational_or_individual(offer_is_educational=False),
-                booking.beneficiaryPostalCode or "",
-                "Oui" if booking.quantity == DUO_QUANTITY else "Non",
-            )
-        )
-
-    return output.getvalue()
+    return "".join(stream_export_as_csv(query))
 
 
-def _serialize_excel_report(query: BaseQuery) -> bytes:
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-
-    bold = workbook.add_format({"bold": 1})
-    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
-    col_width = 18
-
-    worksheet = workbook.add_worksheet()
-    row = 0
-
-    for col_num, title in enumerate(LEGACY_BOOKING_EXPORT_HEADER):
-        worksheet.write(row, col_num, title, bold)
-        worksheet.set_column(col_num, col_num, col_width)
-    row = 1
-    for booking in query.yield_per(1000):
-        worksheet.write(row, 0, booking.venueName)
-        worksheet.write(row, 1, booking.offerName)
-        worksheet.write(
-            row, 2, str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking))
-        )
-        worksheet.write(row, 3, booking.ean)
-        worksheet.write(row, 4, booking.beneficiaryFirstName)
-        worksheet.write(row, 5, booking.beneficiaryLastName)
-        worksheet.write(row, 6, booking.beneficiaryEmail)
-        worksheet.write(row, 7, booking.beneficiaryPhoneNumber)
-        worksheet.write(row, 8, str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)))
-        worksheet.write(row, 9, str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)))
-        worksheet.write(
-            row,
-            10,
+def _write_legacy_csv_row(csv_writer: typing.Any, booking: Booking) -> None:
+    csv_writer.writerow(
+        (
+            booking.venueName,
+            booking.offerName,
+            convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
+            booking.ean,
+            booking.beneficiaryFirstName,
+            booking.beneficiaryLastName,
+            booking.beneficiaryEmail,
+            booking.beneficiaryPhoneNumber,
+            convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
+            convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
             booking_recap_utils.get_booking_token(
                 booking.token,
                 booking.status,
                 booking.isExternal,
                 booking.stockBeginningDatetime,
             ),
-        )
-        worksheet.write(row, 11, booking.priceCategoryLabel)
-        worksheet.write(row, 12, booking.amount, currency_format)
-        worksheet.write(row, 13, _get_booking_status(booking.status, booking.isConfirmed))
-        worksheet.write(row, 14, str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)))
-        worksheet.write(row, 15, serialize_offer_type_educational_or_individual(offer_is_educational=False))
-        worksheet.write(row, 16, booking.beneficiaryPostalCode)
-        worksheet.write(
-            row,
-            17,
+            booking.priceCategoryLabel or "",
+            booking.amount,
+            _get_booking_status(booking.status, booking.isConfirmed),
+            convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
+            # This method is still used in the old Payment model
+            serialize_offer_type_educational_or_individual(offer_is_educational=False),
+            booking.beneficiaryPostalCode or "",
             "Oui" if booking.quantity == DUO_QUANTITY else "Non",
         )
-        row += 1
+    )
 
-    workbook.close()
+
+def _serialize_excel_report(query: BaseQuery) -> bytes:
+    output = BytesIO()
+    write_export_as_excel(query, output)
     return output.getvalue()
 
 
+def _write_legacy_excel_row(worksheet: Worksheet, row: int, booking: Booking, currency_format: Format) -> int:
+    worksheet.write(row, 0, booking.venueName)
+    worksheet.write(row, 1, booking.offerName)
+    worksheet.write(row, 2, str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking)))
+    worksheet.write(row, 3, booking.ean)
+    worksheet.write(row, 4, booking.beneficiaryFirstName)
+    worksheet.write(row, 5, booking.beneficiaryLastName)
+    worksheet.write(row, 6, booking.beneficiaryEmail)
+    worksheet.write(row, 7, booking.beneficiaryPhoneNumber)
+    worksheet.write(row, 8, str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)))
+    worksheet.write(row, 9, str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)))
+    worksheet.write(
+        row,
+        10,
+        booking_recap_utils.get_booking_token(
+            booking.token,
+            booking.status,
+            booking.isExternal,
+            booking.stockBeginningDatetime,
+        ),
+    )
+    worksheet.write(row, 11, booking.priceCategoryLabel)
+    worksheet.write(row, 12, booking.amount, currency_format)
+    worksheet.write(row, 13, _get_booking_status(booking.status, booking.isConfirmed))
+    worksheet.write(row, 14, str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)))
+    worksheet.write(row, 15, serialize_offer_type_educational_or_individual(offer_is_educational=False))
+    worksheet.write(row, 16, booking.beneficiaryPostalCode)
+    worksheet.write(
+        row,
+        17,
+        "Oui" if booking.quantity == DUO_QUANTITY else "Non",
+    )
+    return row + 1
+
+
 def get_soon_expiring_bookings(expiration_days_delta: int) -> typing.Generator[Booking, None, None]:
     """Find bookings expiring in exactly `expiration_days_delta` days"""
     query = (
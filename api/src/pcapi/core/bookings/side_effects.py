@@ -0,0 +1,152 @@
+"""Side effects of a new booking: notification of the provider, emails,
+reindexation of the offer and updates of user attributes in external
+services (Batch, Brevo).
+
+When the `WIP_ASYNC_BOOKING_SIDE_EFFECTS` feature flag is active, they
+are not run by the request that books the offer: an entry is pushed to
+a Redis queue after the commit, and entries are processed in batches
+by the `process_booking_side_effects` cron task.
+
+Entries are moved to a processing queue while their batch is processed,
+and removed once it has been processed. Entries of a batch that failed
+(or whose process died) are processed again by the next run of the
+task, which must not run concurrently. Ids of bookings whose provider
+and beneficiary have been notified are recorded until their batch has
+been processed, so that only the reindexation and the updates of
+external attributes, which can safely be run twice, are retried.
+"""
+
+from functools import partial
+import json
+import logging
+import time
+import typing
+
+from flask import current_app
+import sqlalchemy as sa
+
+from pcapi.core import search
+from pcapi.core.bookings import constants
+from pcapi.core.bookings.models import Booking
+from pcapi.core.bookings.models import BookingStatus
+from pcapi.core.external.attributes.api import update_external_pro
+from pcapi.core.external.attributes.api import update_external_user
+from pcapi.core.external.batch import track_offer_booked_event
+import pcapi.core.external_bookings.api as external_bookings_api
+import pcapi.core.mails.transactional as transactional_mails
+from pcapi.core.offers.models import Offer
+from pcapi.core.offers.models import Stock
+from pcapi.models.feature import FeatureToggle
+from pcapi.repository import on_commit
+from pcapi.tasks.serialization.external_api_booking_notification_tasks import BookingAction
+from pcapi.utils import queue
+
+
+logger = logging.getLogger(__name__)
+
+
+def on_booking_created(booking: Booking, first_venue_booking: bool) -> None:
+    if FeatureToggle.WIP_ASYNC_BOOKING_SIDE_EFFECTS.is_active():
+        on_commit(
+            partial(
+                queue.add_to_queue,
+                constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE,
+                {"booking_id": booking.id, "first_venue_booking": first_venue_booking},
+            )
+        )
+    else:
+        run_side_effects([booking], first_venue_booking_ids={booking.id} if first_venue_booking else set())
+
+
+def run_side_effects(bookings: typing.Sequence[Booking], first_venue_booking_ids: typing.Collection[int]) -> None:
+    """Run side effects of new bookings. Bookings of the same user or
+    venue share a single update of external attributes, and all offers
+    are reindexed with a single request.
+    """
+    for booking in bookings:
+        _notify_booking(booking, booking.id in first_venue_booking_ids)
+    _update_after_bookings(bookings)
+
+
+def _notify_booking(booking: Booking, first_venue_booking: bool) -> None:
+    # The booking may have been cancelled before its side effects are
+    # processed: do not notify anyone.
+    if booking.status == BookingStatus.CANCELLED:
+        return
+    try:
+        track_offer_booked_event(booking.userId, booking.stock.offer)
+        external_bookings_api.send_booking_notification_to_external_service(booking, BookingAction.BOOK)
+        transactional_mails.send_user_new_booking_to_pro_email(booking, first_venue_booking)
+        transactional_mails.send_individual_booking_confirmation_email_to_beneficiary(booking)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not run side effects of booking", extra={"booking_id": booking.id})
+
+
+def _update_after_bookings(bookings: typing.Sequence[Booking]) -> None:
+    search.async_index_offer_ids(
+        sorted({booking.stock.offerId for booking in bookings}),
+        reason=search.IndexationReason.BOOKING_CREATION,
+    )
+
+    users = {booking.userId: booking.user for booking in bookings}
+    for user in users.values():
+        update_external_user(user)
+    for booking_email in {booking.stock.offer.venue.bookingEmail for booking in bookings}:
+        update_external_pro(booking_email)
+
+
+def process_queued_side_effects(batch_size: int = constants.BOOKING_SIDE_EFFECTS_BATCH_SIZE) -> int:
+    """Run side effects of queued bookings, by batches of ``batch_size``
+    bookings, until the queue is empty. Return the number of processed
+    bookings.
+    """
+    start = time.perf_counter()
+    redis_client = current_app.redis_client
+    n_requeued = queue.requeue_processing_queue(
+        constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE, constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE
+    )
+    if n_requeued:
+        logger.warning("Requeued side effects of bookings that have not been processed", extra={"count": n_requeued})
+    n_processed = 0
+    n_failed = 0
+    while raw_items := queue.move_many_to_processing_queue(
+        constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE, constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE, batch_size
+    ):
+        items = [json.loads(raw_item) for raw_item in raw_items]
+        booking_ids = [item["booking_id"] for item in items]
+        first_venue_booking_ids = {item["booking_id"] for item in items if item["first_venue_booking"]}
+        bookings = (
+            Booking.query.filter(Booking.id.in_(booking_ids))
+            .options(
+                sa.orm.joinedload(Booking.user),
+                sa.orm.joinedload(Booking.stock, innerjoin=True)
+                .joinedload(Stock.offer, innerjoin=True)
+                .joinedload(Offer.venue, innerjoin=True),
+            )
+            .all()
+        )
+        # Bookings of a batch that failed have already been notified.
+        notified_booking_ids = {
+            int(booking_id)
+            for booking_id in redis_client.smembers(constants.REDIS_BOOKING_SIDE_EFFECTS_NOTIFIED_BOOKINGS)
+        }
+        for booking in bookings:
+            if booking.id not in notified_booking_ids:
+                _notify_booking(booking, booking.id in first_venue_booking_ids)
+                redis_client.sadd(constants.REDIS_BOOKING_SIDE_EFFECTS_NOTIFIED_BOOKINGS, booking.id)
+        try:
+            _update_after_bookings(bookings)
+        except Exception:  # pylint: disable=broad-except
+            # Left in the processing queue, to be retried by the next run.
+            logger.exception("Could not run side effects of bookings", extra={"booking_ids": booking_ids})
+            n_failed += len(items)
+            continue
+        queue.remove_from_processing_queue(constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE, raw_items)
+        redis_client.srem(constants.REDIS_BOOKING_SIDE_EFFECTS_NOTIFIED_BOOKINGS, *booking_ids)
+        n_processed += len(items)
+
+    logger.info(
+        "Processed side effects of bookings",
+        extra={"count": n_processed, "failed": n_failed, "duration": round(time.perf_counter() - start, 2)},
+    )
+    return n_processed
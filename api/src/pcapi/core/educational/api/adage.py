@@ -273,7 +273,7 @@ def _remove_venue_from_eac(venue: offerers_models.Venue) -> None:
     venue.adageInscriptionDate = None
 
 
-def get_adage_educational_redactors_for_uai(uai: str, *, force_update: bool = False) -> list[dict[str, str]]:
+def _get_adage_educational_redactors_json_for_uai(uai: str, *, force_update: bool = False) -> str:
     EDUCATIONAL_REDACTORS_CACHE_TIMEOUT = 60 * 60  # 1h in seconds
     educational_redactors_cache_key = f"api:adage_educational_redactor_for_uai:{uai}"
 
@@ -288,26 +288,101 @@ def get_adage_educational_redactors_for_uai(uai: str, *, force_update: bool = Fa
         return_type=str,
         force_update=force_update,
     )
+    return typing.cast(str, educational_redactors_json)
+
 
-    educational_redactors_json = typing.cast(str, educational_redactors_json)
+def get_adage_educational_redactors_for_uai(uai: str, *, force_update: bool = False) -> list[dict[str, str]]:
+    educational_redactors_json = _get_adage_educational_redactors_json_for_uai(uai, force_update=force_update)
     educational_redactors = json.loads(educational_redactors_json)
     return educational_redactors
 
 
+def _normalize_redactor_search(text: str) -> str:
+    return clean_accents(text).upper()
+
+
+def _get_trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class RedactorDirectory:
+    """Educational redactors of an institution, with their normalized
+    names and emails indexed by trigrams, to autocomplete them without
+    scanning the whole list.
+    """
+
+    def __init__(self, redactors: list[dict[str, str]]):
+        self.redactors = redactors
+        # "NOM PRENOM" and "PRENOM NOM" of each redactor
+        self.names = [
+            (
+                _normalize_redactor_search(f'{redactor["nom"]} {redactor["prenom"]}'),
+                _normalize_redactor_search(f'{redactor["prenom"]} {redactor["nom"]}'),
+            )
+            for redactor in redactors
+        ]
+        self.emails = [_normalize_redactor_search(redactor.get("mail") or "") for redactor in redactors]
+        self.name_trigrams: dict[str, set[int]] = {}
+        self.email_trigrams: dict[str, set[int]] = {}
+        for index, (name, reversed_name) in enumerate(self.names):
+            for trigram in _get_trigrams(name) | _get_trigrams(reversed_name):
+                self.name_trigrams.setdefault(trigram, set()).add(index)
+        for index, email in enumerate(self.emails):
+            for trigram in _get_trigrams(email):
+                self.email_trigrams.setdefault(trigram, set()).add(index)
+
+    def _get_candidate_indexes(self, trigrams: dict[str, set[int]], search: str) -> set[int]:
+        if len(search) < 3:
+            return set(range(len(self.redactors)))
+        return set.intersection(*(trigrams.get(trigram, set()) for trigram in _get_trigrams(search)))
+
+    def search(self, candidate: str, use_email: bool = False) -> list[dict[str, str]]:
+        """Return redactors whose name (or email, if `use_email` is
+        true) contains `candidate`, ignoring accents and case, in the
+        order of the directory.
+        """
+        search = _normalize_redactor_search(candidate)
+        indexes = self._get_candidate_indexes(self.name_trigrams, search)
+        if use_email:
+            indexes |= self._get_candidate_indexes(self.email_trigrams, search)
+        # Trigrams only preselect redactors: check actual matches.
+        return [
+            self.redactors[index]
+            for index in sorted(indexes)
+            if search in self.names[index][0]
+            or search in self.names[index][1]
+            or (use_email and search in self.emails[index])
+        ]
+
+
+# Redactor directories of the current process, by UAI, with the JSON
+# they have been built from (as cached in Redis).
+REDACTOR_DIRECTORIES_MAX_SIZE = 1000
+_redactor_directories: dict[str, tuple[str, RedactorDirectory]] = {}
+
+
+def get_educational_redactor_directory(uai: str) -> RedactorDirectory:
+    """Return the redactor directory of an institution.
+
+    The directory is built once for each version of the redactors cached
+    in Redis, and kept in memory by each process: autocompletion does not
+    parse and scan the list of redactors on each keystroke.
+    """
+    educational_redactors_json = _get_adage_educational_redactors_json_for_uai(uai)
+    cached = _redactor_directories.get(uai)
+    if cached is not None and cached[0] == educational_redactors_json:
+        return cached[1]
+
+    directory = RedactorDirectory(json.loads(educational_redactors_json))
+    _redactor_directories.pop(uai, None)
+    if len(_redactor_directories) >= REDACTOR_DIRECTORIES_MAX_SIZE:
+        # Forget the directory that has been built first.
+        del _redactor_directories[next(iter(_redactor_directories))]
+    _redactor_directories[uai] = (educational_redactors_json, directory)
+    return directory
+
+
 def autocomplete_educational_redactor_for_uai(
     uai: str, candidate: str, use_email: bool = False
 ) -> list[dict[str, str]]:
-    redactors = get_adage_educational_redactors_for_uai(uai=uai)
-    unaccented_candidate = clean_accents(candidate).upper()
-    result = []
-    for redactor in redactors:
-        if unaccented_candidate in f'{redactor["nom"]} {redactor["prenom"]}'.upper():
-            result.append(redactor)
-            continue
-        if unaccented_candidate in f'{redactor["prenom"]} {redactor["nom"]}'.upper():
-            result.append(redactor)
-            continue
-        if use_email and unaccented_candidate in redactor["mail"].upper():
-            result.append(redactor)
-            continue
-    return result
+    return get_educational_redactor_directory(uai).search(candidate, use_email=use_email)
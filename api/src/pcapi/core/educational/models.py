@@ -477,6 +477,24 @@ class CollectiveOffer(
 ):
     __tablename__ = "collective_offer"
 
+    @declared_attr
+    def __table_args__(self):
+        parent_args = []
+        # Retrieves indexes from parent mixins defined in __table_args__
+        for base_class in self.__mro__:
+            try:
+                parent_args += super(base_class, self).__table_args__
+            except (AttributeError, TypeError):
+                pass
+        parent_args += [
+            sa.Index(
+                "ix_collective_offer_trgm_unaccent_name",
+                sa.func.immutable_unaccent(self.name),
+                postgresql_using="gin",
+            ),
+        ]
+        return tuple(parent_args)
+
     offerId = sa.Column(sa.BigInteger, nullable=True)
 
     isActive: bool = sa.Column(sa.Boolean, nullable=False, server_default=sa.sql.expression.true(), default=True)
@@ -1153,6 +1171,11 @@ class CollectiveOfferTemplate(
                 '("contactUrl" IS NULL OR "contactForm" IS NULL)',
                 name="collective_offer_tmpl_contact_form_switch_constraint",
             ),
+            sa.Index(
+                "ix_collective_offer_template_trgm_unaccent_name",
+                sa.func.immutable_unaccent(self.name),
+                postgresql_using="gin",
+            ),
         ]
 
         return tuple(parent_args)
@@ -1588,7 +1611,20 @@ class EducationalInstitution(PcObject, Base, Model):
         "CollectivePlaylist", back_populates="institution"
     )
 
-    __table_args__ = (sa.Index("ix_educational_institution_type_name_city", institutionType + " " + name + " " + city),)
+    __table_args__ = (
+        sa.Index("ix_educational_institution_type_name_city", institutionType + " " + name + " " + city),
+        sa.Index(
+            "ix_educational_institution_trgm_unaccent_name",
+            sa.func.immutable_unaccent(name),
+            postgresql_using="gin",
+        ),
+        sa.Index(
+            "ix_educational_institution_trgm_unaccent_city",
+            sa.func.immutable_unaccent(city),
+            postgresql_using="gin",
+        ),
+        sa.Index("ix_educational_institution_trgm_postal_code", postalCode, postgresql_using="gin"),
+    )
 
     @property
     def full_name(self) -> str:
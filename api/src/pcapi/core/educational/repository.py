@@ -527,6 +527,11 @@ def get_collective_offers_for_filters(
         formats=formats,
     )
 
+    if offers_repository.is_name_search_ranked(name_keywords):
+        assert name_keywords  # helps mypy
+        query = query.order_by(
+            offers_repository.get_name_search_ranking(educational_models.CollectiveOffer.name, name_keywords)
+        )
     query = query.order_by(educational_models.CollectiveOffer.dateCreated.desc())
     offers = (
         query.options(
@@ -576,6 +581,11 @@ def get_collective_offers_template_for_filters(
     if query is None:
         return []
 
+    if offers_repository.is_name_search_ranked(name_keywords):
+        assert name_keywords  # helps mypy
+        query = query.order_by(
+            offers_repository.get_name_search_ranking(educational_models.CollectiveOfferTemplate.name, name_keywords)
+        )
     query = query.order_by(educational_models.CollectiveOfferTemplate.dateCreated.desc())
 
     offers = (
@@ -1152,6 +1162,11 @@ def get_all_educational_institutions(offset: int = 0, limit: int = 0) -> tuple[t
     return query.all(), total
 
 
+def _unaccented_ilike(column: sa.orm.InstrumentedAttribute, search: str) -> sa.sql.ColumnElement:
+    search = clean_accents(search).replace(" ", "%").replace("-", "%")
+    return sa.func.immutable_unaccent(column).ilike(f"%{search}%")
+
+
 def search_educational_institution(
     *,
     educational_institution_id: int | None,
@@ -1166,35 +1181,22 @@ def search_educational_institution(
     if educational_institution_id is not None:
         filters.append(educational_models.EducationalInstitution.id == educational_institution_id)
 
+    # `immutable_unaccent` (rather than `unaccent`) is required to use
+    # the trigram indexes on unaccented columns.
     if name is not None:
-        name = name.replace(" ", "%")
-        name = name.replace("-", "%")
-        filters.append(
-            sa.func.unaccent(educational_models.EducationalInstitution.name).ilike(f"%{clean_accents(name)}%"),
-        )
+        filters.append(_unaccented_ilike(educational_models.EducationalInstitution.name, name))
 
     if institution_type is not None:
-        institution_type = institution_type.replace(" ", "%")
-        institution_type = institution_type.replace("-", "%")
-        filters.append(
-            sa.func.unaccent(educational_models.EducationalInstitution.institutionType).ilike(
-                f"%{clean_accents(institution_type)}%"
-            ),
-        )
+        filters.append(_unaccented_ilike(educational_models.EducationalInstitution.institutionType, institution_type))
 
     if city is not None:
-        city = city.replace(" ", "%")
-        city = city.replace("-", "%")
-        filters.append(
-            sa.func.unaccent(educational_models.EducationalInstitution.city).ilike(f"%{clean_accents(city)}%"),
-        )
+        filters.append(_unaccented_ilike(educational_models.EducationalInstitution.city, city))
 
     if postal_code is not None:
-        postal_code = postal_code.replace(" ", "%")
-        postal_code = postal_code.replace("-", "%")
-        filters.append(
-            sa.func.unaccent(educational_models.EducationalInstitution.postalCode).ilike(f"%{postal_code}%"),
-        )
+        # Postal codes have no accents: search them as is to use their
+        # trigram index.
+        postal_code = postal_code.replace(" ", "%").replace("-", "%")
+        filters.append(educational_models.EducationalInstitution.postalCode.ilike(f"%{postal_code}%"))
 
     if uai is not None:
         filters.append(educational_models.EducationalInstitution.institutionId == uai)
@@ -72,6 +72,7 @@ def disable_external_bookings() -> None:
         {"isActive": True}, synchronize_session=False
     )
     db.session.commit()
+    feature.notify_features_changed()
 
 
 def _get_external_bookings_client_api(venue_id: int) -> external_bookings_models.ExternalBookingsClientAPI:
@@ -1,12 +1,27 @@
 from dataclasses import dataclass
-from functools import partial
 from functools import wraps
 import json
+import logging
+import time
 import typing
+import uuid
+
+from flask import current_app
 
 import pcapi.core.bookings.models as bookings_models
 import pcapi.core.users.models as users_models
-from pcapi.utils.cache import get_from_cache
+
+
+logger = logging.getLogger(__name__)
+
+# How long a cached value can still be served after it has expired,
+# while it is being refreshed or if the provider fails.
+STALE_CACHE_TIMEOUT = 10 * 60  # seconds
+# How long a request may keep the lock of a cache key while it calls
+# the provider. Other requests that need the same key wait for it, at
+# most for the request timeout of the provider.
+CACHE_LOCK_TIMEOUT = 15  # seconds
+CACHE_LOCK_POLL_INTERVAL = 0.05  # seconds
 
 
 @dataclass
@@ -49,27 +64,87 @@ class ExternalBookingsClientAPI:
         raise NotImplementedError("Should be implemented in subclass (abstract method)")
 
 
-def cache_external_call(key_template: str, expire: int | None = None) -> typing.Callable:
+def cache_external_call(
+    key_template: str, expire: int | None = None, stale_expire: int = STALE_CACHE_TIMEOUT
+) -> typing.Callable:
     """
     Cache the result of a external call to a provider.
     Uses the cinema_id of ClientAPI instance and the arguments pass to the function as key
     (similar to what `@lru_cache` is doing)
 
+    Concurrent cache misses of the same key are coalesced: only one
+    request calls the provider, the others wait for its result. A
+    stale copy of the result is kept for `stale_expire` seconds after
+    it expires. It is served while another request is refreshing it,
+    and when the provider call fails.
+
     The function cached should return a string using `json.dumps`
     """
 
     def decorator(func: typing.Callable) -> typing.Callable:
         @wraps(func)
         def func_to_cache(instance: ExternalBookingsClientAPI, *args: typing.Any, **kwargs: typing.Any) -> list | dict:
-            key_args = (instance.cinema_id, *args)
-            retriever = partial(func, instance, *args, **kwargs)
-            result_as_json = get_from_cache(
-                key_template=key_template, key_args=key_args, expire=expire, retriever=retriever
+            key = key_template % (instance.cinema_id, *args)
+            result_as_json = _get_from_cache_with_single_flight(
+                key,
+                lambda: func(instance, *args, **kwargs),
+                expire=expire,
+                stale_expire=stale_expire,
+                wait_timeout=min(instance.request_timeout or CACHE_LOCK_TIMEOUT, CACHE_LOCK_TIMEOUT),
             )
-            if not isinstance(result_as_json, str):
-                raise AssertionError("This function is meant to be used with functions returning data as JSON")
             return json.loads(result_as_json)
 
         return func_to_cache
 
     return decorator
+
+
+def _get_from_cache_with_single_flight(
+    key: str, retriever: typing.Callable[[], str], expire: int | None, stale_expire: int, wait_timeout: int
+) -> str:
+    redis_client = current_app.redis_client
+    data = redis_client.get(key)
+    if data is not None:
+        return data
+
+    stale_key = f"{key}:stale"
+    lock_key = f"{key}:lock"
+    lock_token = str(uuid.uuid4())
+    deadline = time.monotonic() + wait_timeout
+    has_lock = bool(redis_client.set(lock_key, lock_token, nx=True, ex=CACHE_LOCK_TIMEOUT))
+    while not has_lock:
+        # Another request is already calling the provider for this key.
+        stale_data = redis_client.get(stale_key)
+        if stale_data is not None:
+            return stale_data
+        if time.monotonic() > deadline:
+            break
+        time.sleep(CACHE_LOCK_POLL_INTERVAL)
+        data = redis_client.get(key)
+        if data is not None:
+            return data
+        has_lock = bool(redis_client.set(lock_key, lock_token, nx=True, ex=CACHE_LOCK_TIMEOUT))
+
+    try:
+        data = retriever()
+    except Exception:  # pylint: disable=broad-except
+        stale_data = redis_client.get(stale_key)
+        if stale_data is None:
+            raise
+        logger.warning("Serving stale data after external call failure", extra={"key": key}, exc_info=True)
+        return stale_data
+    finally:
+        if has_lock and redis_client.get(lock_key) == lock_token:
+            redis_client.delete(lock_key)
+
+    if not isinstance(data, str):
+        raise AssertionError("This function is meant to be used with functions returning data as JSON")
+    if expire is None:
+        # The result never expires, so there is no need for a stale copy.
+        redis_client.set(key, data)
+        return data
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.set(key, data, ex=expire)
+    pipeline.set(stale_key, data, ex=expire + stale_expire)
+    pipeline.execute()
+    return data
@@ -31,6 +31,7 @@ import functools
 import itertools
 import logging
 import math
+import multiprocessing
 import pathlib
 import secrets
 import tempfile
@@ -44,6 +45,7 @@ from flask import render_template
 from flask_sqlalchemy import BaseQuery
 import pytz
 import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sqla_psql
 import sqlalchemy.orm as sqla_orm
 import sqlalchemy.sql.functions as sqla_func
 
@@ -102,35 +104,113 @@ CASHFLOW_BATCH_LABEL_PREFIX = "VIR"
 
 def get_pricing_ordering_date(
     booking: bookings_models.Booking | educational_models.CollectiveBooking,
+    pricing_point_link: offerers_models.VenuePricingPointLink | None = None,
 ) -> datetime.datetime:
     if isinstance(booking, bookings_models.Booking):
         eventDatetime = booking.stock.beginningDatetime
     else:
         eventDatetime = booking.collectiveStock.endDatetime
+    pricing_point_link = pricing_point_link or get_pricing_point_link(booking)
     # IMPORTANT: if you change this, you must also adapt the SQL query
     # in `core.offerers.api.link_venue_to_pricing_point()`
     return max(
-        get_pricing_point_link(booking).timespan.lower,
+        pricing_point_link.timespan.lower,
         eventDatetime or booking.dateUsed,
         booking.dateUsed,
     )
 
 
+BOOKING_EVENT_MOTIVES = (
+    models.FinanceEventMotive.BOOKING_USED,
+    models.FinanceEventMotive.BOOKING_USED_AFTER_CANCELLATION,
+    models.FinanceEventMotive.BOOKING_UNUSED,
+    models.FinanceEventMotive.BOOKING_CANCELLED_AFTER_USE,
+)
+
+
 def add_event(
     motive: models.FinanceEventMotive,
     booking: bookings_models.Booking | educational_models.CollectiveBooking | None = None,
     booking_incident: models.BookingFinanceIncident | None = None,
     incident_validation_date: datetime.datetime | None = None,
+    pricing_point_links: list[offerers_models.VenuePricingPointLink] | None = None,
 ) -> models.FinanceEvent:
-    status = None
-    value_date = None
-    pricing_point_id = None
-    pricing_ordering_date = None
+    """Add a finance event to the session.
+
+    ``pricing_point_links`` may hold all pricing point links of the
+    venue of the booking, if the caller has already loaded them. The
+    pricing point of the event is then not queried.
+    """
     if booking_incident:
         booking = booking_incident.booking or booking_incident.collectiveBooking
 
     assert booking
 
+    values = _get_event_values(motive, booking, incident_validation_date, pricing_point_links)
+    event = models.FinanceEvent(
+        booking=booking if isinstance(booking, bookings_models.Booking) and not booking_incident else None,  # type: ignore[arg-type]
+        collectiveBooking=(
+            booking  # type: ignore[arg-type]
+            if isinstance(booking, educational_models.CollectiveBooking) and not booking_incident
+            else None
+        ),
+        bookingFinanceIncident=booking_incident,  # type: ignore[arg-type]
+        motive=motive,
+        venue=booking.venue,
+        **values,
+    )
+    db.session.add(event)
+    return event
+
+
+def add_events_bulk(
+    motive: models.FinanceEventMotive,
+    bookings: typing.Sequence[bookings_models.Booking | educational_models.CollectiveBooking],
+) -> int:
+    """Add a finance event for each booking, and return the number of
+    added events.
+
+    Unlike `add_event()`, pricing point links of all venues are loaded
+    with a single query, and so are stocks of bookings if they have
+    not been loaded yet. All events are inserted with a single INSERT
+    statement and are not added to the session.
+    """
+    if motive not in BOOKING_EVENT_MOTIVES:
+        raise ValueError(f"Unexpected FinanceEventMotive: {motive}")
+    if not bookings:
+        return 0
+
+    links_by_venue = _get_pricing_point_links_by_venue({booking.venueId for booking in bookings})
+    if motive in (
+        models.FinanceEventMotive.BOOKING_USED,
+        models.FinanceEventMotive.BOOKING_USED_AFTER_CANCELLATION,
+    ):
+        # Needed by `get_pricing_ordering_date()`
+        _load_stocks(bookings)
+
+    rows = []
+    for booking in bookings:
+        values = _get_event_values(motive, booking, None, links_by_venue.get(booking.venueId, []))
+        is_individual = isinstance(booking, bookings_models.Booking)
+        rows.append(
+            {
+                "bookingId": booking.id if is_individual else None,
+                "collectiveBookingId": None if is_individual else booking.id,
+                "motive": motive,
+                "venueId": booking.venueId,
+                **values,
+            }
+        )
+    db.session.execute(sa.insert(models.FinanceEvent).values(rows))
+    return len(rows)
+
+
+def _get_event_values(
+    motive: models.FinanceEventMotive,
+    booking: bookings_models.Booking | educational_models.CollectiveBooking,
+    incident_validation_date: datetime.datetime | None,
+    pricing_point_links: list[offerers_models.VenuePricingPointLink] | None,
+) -> dict:
     if motive in (
         models.FinanceEventMotive.BOOKING_USED,
         models.FinanceEventMotive.BOOKING_USED_AFTER_CANCELLATION,
@@ -138,9 +218,12 @@ def add_event(
         assert booking.dateUsed
         value_date = booking.dateUsed
 
-        pricing_point_id = booking.venue.current_pricing_point_id
+        pricing_point_id = _get_current_pricing_point_id(booking, pricing_point_links)
         if pricing_point_id:
-            pricing_ordering_date = get_pricing_ordering_date(booking)
+            pricing_point_link = (
+                _find_pricing_point_link(pricing_point_links, booking) if pricing_point_links is not None else None
+            )
+            pricing_ordering_date = get_pricing_ordering_date(booking, pricing_point_link=pricing_point_link)
             status = models.FinanceEventStatus.READY
         else:
             pricing_ordering_date = None
@@ -172,7 +255,7 @@ def add_event(
             raise ValueError(f"Cannot create FinanceEvent with motive {motive}. `incident_validation_date` is missing")
         value_date = incident_validation_date
 
-        pricing_point_id = booking.venue.current_pricing_point_id
+        pricing_point_id = _get_current_pricing_point_id(booking, pricing_point_links)
         if pricing_point_id:
             pricing_ordering_date = incident_validation_date
             status = models.FinanceEventStatus.READY
@@ -183,25 +266,59 @@ def add_event(
     else:
         raise ValueError(f"Unexpected FinanceEventMotive: {motive}")
 
-    assert value_date is not None
+    return {
+        "status": status,
+        "valueDate": value_date,
+        "pricingPointId": pricing_point_id,
+        "pricingOrderingDate": pricing_ordering_date,
+    }
 
-    event = models.FinanceEvent(
-        booking=booking if isinstance(booking, bookings_models.Booking) and not booking_incident else None,  # type: ignore[arg-type]
-        collectiveBooking=(
-            booking  # type: ignore[arg-type]
-            if isinstance(booking, educational_models.CollectiveBooking) and not booking_incident
-            else None
-        ),
-        bookingFinanceIncident=booking_incident,  # type: ignore[arg-type]
-        status=status,
-        motive=motive,
-        valueDate=value_date,
-        venue=booking.venue,
-        pricingPointId=pricing_point_id,
-        pricingOrderingDate=pricing_ordering_date,
+
+def _get_current_pricing_point_id(
+    booking: bookings_models.Booking | educational_models.CollectiveBooking,
+    pricing_point_links: list[offerers_models.VenuePricingPointLink] | None,
+) -> int | None:
+    if pricing_point_links is None:
+        return booking.venue.current_pricing_point_id
+    # Same as `Venue.current_pricing_point_id`, without any query.
+    now = datetime.datetime.utcnow()
+    return next((link.pricingPointId for link in pricing_point_links if now in link.timespan), None)
+
+
+def _get_pricing_point_links_by_venue(
+    venue_ids: typing.Collection[int],
+) -> dict[int, list[offerers_models.VenuePricingPointLink]]:
+    links = offerers_models.VenuePricingPointLink.query.filter(
+        offerers_models.VenuePricingPointLink.venueId.in_(venue_ids)
     )
-    db.session.add(event)
-    return event
+    links_by_venue: dict[int, list[offerers_models.VenuePricingPointLink]] = defaultdict(list)
+    for link in links:
+        links_by_venue[link.venueId].append(link)
+    return links_by_venue
+
+
+def _load_stocks(bookings: typing.Iterable[bookings_models.Booking | educational_models.CollectiveBooking]) -> None:
+    """Load stocks of bookings that have not been loaded yet, with one
+    query for individual bookings and one for collective bookings.
+    """
+    individual_booking_ids = []
+    collective_booking_ids = []
+    for booking in bookings:
+        unloaded = typing.cast(sqla_orm.InstanceState, sa.inspect(booking)).unloaded
+        if isinstance(booking, bookings_models.Booking) and "stock" in unloaded:
+            individual_booking_ids.append(booking.id)
+        elif isinstance(booking, educational_models.CollectiveBooking) and "collectiveStock" in unloaded:
+            collective_booking_ids.append(booking.id)
+    # Bookings are already in the identity map: these queries only
+    # populate their unloaded relationship.
+    if individual_booking_ids:
+        bookings_models.Booking.query.filter(bookings_models.Booking.id.in_(individual_booking_ids)).options(
+            sqla_orm.joinedload(bookings_models.Booking.stock)
+        ).all()
+    if collective_booking_ids:
+        educational_models.CollectiveBooking.query.filter(
+            educational_models.CollectiveBooking.id.in_(collective_booking_ids)
+        ).options(sqla_orm.joinedload(educational_models.CollectiveBooking.collectiveStock)).all()
 
 
 def cancel_latest_event(
@@ -246,9 +363,19 @@ def cancel_latest_event(
 def price_events(
     min_date: datetime.datetime = MIN_DATE_TO_PRICE,
     batch_size: int = PRICE_EVENTS_BATCH_SIZE,
-) -> None:
+    group_by_pricing_point: bool = False,
+    shard: tuple[int, int] | None = None,
+) -> models.PriceEventsReport:
     """Price finance events that are ready to be priced.
 
+    If ``group_by_pricing_point`` is set, events of each batch are
+    grouped by pricing point and each group is priced in a single
+    transaction (see `price_events_of_pricing_point()`).
+
+    If ``shard`` is given as ``(index, count)``, only events of pricing
+    points whose id modulo ``count`` equals ``index`` are priced (see
+    `price_events_in_parallel()`).
+
     This function is normally called by a cron job.
     """
     # The upper bound on `pricingOrderingDate` avoids selecting a very
@@ -264,7 +391,7 @@ def price_events(
     # resulting in a very large session that is updated on each
     # commit, which takes a lot of time (up to 1 or 2 seconds per
     # commit).
-    event_query = _get_events_to_price(window)
+    event_query = _get_events_to_price(window, shard)
     loops = math.ceil(event_query.count() / batch_size)
 
     def _get_loop_query(
@@ -284,11 +411,45 @@ def price_events(
         return query.limit(batch_size)
 
     last_event = None
+    priced_events_count = 0
+    start = time.perf_counter()
     while loops > 0:
         with log_elapsed(logger, "Fetched batch of events to price"):
             events = list(_get_loop_query(event_query, last_event))
-        for event in events:
-            last_event = event
+        # Custom reimbursement rules are loaded once per process, and
+        # only reloaded if they have changed since the previous batch.
+        rule_finder = reimbursement.get_shared_custom_rule_finder()
+        events_to_price_one_by_one = events
+        if group_by_pricing_point:
+            events_to_price_one_by_one = []
+            events_by_pricing_point: dict[int, list[models.FinanceEvent]] = defaultdict(list)
+            for event in events:
+                events_by_pricing_point[event.pricingPointId].append(event)
+            for pricing_point_id, pricing_point_events in events_by_pricing_point.items():
+                if pricing_point_id in errored_pricing_point_ids:
+                    continue
+                extra = {
+                    "events": len(pricing_point_events),
+                    "pricing_point": pricing_point_id,
+                }
+                try:
+                    with log_elapsed(logger, "Priced events of pricing point", extra):
+                        pricings = price_events_of_pricing_point(
+                            pricing_point_id, pricing_point_events, rule_finder=rule_finder
+                        )
+                    priced_events_count += len(pricings)
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Price events one by one, so that we price as
+                    # many events as possible before the failing one,
+                    # and log the exact event that could not be priced.
+                    logger.info(
+                        "Could not price events of pricing point at once, pricing them one by one",
+                        extra={"pricing_point": pricing_point_id, "exc": str(exc)},
+                    )
+                    events_to_price_one_by_one.extend(pricing_point_events)
+        if events:
+            last_event = events[-1]
+        for event in events_to_price_one_by_one:
             try:
                 if event.pricingPointId in errored_pricing_point_ids:
                     continue
@@ -297,7 +458,8 @@ def price_events(
                     "pricing_point": event.pricingPointId,
                 }
                 with log_elapsed(logger, "Priced event", extra):
-                    price_event(event)
+                    price_event(event, rule_finder=rule_finder)
+                priced_events_count += 1
             except Exception as exc:  # pylint: disable=broad-except
                 errored_pricing_point_ids.add(event.pricingPointId)
                 logger.info(
@@ -320,6 +482,73 @@ def price_events(
                 if event != last_event:
                     db.session.expunge(event)
 
+    report = models.PriceEventsReport(
+        priced_events=priced_events_count,
+        errored_pricing_point_ids=errored_pricing_point_ids,
+        duration=time.perf_counter() - start,
+    )
+    logger.info(
+        "Finished pricing events",
+        extra={
+            "events": report.priced_events,
+            "errored_pricing_points": len(report.errored_pricing_point_ids),
+            "duration": report.duration,
+            "events_per_second": report.events_per_second,
+            "shard": shard,
+        },
+    )
+    return report
+
+
+def _price_events_of_shard(shard: tuple[int, int], kwargs: dict) -> models.PriceEventsReport:
+    # The engine has been disposed of before forking, but be defensive:
+    # never reuse connections of the parent process.
+    db.engine.dispose(close=False)
+    try:
+        return price_events(shard=shard, **kwargs)
+    finally:
+        db.session.remove()
+
+
+def price_events_in_parallel(workers: int, **kwargs: typing.Any) -> models.PriceEventsReport:
+    """Price finance events in ``workers`` separate processes.
+
+    Events are split by pricing point, so that each pricing point is
+    handled by a single worker (pricing of a pricing point is
+    serialized anyway, see `lock_pricing_point()`). Keyword arguments
+    are passed to `price_events()`.
+    """
+    if workers < 2:
+        return price_events(**kwargs)
+
+    # Database connections must not be shared with child processes.
+    db.session.remove()
+    db.engine.dispose()
+    start = time.perf_counter()
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        shard_reports = pool.starmap(
+            _price_events_of_shard,
+            [((index, workers), kwargs) for index in range(workers)],
+        )
+
+    report = models.PriceEventsReport(duration=time.perf_counter() - start)
+    for shard_report in shard_reports:
+        report.priced_events += shard_report.priced_events
+        report.errored_pricing_point_ids |= shard_report.errored_pricing_point_ids
+    logger.info(
+        "Finished pricing events in parallel",
+        extra={
+            "workers": workers,
+            "events": report.priced_events,
+            "events_by_worker": [shard_report.priced_events for shard_report in shard_reports],
+            "errored_pricing_points": len(report.errored_pricing_point_ids),
+            "duration": report.duration,
+            "events_per_second": report.events_per_second,
+        },
+    )
+    return report
+
 
 def get_pricing_point_link(
     booking: bookings_models.Booking | educational_models.CollectiveBooking,
@@ -327,8 +556,14 @@ def get_pricing_point_link(
     """Return the venue-pricing point link to use at the time the
     booking was marked as used.
     """
+    return _find_pricing_point_link(booking.venue.pricing_point_links, booking)
+
+
+def _find_pricing_point_link(
+    links: list[offerers_models.VenuePricingPointLink],
+    booking: bookings_models.Booking | educational_models.CollectiveBooking,
+) -> offerers_models.VenuePricingPointLink:
     timestamp = booking.dateUsed
-    links = booking.venue.pricing_point_links
 
     # Look for a link that was active at the requested date.
     for link in links:
@@ -350,8 +585,11 @@ def get_pricing_point_link(
     raise ValueError(f"Could not find pricing point for booking {booking.id}")
 
 
-def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) -> BaseQuery:
-    return (
+def _get_events_to_price(
+    window: tuple[datetime.datetime, datetime.datetime],
+    shard: tuple[int, int] | None = None,
+) -> BaseQuery:
+    query = (
         models.FinanceEvent.query.filter(
             models.FinanceEvent.pricingPointId.is_not(None),
             models.FinanceEvent.status == models.FinanceEventStatus.READY,
@@ -367,6 +605,10 @@ def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) ->
             sa.orm.joinedload(models.FinanceEvent.collectiveBooking),
         )
     )
+    if shard:
+        index, count = shard
+        query = query.filter(models.FinanceEvent.pricingPointId % count == index)
+    return query
 
 
 def lock_pricing_point(pricing_point_id: int) -> None:
@@ -393,7 +635,10 @@ def lock_bank_account(bank_account_id: int) -> None:
     return db_utils.acquire_lock(f"bank-account-{bank_account_id}")
 
 
-def price_event(event: models.FinanceEvent) -> models.Pricing | None:
+def price_event(
+    event: models.FinanceEvent,
+    rule_finder: reimbursement.CustomRuleFinder | None = None,
+) -> models.Pricing | None:
     assert event.pricingPointId  # helps mypy
     with transaction():
         lock_pricing_point(event.pricingPointId)
@@ -462,13 +707,178 @@ def price_event(event: models.FinanceEvent) -> models.Pricing | None:
 
         _delete_dependent_pricings(event, "Deleted pricings priced too early")
 
-        pricing = _price_event(event)
+        pricing = _price_event(event, rule_finder)
         db.session.add(pricing)
+        _update_revenue_ledger(_get_ledger_revenue_of_new_pricings([pricing]))
         event.status = models.FinanceEventStatus.PRICED
         db.session.commit()
     return pricing
 
 
+def price_events_of_pricing_point(
+    pricing_point_id: int,
+    events: typing.Iterable[models.FinanceEvent],
+    rule_finder: reimbursement.CustomRuleFinder | None = None,
+) -> list[models.Pricing]:
+    """Price events of a single pricing point in one transaction.
+
+    This gives the same pricings as calling `price_event()` on each
+    event (in the order of `_get_events_to_price()`), but the pricing
+    point is locked once, the revenue of the pricing point is computed
+    once per year instead of once per event, and pricings are inserted
+    in bulk.
+    """
+    event_ids = [event.id for event in events]
+    with transaction():
+        lock_pricing_point(pricing_point_id)
+
+        # Now that we have acquired a lock, fetch events from the
+        # database again: some of them may have been cancelled or
+        # priced in the meantime.
+        events = (
+            models.FinanceEvent.query.filter(
+                models.FinanceEvent.id.in_(event_ids),
+                models.FinanceEvent.pricingPointId == pricing_point_id,
+                models.FinanceEvent.status == models.FinanceEventStatus.READY,
+            )
+            .outerjoin(
+                models.Pricing,
+                (models.Pricing.eventId == models.FinanceEvent.id)
+                & (models.Pricing.status != models.PricingStatus.CANCELLED),
+            )
+            .filter(models.Pricing.id.is_(None))
+            .order_by(models.FinanceEvent.pricingOrderingDate, models.FinanceEvent.id)
+            .options(
+                sqla_orm.joinedload(models.FinanceEvent.booking)
+                .joinedload(bookings_models.Booking.stock)
+                .joinedload(offers_models.Stock.offer),
+                sqla_orm.joinedload(models.FinanceEvent.booking)
+                .joinedload(bookings_models.Booking.venue)
+                .joinedload(offerers_models.Venue.pricing_point_links),
+                sqla_orm.joinedload(models.FinanceEvent.collectiveBooking)
+                .joinedload(educational_models.CollectiveBooking.collectiveStock)
+                .joinedload(educational_models.CollectiveStock.collectiveOffer),
+                sqla_orm.joinedload(models.FinanceEvent.collectiveBooking)
+                .joinedload(educational_models.CollectiveBooking.venue)
+                .joinedload(offerers_models.Venue.pricing_point_links),
+                sqla_orm.joinedload(models.FinanceEvent.bookingFinanceIncident),
+            )
+            .all()
+        )
+        if not events:
+            return []
+
+        revenue = _PricingPointRevenue(
+            pricing_point_id,
+            booking_ids={event.bookingId for event in events if event.bookingId},
+        )
+        pricings = []
+        for event in events:
+            period = _get_revenue_period(event.valueDate)
+            # Deleting dependent pricings of the first event of each
+            # revenue period is enough: later events of the same period
+            # would only find pricings that have already been deleted.
+            if not revenue.is_loaded(period):
+                _delete_dependent_pricings(event, "Deleted pricings priced too early")
+            pricing = _price_event(event, rule_finder, current_revenue=revenue.get_revenue(event))
+            revenue.add_pricing(event, pricing)
+            pricings.append(pricing)
+
+        db.session.bulk_save_objects(pricings, return_defaults=True)
+        lines = []
+        for pricing in pricings:
+            for line in pricing.lines:
+                line.pricingId = pricing.id
+                lines.append(line)
+        db.session.bulk_save_objects(lines)
+        _update_revenue_ledger(_get_ledger_revenue_of_new_pricings(pricings))
+        models.FinanceEvent.query.filter(
+            models.FinanceEvent.id.in_([event.id for event in events]),
+        ).update(
+            {"status": models.FinanceEventStatus.PRICED},
+            synchronize_session=False,
+        )
+        db.session.commit()
+    return pricings
+
+
+class _PricingPointRevenue:
+    """Yearly revenue of a pricing point, as computed by
+    `_get_current_revenue()`, kept up to date in memory while we price
+    events of this pricing point.
+
+    IMPORTANT: This must only be used while holding the lock on the
+    pricing point.
+    """
+
+    def __init__(self, pricing_point_id: int, booking_ids: typing.Collection[int]) -> None:
+        self.pricing_point_id = pricing_point_id
+        self.booking_ids = booking_ids
+        # Revenue by period, and revenue of each booking by period
+        # (needed because the revenue excludes the booking of the
+        # event that is being priced).
+        self._revenue: dict[tuple[datetime.datetime, datetime.datetime], decimal.Decimal] = {}
+        self._revenue_by_booking: dict[tuple[datetime.datetime, datetime.datetime], dict[int, decimal.Decimal]] = {}
+
+    def is_loaded(self, period: tuple[datetime.datetime, datetime.datetime]) -> bool:
+        return period in self._revenue
+
+    def _load(self, period: tuple[datetime.datetime, datetime.datetime]) -> None:
+        if feature.FeatureToggle.WIP_USE_PRICING_POINT_REVENUE_LEDGER.is_active():
+            # See note in `_get_current_revenue()` about the booking
+            # of the event being priced.
+            year = _get_revenue_year(period[0])
+            revenue_in_cents = _get_ledger_revenue(self.pricing_point_id, year)
+            self._revenue[period] = utils.cents_to_full_unit(revenue_in_cents)
+            self._revenue_by_booking[period] = defaultdict(decimal.Decimal)
+            return
+        base_query = bookings_models.Booking.query.join(models.Pricing).filter(
+            models.Pricing.pricingPointId == self.pricing_point_id,
+            models.Pricing.valueDate.between(*period),
+            models.Pricing.status.notin_(
+                (
+                    models.PricingStatus.CANCELLED,
+                    models.PricingStatus.REJECTED,
+                )
+            ),
+        )
+        revenue = base_query.with_entities(
+            sa.func.sum(bookings_models.Booking.amount * bookings_models.Booking.quantity)
+        ).scalar()
+        self._revenue[period] = revenue or decimal.Decimal(0)
+        revenue_by_booking: dict[int, decimal.Decimal] = defaultdict(decimal.Decimal)
+        if self.booking_ids:
+            rows = base_query.filter(bookings_models.Booking.id.in_(self.booking_ids)).with_entities(
+                bookings_models.Booking.id,
+                bookings_models.Booking.amount * bookings_models.Booking.quantity,
+            )
+            for booking_id, amount in rows:
+                revenue_by_booking[booking_id] += amount
+        self._revenue_by_booking[period] = revenue_by_booking
+
+    def get_revenue(self, event: models.FinanceEvent) -> int:
+        """Return the current year revenue for the pricing point of an
+        event, NOT including the given event.
+        """
+        period = _get_revenue_period(event.valueDate)
+        if not self.is_loaded(period):
+            self._load(period)
+        revenue = self._revenue[period]
+        if event.bookingId:
+            revenue -= self._revenue_by_booking[period].get(event.bookingId, 0)
+        return utils.to_cents(revenue)
+
+    def add_pricing(self, event: models.FinanceEvent, pricing: models.Pricing) -> None:
+        # Only pricings of individual bookings are included in revenue.
+        if not pricing.bookingId or pricing.status in (models.PricingStatus.CANCELLED, models.PricingStatus.REJECTED):
+            return
+        assert event.booking  # helps mypy
+        period = _get_revenue_period(pricing.valueDate)
+        amount = event.booking.amount * event.booking.quantity
+        self._revenue[period] += amount
+        self._revenue_by_booking[period][pricing.bookingId] += amount
+
+
 def _get_revenue_period(value_date: datetime.datetime) -> tuple[datetime.datetime, datetime.datetime]:
     """Return a datetime (year) period for the given value date, i.e. the
     first and last seconds of the year of the ``value_date``.
@@ -489,10 +899,199 @@ def _get_revenue_period(value_date: datetime.datetime) -> tuple[datetime.datetim
     return first_second, last_second
 
 
+def _get_revenue_year(value_date: datetime.datetime) -> int:
+    """Return the accounting year of the given value date."""
+    return value_date.replace(tzinfo=pytz.utc).astimezone(utils.ACCOUNTING_TIMEZONE).year
+
+
+def _get_ledger_revenue(pricing_point_id: int, year: int) -> int:
+    revenue = (
+        models.PricingPointRevenue.query.filter_by(pricingPointId=pricing_point_id, year=year)
+        .with_entities(models.PricingPointRevenue.revenue)
+        .scalar()
+    )
+    return revenue or 0
+
+
+def _get_ledger_revenue_of_new_pricings(pricings: typing.Iterable[models.Pricing]) -> dict[tuple[int, int], int]:
+    """Return the revenue of the given (new) pricings, by pricing
+    point and year, as counted in `PricingPointRevenue`.
+    """
+    revenues: dict[tuple[int, int], int] = defaultdict(int)
+    for pricing in pricings:
+        # Collective bookings and finance incidents are not included in revenue.
+        if not pricing.bookingId or pricing.status in (models.PricingStatus.CANCELLED, models.PricingStatus.REJECTED):
+            continue
+        assert pricing.pricingPointId  # helps mypy
+        key = (pricing.pricingPointId, _get_revenue_year(pricing.valueDate))
+        for line in pricing.lines:
+            if line.category == models.PricingLineCategory.OFFERER_REVENUE:
+                revenues[key] -= line.amount  # offerer revenue lines are negative
+    return revenues
+
+
+def _get_ledger_revenue_of_pricings(*filters: typing.Any) -> dict[tuple[int, int], int]:
+    """Return the revenue of the pricings that match the given
+    filters, by pricing point and year, as counted in
+    `PricingPointRevenue`.
+    """
+    rows = (
+        models.Pricing.query.filter(
+            *filters,
+            models.Pricing.bookingId.is_not(None),
+            models.Pricing.status.notin_(
+                (
+                    models.PricingStatus.CANCELLED,
+                    models.PricingStatus.REJECTED,
+                )
+            ),
+        )
+        .join(models.Pricing.lines)
+        .filter(models.PricingLine.category == models.PricingLineCategory.OFFERER_REVENUE)
+        .with_entities(models.Pricing.pricingPointId, models.Pricing.valueDate, models.PricingLine.amount)
+    )
+    revenues: dict[tuple[int, int], int] = defaultdict(int)
+    for pricing_point_id, value_date, amount in rows:
+        revenues[(pricing_point_id, _get_revenue_year(value_date))] -= amount  # offerer revenue lines are negative
+    return revenues
+
+
+def _update_revenue_ledger(revenues: dict[tuple[int, int], int], subtract: bool = False) -> None:
+    """Add (or subtract) revenues to the `PricingPointRevenue` of
+    each pricing point and year.
+
+    IMPORTANT: This must only be used while holding the lock on
+    pricing points, within the transaction that creates, cancels or
+    deletes the corresponding pricings.
+    """
+    for (pricing_point_id, year), revenue in revenues.items():
+        if not revenue:
+            continue
+        statement = sqla_psql.insert(models.PricingPointRevenue).values(
+            pricingPointId=pricing_point_id,
+            year=year,
+            revenue=-revenue if subtract else revenue,
+        )
+        statement = statement.on_conflict_do_update(
+            constraint="unique_pricing_point_revenue_year",
+            set_={"revenue": models.PricingPointRevenue.revenue + statement.excluded.revenue},
+        )
+        db.session.execute(statement)
+
+
+def remove_pricings_from_revenue_ledger(*filters: typing.Any) -> None:
+    """Subtract the revenue of the pricings that match the given
+    filters from `PricingPointRevenue`. This must be called before
+    these pricings are cancelled or deleted.
+    """
+    _update_revenue_ledger(_get_ledger_revenue_of_pricings(*filters), subtract=True)
+
+
+def _compute_yearly_revenue(pricing_point_id: int, year: int) -> int:
+    revenue_period = _get_revenue_period(datetime.datetime(year, 7, 1))
+    revenue = (
+        bookings_models.Booking.query.join(models.Pricing)
+        .filter(
+            models.Pricing.pricingPointId == pricing_point_id,
+            models.Pricing.valueDate.between(*revenue_period),
+            models.Pricing.status.notin_(
+                (
+                    models.PricingStatus.CANCELLED,
+                    models.PricingStatus.REJECTED,
+                )
+            ),
+        )
+        .with_entities(sa.func.sum(bookings_models.Booking.amount * bookings_models.Booking.quantity))
+        .scalar()
+    )
+    return utils.to_cents(revenue or 0)
+
+
+def check_revenue_ledger(year: int | None = None, fix: bool = False) -> list[dict]:
+    """Compare `PricingPointRevenue` with the revenue computed from
+    all pricings, and return mismatches. If ``fix`` is set,
+    `PricingPointRevenue` is updated with the computed revenue.
+    """
+    year_expression = sa.cast(
+        sa.extract(
+            "year",
+            sa.func.timezone(utils.ACCOUNTING_TIMEZONE.zone, sa.func.timezone("UTC", models.Pricing.valueDate)),
+        ),
+        sa.Integer,
+    )
+    # Same computation as `_get_current_revenue()`, for all pricing points.
+    query = (
+        bookings_models.Booking.query.join(models.Pricing)
+        .filter(
+            models.Pricing.status.notin_(
+                (
+                    models.PricingStatus.CANCELLED,
+                    models.PricingStatus.REJECTED,
+                )
+            ),
+        )
+        .group_by(models.Pricing.pricingPointId, year_expression)
+        .with_entities(
+            models.Pricing.pricingPointId,
+            year_expression,
+            sa.func.sum(bookings_models.Booking.amount * bookings_models.Booking.quantity),
+        )
+    )
+    ledger_query = models.PricingPointRevenue.query
+    if year:
+        query = query.filter(year_expression == year)
+        ledger_query = ledger_query.filter(models.PricingPointRevenue.year == year)
+
+    expected = {
+        (pricing_point_id, pricing_year): utils.to_cents(revenue or 0)
+        for pricing_point_id, pricing_year, revenue in query
+    }
+    actual = {(ledger.pricingPointId, ledger.year): ledger.revenue for ledger in ledger_query}
+
+    mismatches = []
+    for pricing_point_id, pricing_year in sorted(expected.keys() | actual.keys()):
+        expected_revenue = expected.get((pricing_point_id, pricing_year), 0)
+        actual_revenue = actual.get((pricing_point_id, pricing_year), 0)
+        if expected_revenue == actual_revenue:
+            continue
+        mismatches.append(
+            {
+                "pricing_point": pricing_point_id,
+                "year": pricing_year,
+                "expected_revenue": expected_revenue,
+                "actual_revenue": actual_revenue,
+            }
+        )
+        if fix:
+            with transaction():
+                lock_pricing_point(pricing_point_id)
+                # Compute the revenue again, now that we hold the lock.
+                expected_revenue = _compute_yearly_revenue(pricing_point_id, pricing_year)
+                actual_revenue = _get_ledger_revenue(pricing_point_id, pricing_year)
+                _update_revenue_ledger({(pricing_point_id, pricing_year): expected_revenue - actual_revenue})
+            logger.info(
+                "Fixed pricing point revenue",
+                extra={
+                    "pricing_point": pricing_point_id,
+                    "year": pricing_year,
+                    "revenue": expected_revenue,
+                    "previous_revenue": actual_revenue,
+                },
+            )
+    return mismatches
+
+
 def _get_current_revenue(event: models.FinanceEvent) -> int:
     """Return the current year revenue for the pricing point of an
     event, NOT including the given event.
     """
+    if feature.FeatureToggle.WIP_USE_PRICING_POINT_REVENUE_LEDGER.is_active():
+        assert event.pricingPointId  # helps mypy
+        # The booking of the event cannot already be included in the
+        # revenue: there can be only one non-cancelled pricing per
+        # booking (see `idx_uniq_booking_id`).
+        return _get_ledger_revenue(event.pricingPointId, _get_revenue_year(event.valueDate))
+
     revenue_period = _get_revenue_period(event.valueDate)
     # Collective bookings must not be included in revenue.
     current_revenue = (
@@ -517,8 +1116,12 @@ def _get_current_revenue(event: models.FinanceEvent) -> int:
     return utils.to_cents(current_revenue or 0)
 
 
-def _price_event(event: models.FinanceEvent) -> models.Pricing:
-    new_revenue = _get_current_revenue(event)
+def _price_event(
+    event: models.FinanceEvent,
+    rule_finder: reimbursement.CustomRuleFinder | None = None,
+    current_revenue: int | None = None,
+) -> models.Pricing:
+    new_revenue = _get_current_revenue(event) if current_revenue is None else current_revenue
     individual_booking = event.bookingFinanceIncident.booking if event.bookingFinanceIncident else event.booking
     collective_booking = (
         event.bookingFinanceIncident.collectiveBooking if event.bookingFinanceIncident else event.collectiveBooking
@@ -547,7 +1150,7 @@ def _price_event(event: models.FinanceEvent) -> models.Pricing:
         models.FinanceEventMotive.BOOKING_USED,
         models.FinanceEventMotive.BOOKING_USED_AFTER_CANCELLATION,
     ):
-        rule_finder = reimbursement.CustomRuleFinder()
+        rule_finder = rule_finder or reimbursement.CustomRuleFinder()
         rule = reimbursement.get_reimbursement_rule(booking, rule_finder, new_revenue)
         amount = -rule.apply(booking)  # outgoing, thus negative
         offerer_revenue_amount = -utils.to_cents(booking.total_amount)
@@ -688,6 +1291,7 @@ def _cancel_event_pricing(
             "Deleted pricings that depended on cancelled pricing",
         )
 
+        remove_pricings_from_revenue_ledger(models.Pricing.id == pricing.id)
         db.session.add(
             models.PricingLog(
                 pricing=pricing,
@@ -783,6 +1387,7 @@ def _delete_dependent_pricings(
     # since the beginning of the function (since we should have an
     # exclusive lock on the pricing point to avoid that)... but let's
     # be defensive.
+    remove_pricings_from_revenue_ledger(models.Pricing.id.in_(pricing_ids))
     lines = models.PricingLine.query.filter(models.PricingLine.pricingId.in_(pricing_ids))
     lines.delete(synchronize_session=False)
     logs = models.PricingLog.query.filter(models.PricingLog.pricingId.in_(pricing_ids))
@@ -2813,6 +3418,7 @@ def _create_reimbursement_rule(
     validation.validate_reimbursement_rule(rule)
     db.session.add(rule)
     db.session.commit()
+    on_commit(reimbursement.bump_custom_rules_version)
     return rule
 
 
@@ -2844,6 +3450,7 @@ def edit_reimbursement_rule(
         raise
     db.session.add(rule)
     db.session.flush()
+    on_commit(reimbursement.bump_custom_rules_version)
     return rule
 
 
@@ -3481,6 +4088,7 @@ def create_finance_commercial_gesture_collective_booking(
 def _create_finance_events_from_incident(
     booking_finance_incident: models.BookingFinanceIncident,
     incident_validation_date: datetime.datetime | None = None,
+    pricing_point_links: list[offerers_models.VenuePricingPointLink] | None = None,
 ) -> list[models.FinanceEvent]:
     finance_events = []
     assert booking_finance_incident.incident
@@ -3491,6 +4099,7 @@ def _create_finance_events_from_incident(
                 models.FinanceEventMotive.INCIDENT_COMMERCIAL_GESTURE,
                 booking_incident=booking_finance_incident,
                 incident_validation_date=incident_validation_date,
+                pricing_point_links=pricing_point_links,
             )
         )
     elif booking_finance_incident.incident.kind in (
@@ -3504,6 +4113,7 @@ def _create_finance_events_from_incident(
                 models.FinanceEventMotive.INCIDENT_REVERSAL_OF_ORIGINAL_EVENT,
                 booking_incident=booking_finance_incident,
                 incident_validation_date=incident_validation_date,
+                pricing_point_links=pricing_point_links,
             )
         )
 
@@ -3514,6 +4124,7 @@ def _create_finance_events_from_incident(
                     models.FinanceEventMotive.INCIDENT_NEW_PRICE,
                     booking_incident=booking_finance_incident,
                     incident_validation_date=incident_validation_date,
+                    pricing_point_links=pricing_point_links,
                 )
             )
     db.session.add_all(finance_events)
@@ -3522,6 +4133,23 @@ def _create_finance_events_from_incident(
     return finance_events
 
 
+def _get_incident_booking_venue_id(booking_incident: models.BookingFinanceIncident) -> int:
+    booking = booking_incident.booking or booking_incident.collectiveBooking
+    assert booking  # helps mypy
+    return booking.venueId
+
+
+def _get_pricing_point_links_by_incident_venue(
+    finance_incident: models.FinanceIncident,
+) -> dict[int, list[offerers_models.VenuePricingPointLink]]:
+    return _get_pricing_point_links_by_venue(
+        {
+            _get_incident_booking_venue_id(booking_incident)
+            for booking_incident in finance_incident.booking_finance_incidents
+        }
+    )
+
+
 def validate_finance_overpayment_incident(
     finance_incident: models.FinanceIncident,
     force_debit_note: bool,
@@ -3530,10 +4158,15 @@ def validate_finance_overpayment_incident(
     from pcapi.core.bookings import api as bookings_api
 
     incident_validation_date = datetime.datetime.utcnow()
+    links_by_venue = _get_pricing_point_links_by_incident_venue(finance_incident)
     finance_events = []
     for booking_incident in finance_incident.booking_finance_incidents:
         finance_events.extend(
-            _create_finance_events_from_incident(booking_incident, incident_validation_date=incident_validation_date)
+            _create_finance_events_from_incident(
+                booking_incident,
+                incident_validation_date=incident_validation_date,
+                pricing_point_links=links_by_venue.get(_get_incident_booking_venue_id(booking_incident), []),
+            )
         )
         if not booking_incident.is_partial:
             if booking := booking_incident.booking:
@@ -3609,11 +4242,13 @@ def validate_finance_commercial_gesture(
     author: users_models.User,
 ) -> None:
     incident_validation_date = datetime.datetime.utcnow()
+    links_by_venue = _get_pricing_point_links_by_incident_venue(finance_incident)
     finance_events = []
     for booking_incident in finance_incident.booking_finance_incidents:
         finance_events += _create_finance_events_from_incident(
             booking_finance_incident=booking_incident,
             incident_validation_date=incident_validation_date,
+            pricing_point_links=links_by_venue.get(_get_incident_booking_venue_id(booking_incident), []),
         )
 
     db.session.add_all(finance_events)
@@ -27,11 +27,28 @@ logger = logging.getLogger(__name__)
 
 
 @blueprint.cli.command("price_finance_events")
+@click.option(
+    "--group-by-pricing-point",
+    help="Price events of each pricing point in a single transaction",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--workers",
+    help="Number of processes that price events in parallel (events are split by pricing point)",
+    type=int,
+    default=1,
+)
 @cron_decorators.log_cron_with_transaction
 @cron_decorators.cron_require_feature(FeatureToggle.PRICE_FINANCE_EVENTS)
-def price_finance_events() -> None:
+def price_finance_events(group_by_pricing_point: bool, workers: int) -> None:
     """Price finance events that have recently been created."""
-    finance_api.price_events()
+    report = finance_api.price_events_in_parallel(workers, group_by_pricing_point=group_by_pricing_point)
+    print(
+        f"Priced {report.priced_events} events in {report.duration:.1f}s "
+        f"({report.events_per_second or 0:.1f} events/s) with {workers} worker(s), "
+        f"{len(report.errored_pricing_point_ids)} pricing point(s) in error"
+    )
 
 
 @blueprint.cli.command("generate_cashflows_and_payment_files")
@@ -168,6 +185,22 @@ def add_custom_offer_reimbursement_rule(
     print(f"Created new rule: {rule.id}")
 
 
+@blueprint.cli.command("check_pricing_point_revenues")
+@click.option("--year", type=int, required=False, help="Only check this accounting year")
+@click.option("--fix", is_flag=True, default=False, help="Update revenues that do not match")
+def check_pricing_point_revenues(year: int | None, fix: bool) -> None:
+    """Check the yearly revenue of pricing points (`PricingPointRevenue`)
+    against the revenue computed from all pricings.
+    """
+    mismatches = finance_api.check_revenue_ledger(year=year, fix=fix)
+    for mismatch in mismatches:
+        print(
+            f"Pricing point {mismatch['pricing_point']}, year {mismatch['year']}: "
+            f"expected {mismatch['expected_revenue']}, found {mismatch['actual_revenue']}"
+        )
+    print(f"Found {len(mismatches)} mismatching revenue(s){' (fixed)' if fix and mismatches else ''}")
+
+
 @blueprint.cli.command("recredit_underage_users")
 @cron_decorators.log_cron_with_transaction
 def recredit_underage_users() -> None:
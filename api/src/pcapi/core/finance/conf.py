@@ -13,6 +13,10 @@ REDIS_PUSH_BANK_ACCOUNT_LOCK_TIMEOUT = 86400  # = 60 * 60 * 24 = 24h
 REDIS_GENERATE_CASHFLOW_LOCK = "pc:finance:generate_cashflow_lock"
 REDIS_GENERATE_CASHFLOW_LOCK_TIMEOUT = 60 * 60 * 24  # 24h
 
+# version stamp of custom reimbursement rules, changed whenever a rule
+# is created or edited (see `reimbursement.get_shared_custom_rule_finder()`)
+REDIS_CUSTOM_REIMBURSEMENT_RULES_VERSION = "pc:finance:custom_reimbursement_rules_version"
+
 # Age in days before generating a cashflow and a debit note when total pricings is positive
 DEBIT_NOTE_AGE_THRESHOLD_FOR_CASHFLOW = 90
 
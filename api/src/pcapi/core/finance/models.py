@@ -451,6 +451,28 @@ class Pricing(PcObject, Base, Model):
         return sqla.cast(sqla.func.round(cls.amount * utils.EUR_TO_XPF_RATE), sqla.Integer)
 
 
+class PricingPointRevenue(PcObject, Base, Model):
+    """Yearly revenue of a pricing point, in euro cents.
+
+    It is the sum of the amounts of the individual bookings that have
+    been priced (and whose pricing has not been cancelled) for the
+    pricing point during an accounting year. It is updated whenever a
+    pricing is created, cancelled or deleted, so that we do not have
+    to compute it again each time we price an event.
+    """
+
+    __tablename__ = "pricing_point_revenue"
+
+    pricingPointId = sqla.Column(sqla.BigInteger, sqla.ForeignKey("venue.id"), nullable=False)
+    pricingPoint: sqla_orm.Mapped["offerers_models.Venue"] = sqla_orm.relationship(
+        "Venue", foreign_keys=[pricingPointId]
+    )
+    year: int = sqla.Column(sqla.Integer, nullable=False)
+    revenue: int = sqla.Column(sqla.BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (sqla.UniqueConstraint("pricingPointId", "year", name="unique_pricing_point_revenue_year"),)
+
+
 class PricingLine(PcObject, Base, Model):
 
     pricingId = sqla.Column(sqla.BigInteger, sqla.ForeignKey("pricing.id"), index=True, nullable=True)
@@ -780,6 +802,17 @@ class InvoiceStatus(enum.Enum):
     REJECTED = "rejected"
 
 
+@dataclasses.dataclass
+class PriceEventsReport:
+    priced_events: int = 0
+    errored_pricing_point_ids: set[int] = dataclasses.field(default_factory=set)
+    duration: float = 0.0
+
+    @property
+    def events_per_second(self) -> float | None:
+        return self.priced_events / self.duration if self.duration else None
+
+
 @dataclasses.dataclass
 class InvoiceLineGroup:
     position: int
@@ -12,6 +12,7 @@ from pcapi.models import feature
 from pcapi.repository import atomic
 import pcapi.utils.db as db_utils
 
+from . import api
 from . import models
 
 
@@ -199,6 +200,12 @@ def _delete_ongoing_pricings(venue: offerers_models.Venue) -> None:
         """,
     )
 
+    # Pricings are deleted: remove them from the yearly revenue.
+    api.remove_pricings_from_revenue_ledger(
+        models.Pricing.pricingPointId == venue.id,
+        models.Pricing.status == models.PricingStatus.VALIDATED,
+    )
+
     for query in queries:
         db.session.execute(
             sa.text(query),
@@ -1429,9 +1429,15 @@ def _should_try_to_update_offer_stock_quantity(offer: models.Offer) -> bool:
     return False
 
 
-def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer: models.Offer) -> None:
+def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer: models.Offer) -> bool:
+    """Update the quantity of bookable stocks of a cinema offer from the
+    remaining places of its provider.
+
+    Return False if the remaining places could not be retrieved from
+    the provider, True otherwise.
+    """
     if not _should_try_to_update_offer_stock_quantity(offer):
-        return
+        return True
     try:
         venue_provider = external_bookings_api.get_active_cinema_venue_provider(offer.venueId)
         validation.check_offer_is_from_current_cinema_provider(offer)
@@ -1444,7 +1450,7 @@ def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer:
             reason=search.IndexationReason.CINEMA_STOCK_QUANTITY_UPDATE,
             log_extra={"active": False},
         )
-        return
+        return True
 
     sentry_sdk.set_tag("cinema-venue-provider", venue_provider.provider.localClass)
     logger.info(
@@ -1464,13 +1470,13 @@ def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer:
             "Failed to get shows remaining places from provider",
             extra={"offer": offer.id, "provider": venue_provider.provider.localClass, "error": e},
         )
-        return
+        return False
     except Exception as e:  # pylint: disable=broad-except
         logger.exception(
             "Unknown error when getting shows remaining places from provider",
             extra={"offer": offer.id, "provider": venue_provider.provider.localClass, "error": e},
         )
-        return
+        return False
 
     offer_has_new_sold_out_stock = False
     for stock in offer_current_stocks:
@@ -1527,8 +1533,7 @@ def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer:
             reason=search.IndexationReason.CINEMA_STOCK_QUANTITY_UPDATE,
             log_extra={"sold_out": True},
         )
-
-    return
+    return True
 
 
 def whitelist_product(idAtProviders: str) -> models.Product | None:
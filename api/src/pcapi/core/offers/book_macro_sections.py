@@ -0,0 +1,70 @@
+"""An in-memory lookup table of book macro sections.
+
+The `book_macro_section` table only holds a few hundred rows that are
+inserted by migrations, but it is looked up for each book offer that
+is serialized for the search engine. Instead of running one query per
+offer, we load the whole table once and reload it periodically.
+"""
+
+import dataclasses
+import logging
+import time
+
+from pcapi.core.offers import models as offers_models
+
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 60 * 60  # seconds
+
+
+@dataclasses.dataclass
+class LookupStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+
+
+class BookMacroSectionTable:
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL) -> None:
+        self.refresh_interval = refresh_interval
+        self.stats = LookupStats()
+        self._macro_sections: dict[str, str] | None = None
+        self._loaded_at = 0.0
+
+    def refresh(self) -> None:
+        rows = offers_models.BookMacroSection.query.with_entities(
+            offers_models.BookMacroSection.section,
+            offers_models.BookMacroSection.macroSection,
+        ).all()
+        # Some macro sections have trailing whitespaces.
+        self._macro_sections = {section.lower(): macro_section.strip() for section, macro_section in rows}
+        self._loaded_at = time.monotonic()
+        self.stats.loads += 1
+        logger.info("Loaded book macro sections", extra={"count": len(self._macro_sections)})
+
+    def _is_stale(self) -> bool:
+        return self._macro_sections is None or time.monotonic() - self._loaded_at > self.refresh_interval
+
+    def get_macro_section(self, section: str) -> str | None:
+        """Return the macro section of ``section`` (case-insensitive),
+        or None if it is not known.
+        """
+        if self._is_stale():
+            self.refresh()
+        assert self._macro_sections is not None  # helps mypy
+        macro_section = self._macro_sections.get(section.lower())
+        if macro_section is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return macro_section
+
+    def get_stats(self) -> dict:
+        return dataclasses.asdict(self.stats) | {
+            "size": len(self._macro_sections or {}),
+            "age": time.monotonic() - self._loaded_at if self._macro_sections is not None else None,
+        }
+
+
+book_macro_sections = BookMacroSectionTable()
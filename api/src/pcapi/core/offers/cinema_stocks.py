@@ -0,0 +1,178 @@
+"""Refresh the remaining places of cinema stocks in the background.
+
+When the `WIP_REFRESH_CINEMA_STOCKS_IN_BACKGROUND` feature flag is
+active, offer views do not call cinema providers anymore: they only
+record the view. A cron task refreshes the quantity of bookable stocks
+of cinema offers instead, most viewed and booked offers first.
+"""
+
+import datetime
+import logging
+import statistics
+import time
+
+from flask import current_app
+import sqlalchemy as sa
+
+from pcapi.core.bookings import models as bookings_models
+from pcapi.core.categories import subcategories_v2 as subcategories
+from pcapi.core.offers import api as offers_api
+from pcapi.core.offers import models as offers_models
+from pcapi.core.providers import models as providers_models
+from pcapi.models import db
+
+
+logger = logging.getLogger(__name__)
+
+# Sorted set: number of views of each cinema offer since its last refresh.
+REDIS_CINEMA_OFFER_VIEWS = "offers:cinema:views"
+# Hash: timestamp of the last refresh of each cinema offer.
+REDIS_CINEMA_OFFER_REFRESHED_AT = "offers:cinema:refreshed_at"
+
+# A booking weighs as much as this number of views.
+BOOKING_WEIGHT = 10
+RECENT_BOOKINGS_PERIOD = datetime.timedelta(days=1)
+# Remaining places are cached for 60 seconds by provider clients: there
+# is no point in refreshing an offer more often.
+MIN_REFRESH_INTERVAL = 60  # seconds
+
+
+def record_offer_view(offer: offers_models.Offer) -> None:
+    if offer.subcategoryId != subcategories.SEANCE_CINE.id or not offer.lastProviderId:
+        return
+    current_app.redis_client.zincrby(REDIS_CINEMA_OFFER_VIEWS, 1, offer.id)
+
+
+def get_cinema_offer_ids_to_refresh() -> list[int]:
+    """Return ids of active cinema offers that have bookable stocks and
+    whose venue has an active cinema provider.
+    """
+    query = (
+        db.session.query(offers_models.Offer.id)
+        .join(offers_models.Stock, offers_models.Stock.offerId == offers_models.Offer.id)
+        .join(
+            providers_models.VenueProvider,
+            providers_models.VenueProvider.venueId == offers_models.Offer.venueId,
+        )
+        .filter(
+            offers_models.Offer.isActive.is_(True),
+            offers_models.Offer.subcategoryId == subcategories.SEANCE_CINE.id,
+            offers_models.Offer.lastProviderId.is_not(None),
+            offers_models.Stock._bookable,
+            providers_models.VenueProvider.isActive.is_(True),
+            providers_models.VenueProvider.isFromCinemaProvider,
+        )
+        .distinct()
+    )
+    return [offer_id for (offer_id,) in query]
+
+
+def _get_recent_booking_counts(offer_ids: list[int]) -> dict[int, int]:
+    rows = (
+        db.session.query(offers_models.Stock.offerId, sa.func.count(bookings_models.Booking.id))
+        .join(bookings_models.Booking, bookings_models.Booking.stockId == offers_models.Stock.id)
+        .filter(
+            offers_models.Stock.offerId.in_(offer_ids),
+            bookings_models.Booking.dateCreated >= datetime.datetime.utcnow() - RECENT_BOOKINGS_PERIOD,
+        )
+        .group_by(offers_models.Stock.offerId)
+    )
+    return dict(rows)
+
+
+def refresh_cinema_stocks(max_offers: int = 500, min_interval: int = MIN_REFRESH_INTERVAL) -> dict:
+    """Refresh the quantity of stocks of at most `max_offers` cinema
+    offers, and return a report of the refresh.
+
+    Offers are sorted by activity (views since their last refresh and
+    recent bookings), then by date of last refresh. Offers that have
+    been refreshed less than `min_interval` seconds ago are skipped.
+    """
+    redis_client = current_app.redis_client
+    start = time.time()
+    offer_ids = get_cinema_offer_ids_to_refresh()
+
+    refreshed_at_values: list[str | None] = []
+    booking_counts: dict[int, int] = {}
+    if offer_ids:
+        refreshed_at_values = redis_client.hmget(
+            REDIS_CINEMA_OFFER_REFRESHED_AT, [str(offer_id) for offer_id in offer_ids]
+        )
+        booking_counts = _get_recent_booking_counts(offer_ids)
+    refreshed_at: dict[int, float | None] = {
+        offer_id: float(timestamp) if timestamp is not None else None
+        for offer_id, timestamp in zip(offer_ids, refreshed_at_values)
+    }
+    views = {
+        int(offer_id): score
+        for offer_id, score in redis_client.zrange(REDIS_CINEMA_OFFER_VIEWS, 0, -1, withscores=True)
+    }
+
+    def _priority(offer_id: int) -> tuple[float, float]:
+        activity = views.get(offer_id, 0) + BOOKING_WEIGHT * booking_counts.get(offer_id, 0)
+        return (-activity, refreshed_at[offer_id] or 0)
+
+    def _is_stale(offer_id: int) -> bool:
+        last_refresh = refreshed_at[offer_id]
+        return last_refresh is None or start - last_refresh >= min_interval
+
+    to_refresh = [offer_id for offer_id in sorted(offer_ids, key=_priority) if _is_stale(offer_id)][:max_offers]
+
+    # Offers whose refresh fails keep their views and their last refresh
+    # date, so that they are retried first by the next run.
+    new_refreshed_at: dict[int, float] = {}
+    n_errors = 0
+    refresh_start = time.time()
+    for offer_id in to_refresh:
+        offer = offers_models.Offer.query.get(offer_id)
+        if offer is None:  # deleted in the meantime
+            continue
+        try:
+            is_refreshed = offers_api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+            db.session.commit()
+        except Exception:  # pylint: disable=broad-except
+            db.session.rollback()
+            is_refreshed = False
+            logger.exception("Could not refresh cinema stocks", extra={"offer": offer_id})
+        if not is_refreshed:
+            n_errors += 1
+            continue
+        new_refreshed_at[offer_id] = time.time()
+    refresh_duration = time.time() - refresh_start
+    refreshed_at.update(new_refreshed_at)
+
+    pipeline = redis_client.pipeline(transaction=False)
+    if new_refreshed_at:
+        pipeline.hset(
+            REDIS_CINEMA_OFFER_REFRESHED_AT,
+            mapping={str(offer_id): timestamp for offer_id, timestamp in new_refreshed_at.items()},
+        )
+    # Forget views of refreshed offers, and of offers that do not need
+    # to be refreshed anymore.
+    forgotten_ids = set(new_refreshed_at) | (set(views) - set(offer_ids))
+    if forgotten_ids:
+        pipeline.zrem(REDIS_CINEMA_OFFER_VIEWS, *(str(offer_id) for offer_id in forgotten_ids))
+    known_ids = {int(offer_id) for offer_id in redis_client.hkeys(REDIS_CINEMA_OFFER_REFRESHED_AT)}
+    outdated_ids = known_ids - set(offer_ids)
+    if outdated_ids:
+        pipeline.hdel(REDIS_CINEMA_OFFER_REFRESHED_AT, *(str(offer_id) for offer_id in outdated_ids))
+    pipeline.execute()
+
+    now = time.time()
+    staleness = [now - timestamp for timestamp in refreshed_at.values() if timestamp is not None]
+    report = {
+        "offers": len(offer_ids),
+        "refreshed": len(new_refreshed_at),
+        "errors": n_errors,
+        # Each refresh attempt makes at most one call to the provider
+        # (none when remaining places are still in the client cache).
+        "refresh_attempts_per_second": (
+            round((len(new_refreshed_at) + n_errors) / refresh_duration, 2) if refresh_duration else 0
+        ),
+        "never_refreshed": len(offer_ids) - len(staleness),
+        "max_staleness": round(max(staleness), 1) if staleness else None,
+        "median_staleness": round(statistics.median(staleness), 1) if staleness else None,
+        "duration": round(now - start, 1),
+    }
+    logger.info("Refreshed cinema stocks", extra=report)
+    return report
@@ -1,4 +1,10 @@
+import click
+
+from pcapi.core.offers import cinema_stocks
+from pcapi.core.offers import repository as offers_repository
 import pcapi.core.offers.api as offers_api
+from pcapi.models.feature import FeatureToggle
+from pcapi.scheduled_tasks.decorators import cron_require_feature
 from pcapi.scheduled_tasks.decorators import log_cron_with_transaction
 from pcapi.utils.blueprint import Blueprint
 
@@ -10,3 +16,23 @@ blueprint = Blueprint(__name__, __name__)
 @log_cron_with_transaction
 def activate_future_offers() -> None:
     offers_api.activate_future_offers()
+
+
+@blueprint.cli.command("refresh_cinema_stocks")
+@click.option("--max-offers", type=int, default=500, help="Maximum number of offers to refresh")
+@click.option(
+    "--min-interval",
+    type=int,
+    default=cinema_stocks.MIN_REFRESH_INTERVAL,
+    help="Do not refresh offers that have been refreshed less than this number of seconds ago",
+)
+@log_cron_with_transaction
+@cron_require_feature(FeatureToggle.WIP_REFRESH_CINEMA_STOCKS_IN_BACKGROUND)
+def refresh_cinema_stocks(max_offers: int, min_interval: int) -> None:
+    cinema_stocks.refresh_cinema_stocks(max_offers=max_offers, min_interval=min_interval)
+
+
+@blueprint.cli.command("apply_offer_daily_booking_counts")
+@log_cron_with_transaction
+def apply_offer_daily_booking_counts() -> None:
+    offers_repository.apply_pending_offer_daily_booking_counts()
@@ -12,7 +12,7 @@ from pcapi.core.factories import BaseFactory
 import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offers.models as offers_models
 from pcapi.core.providers.constants import TITELIVE_MUSIC_GENRES_BY_GTL_ID
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
 import pcapi.core.users.factories as users_factories
 from pcapi.domain import music_types
 from pcapi.domain import show_types
@@ -131,7 +131,7 @@ def build_extra_data_from_subcategory(
             case subcategories.ExtraDataFieldEnum.GTL_ID.value:
                 if subcategory_id == subcategories.LIVRE_PAPIER.id:
                     if build_for_product:
-                        extradata[field] = random.choice(list(GTLS.keys()))
+                        extradata[field] = random.choice(list(get_gtl_ids()))
                 else:
                     extradata[field] = random.choice(list(TITELIVE_MUSIC_GENRES_BY_GTL_ID.keys()))
             case subcategories.ExtraDataFieldEnum.VISA.value:
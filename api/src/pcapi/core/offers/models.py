@@ -541,6 +541,16 @@ class Offer(PcObject, Base, Model, DeactivableMixin, ValidationMixin, Accessibil
 
         parent_args += [
             sa.UniqueConstraint("idAtProvider", "venueId", name="unique_idAtProvider_venueId"),
+            sa.Index(
+                "ix_offer_trgm_unaccent_name",
+                sa.func.immutable_unaccent(self.name),
+                postgresql_using="gin",
+            ),
+            sa.Index(
+                "ix_offer_gist_trgm_unaccent_name",
+                sa.func.immutable_unaccent(self.name),
+                postgresql_using="gist",
+            ),
         ]
 
         return tuple(parent_args)
@@ -1274,6 +1284,26 @@ class BookMacroSection(PcObject, Base, Model):
     __table_args__ = (sa.Index("book_macro_section_section_idx", sa.func.lower(section), unique=True),)
 
 
+class OfferDailyBookingCount(PcObject, Base, Model):
+    """Number of non-cancelled bookings of an offer that have been
+    created on a given day.
+
+    It is updated when bookings are created, cancelled or uncancelled,
+    and rebuilt every day from the bookings of the last days (see
+    `rebuild_offer_daily_booking_counts()`), so that the number of
+    recent bookings of a batch of offers can be computed without
+    scanning bookings.
+    """
+
+    __tablename__ = "offer_daily_booking_count"
+
+    offerId: int = sa.Column(sa.BigInteger, sa.ForeignKey("offer.id", ondelete="CASCADE"), nullable=False)
+    day: datetime.date = sa.Column(sa.Date, nullable=False)
+    bookingCount: int = sa.Column(sa.Integer, nullable=False, server_default="0")
+
+    __table_args__ = (sa.UniqueConstraint("offerId", "day", name="unique_offer_daily_booking_count_day"),)
+
+
 class PriceCategoryLabel(PcObject, Base, Model):
     label: str = sa.Column(sa.Text(), nullable=False)
     priceCategory: sa_orm.Mapped["PriceCategory"] = sa.orm.relationship(
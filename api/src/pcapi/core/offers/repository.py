@@ -1,9 +1,11 @@
 import datetime
 import enum
+from functools import partial
 import logging
 import operator
 import typing
 
+from flask import current_app
 from flask_sqlalchemy import BaseQuery
 import pytz
 import sqlalchemy as sa
@@ -26,8 +28,11 @@ from pcapi.core.users import models as users_models
 from pcapi.models import db
 from pcapi.models import offer_mixin
 from pcapi.models.feature import FeatureToggle
+from pcapi.repository import on_commit
 from pcapi.utils import custom_keys
+from pcapi.utils import db as db_utils
 from pcapi.utils import string as string_utils
+from pcapi.utils.clean_accents import clean_accents
 
 from . import exceptions
 from . import models
@@ -95,6 +100,12 @@ def get_capped_offers_for_filters(
         period_beginning_date=period_beginning_date,
         period_ending_date=period_ending_date,
     )
+    is_ranked = is_name_search_ranked(name_keywords_or_ean)
+    if is_ranked:
+        assert name_keywords_or_ean  # helps mypy
+        # No tie-breaker: the GiST index on the unaccented name returns
+        # the most relevant offers first, without sorting all matching ones.
+        query = query.order_by(get_name_search_ranking(models.Offer.name, name_keywords_or_ean))
 
     offers = (
         query.options(
@@ -168,8 +179,9 @@ def get_capped_offers_for_filters(
     )
 
     # Do not use `ORDER BY` in SQL, which sometimes applies on a very large result set
-    # _before_ the `LIMIT` clause (and kills performance).
-    if len(offers) < offers_limit:
+    # _before_ the `LIMIT` clause (and kills performance), unless offers are ranked by
+    # relevance: offers are then read in this order from an index.
+    if not is_ranked and len(offers) < offers_limit:
         offers = sorted(offers, key=operator.attrgetter("id"), reverse=True)
 
     return offers
@@ -308,10 +320,7 @@ def get_offers_by_filters(
         if string_utils.is_ean_valid(name_keywords_or_ean):
             query = query.filter(models.Offer.extraData["ean"].astext == name_keywords_or_ean)
         else:
-            search = name_keywords_or_ean
-            if len(name_keywords_or_ean) > 3:
-                search = "%{}%".format(name_keywords_or_ean)
-            query = query.filter(models.Offer.name.ilike(search))
+            query = filter_by_name(query, models.Offer.name, name_keywords_or_ean)
     if status is not None:
         query = _filter_by_status(query, status)
     if period_beginning_date is not None or period_ending_date is not None:
@@ -388,13 +397,7 @@ def get_collective_offers_by_filters(
         ]
         query = query.filter(educational_models.CollectiveOffer.subcategoryId.in_(requested_subcategories))
     if name_keywords is not None:
-        search = name_keywords
-        if len(name_keywords) > 3:
-            search = "%{}%".format(name_keywords)
-        # We should really be using `union` instead of `union_all` here since we don't want duplicates but
-        # 1. it's unlikely that a book will contain its EAN in its name
-        # 2. we need to migrate models.Offer.extraData to JSONB in order to use `union`
-        query = query.filter(educational_models.CollectiveOffer.name.ilike(search))
+        query = filter_by_name(query, educational_models.CollectiveOffer.name, name_keywords)
     if statuses:
         query = _filter_collective_offers_by_statuses(query, statuses)
 
@@ -480,13 +483,7 @@ def get_collective_offers_template_by_filters(
         ]
         query = query.filter(educational_models.CollectiveOfferTemplate.subcategoryId.in_(requested_subcategories))
     if name_keywords is not None:
-        search = name_keywords
-        if len(name_keywords) > 3:
-            search = "%{}%".format(name_keywords)
-        # We should really be using `union` instead of `union_all` here since we don't want duplicates but
-        # 1. it's unlikely that a book will contain its EAN in its name
-        # 2. we need to migrate models.Offer.extraData to JSONB in order to use `union`
-        query = query.filter(educational_models.CollectiveOfferTemplate.name.ilike(search))
+        query = filter_by_name(query, educational_models.CollectiveOfferTemplate.name, name_keywords)
 
     if statuses:
         template_statuses = set(statuses) & set(
@@ -504,6 +501,46 @@ def get_collective_offers_template_by_filters(
     return query
 
 
+def filter_by_name(query: BaseQuery, column: sa.orm.InstrumentedAttribute, name_keywords: str) -> BaseQuery:
+    """Filter offers whose name contains `name_keywords` (or is equal to
+    them, if they are 3 characters long or less).
+
+    When the `WIP_UNACCENTED_OFFER_NAME_SEARCH` feature flag is active,
+    accents are ignored, and words of `name_keywords` may be separated by
+    other words in the name. The filter then uses the trigram index on
+    the unaccented name.
+    """
+    if not FeatureToggle.WIP_UNACCENTED_OFFER_NAME_SEARCH.is_active():
+        search = name_keywords
+        if len(name_keywords) > 3:
+            search = "%{}%".format(name_keywords)
+        return query.filter(column.ilike(search))
+
+    search = clean_accents(name_keywords)
+    if len(name_keywords) > 3:
+        search = f'%{search.replace(" ", "%").replace("-", "%")}%'
+    return query.filter(sa.func.immutable_unaccent(column).ilike(search))
+
+
+def is_name_search_ranked(name_keywords: str | None) -> bool:
+    return bool(
+        name_keywords
+        and not string_utils.is_ean_valid(name_keywords)
+        and FeatureToggle.WIP_UNACCENTED_OFFER_NAME_SEARCH.is_active()
+    )
+
+
+def get_name_search_ranking(column: sa.orm.InstrumentedAttribute, name_keywords: str) -> sa.sql.ColumnElement:
+    """Return an ordering clause that puts names that are the most
+    similar to `name_keywords` first.
+
+    The trigram distance (`1 - similarity`) is used rather than the
+    similarity, so that a GiST trigram index on the unaccented name can
+    return rows in this order.
+    """
+    return sa.func.immutable_unaccent(column).op("<->")(clean_accents(name_keywords))
+
+
 def _filter_by_creation_mode(query: BaseQuery, creation_mode: str) -> BaseQuery:
     if creation_mode == MANUAL_CREATION_MODE:
         query = query.filter(models.Offer.lastProviderId.is_(None))
@@ -834,14 +871,20 @@ def get_stocks_by_id_at_providers(id_at_providers: list[str]) -> dict:
         models.Stock.idAtProviders,
         models.Stock.dnBookedQuantity,
         models.Stock.quantity,
+        models.Stock.rawProviderQuantity,
         models.Stock.price,
+        models.Stock.lastProviderId,
+        models.Stock.isSoftDeleted,
     )
     return {
         stock.idAtProviders: {
             "id": stock.id,
             "booking_quantity": stock.dnBookedQuantity,
             "quantity": stock.quantity,
+            "raw_provider_quantity": stock.rawProviderQuantity,
             "price": stock.price,
+            "last_provider_id": stock.lastProviderId,
+            "is_soft_deleted": stock.isSoftDeleted,
         }
         for stock in stocks
     }
@@ -1323,6 +1366,23 @@ def get_paginated_active_offer_ids(batch_size: int, page: int = 1) -> list[int]:
     return [offer_id for offer_id, in query]
 
 
+def get_active_offer_ids_after(after_id: int, batch_size: int, to_id: int | None = None) -> list[int]:
+    """Return ids of active offers greater than ``after_id`` (and lower
+    or equal to ``to_id``, if given), in ascending order.
+
+    Unlike `get_paginated_active_offer_ids()`, this uses keyset
+    pagination, which does not get slower as we go through pages.
+    """
+    query = models.Offer.query.with_entities(models.Offer.id).filter(
+        models.Offer.isActive.is_(True),
+        models.Offer.id > after_id,
+    )
+    if to_id is not None:
+        query = query.filter(models.Offer.id <= to_id)
+    query = query.order_by(models.Offer.id).limit(batch_size)
+    return [offer_id for offer_id, in query]
+
+
 def get_paginated_offer_ids_by_venue_id(venue_id: int, limit: int, page: int = 0) -> list[int]:
     query = (
         models.Offer.query.with_entities(models.Offer.id)
@@ -1413,3 +1473,150 @@ def venues_have_individual_and_collective_offers(venue_ids: list[int]) -> tuple[
 
 def get_offer_existing_stocks_count(offer_id: int) -> int:
     return models.Stock.query.filter_by(offerId=offer_id).filter(models.Stock.isSoftDeleted == False).count()
+
+
+# Daily booking counts older than this are useless (we only need the
+# last 30 days) and are deleted when counts are rebuilt.
+OFFER_DAILY_BOOKING_COUNT_RETENTION_DAYS = 31
+# Hash: pending increments of daily booking counts, by "<offer id>:<day>".
+REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS = "offers:daily_booking_counts:pending"
+# Hash: increments that are being applied to the database.
+REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS = "offers:daily_booking_counts:processing"
+# Hash: increments included in counts that are being rebuilt.
+REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS = "offers:daily_booking_counts:rebuilding"
+# Counts are not rebuilt while increments are applied.
+OFFER_DAILY_BOOKING_COUNTS_LOCK_NAME = "offer-daily-booking-counts"
+
+
+def update_offer_daily_booking_count(offer_id: int, booking_date: datetime.datetime, delta: int) -> None:
+    """Add ``delta`` (which may be negative) to the number of bookings
+    of the offer on the day of ``booking_date``.
+
+    The count is not updated in the current transaction, which usually
+    holds a lock on the stock: all bookings of a popular offer would
+    otherwise wait for each other on the row of the day. The increment
+    is recorded in Redis after the commit, and applied to the database
+    by `apply_pending_offer_daily_booking_counts()`.
+    """
+    day = booking_date.date()
+    if day < datetime.datetime.utcnow().date() - datetime.timedelta(days=OFFER_DAILY_BOOKING_COUNT_RETENTION_DAYS):
+        return
+    on_commit(partial(_record_pending_offer_daily_booking_count, offer_id, day, delta))
+
+
+def _record_pending_offer_daily_booking_count(offer_id: int, day: datetime.date, delta: int) -> None:
+    current_app.redis_client.hincrby(REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS, f"{offer_id}:{day.isoformat()}", delta)
+
+
+def apply_pending_offer_daily_booking_counts() -> int:
+    """Apply increments recorded by `update_offer_daily_booking_count()`
+    to the database. Return the number of updated counts.
+    """
+    redis_client = current_app.redis_client
+    db_utils.acquire_lock(OFFER_DAILY_BOOKING_COUNTS_LOCK_NAME)
+    # Increments of a previous run that failed are applied first.
+    if not redis_client.exists(REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS):
+        if not redis_client.exists(REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS):
+            db.session.commit()  # release the lock
+            return 0
+        redis_client.rename(REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS, REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS)
+
+    n_updated = 0
+    for key, delta in redis_client.hgetall(REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS).items():
+        if not int(delta):
+            continue
+        offer_id, day = key.split(":")
+        _upsert_offer_daily_booking_count(int(offer_id), datetime.date.fromisoformat(day), int(delta))
+        n_updated += 1
+    db.session.commit()
+    redis_client.delete(REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS)
+    logger.info("Applied pending daily booking counts of offers", extra={"count": n_updated})
+    return n_updated
+
+
+def _upsert_offer_daily_booking_count(offer_id: int, day: datetime.date, delta: int) -> None:
+    table = models.OfferDailyBookingCount.__table__
+    statement = postgresql.insert(table).values(offerId=offer_id, day=day, bookingCount=max(delta, 0))
+    statement = statement.on_conflict_do_update(
+        constraint="unique_offer_daily_booking_count_day",
+        set_={"bookingCount": sa.func.greatest(table.c.bookingCount + delta, 0)},
+    )
+    db.session.execute(statement)
+
+
+def get_offers_booking_count_from_daily_counts(offer_ids: typing.Collection[int], days: int) -> dict[int, int]:
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).date()
+    query = (
+        models.OfferDailyBookingCount.query.filter(
+            models.OfferDailyBookingCount.offerId.in_(offer_ids),
+            models.OfferDailyBookingCount.day >= since,
+        )
+        .group_by(models.OfferDailyBookingCount.offerId)
+        .with_entities(
+            models.OfferDailyBookingCount.offerId,
+            sa.func.sum(models.OfferDailyBookingCount.bookingCount),
+        )
+    )
+    return {offer_id: int(count) for offer_id, count in query if count}
+
+
+def rebuild_offer_daily_booking_counts() -> None:
+    """Rebuild daily booking counts from bookings, and delete counts
+    that are too old to be useful.
+
+    Counts are incrementally updated when bookings are created or
+    cancelled, but not by all code paths (e.g. bulk updates or
+    manual fixes). Rebuilding them every day fixes any drift.
+
+    Increments that have not been applied yet are included in rebuilt
+    counts and discarded once they are committed, while increments
+    recorded after the start of the rebuild are kept.
+    """
+    redis_client = current_app.redis_client
+    db_utils.acquire_lock(OFFER_DAILY_BOOKING_COUNTS_LOCK_NAME)
+    # Increments left by a rebuild that died are included in any case.
+    redis_client.delete(REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS)
+    if redis_client.exists(REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS):
+        redis_client.rename(REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS, REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS)
+    _move_offer_daily_booking_count_increments(
+        REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS, REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS
+    )
+    since = datetime.datetime.utcnow().date() - datetime.timedelta(days=OFFER_DAILY_BOOKING_COUNT_RETENTION_DAYS)
+    booking_day = sa.cast(bookings_models.Booking.dateCreated, sa.Date)
+    counts = (
+        sa.select(models.Stock.offerId, booking_day, sa.func.count(bookings_models.Booking.id))
+        .select_from(bookings_models.Booking)
+        .join(models.Stock, models.Stock.id == bookings_models.Booking.stockId)
+        .where(
+            bookings_models.Booking.dateCreated >= since,
+            bookings_models.Booking.status != bookings_models.BookingStatus.CANCELLED,
+        )
+        .group_by(models.Stock.offerId, booking_day)
+    )
+    try:
+        models.OfferDailyBookingCount.query.delete()
+        db.session.execute(
+            sa.insert(models.OfferDailyBookingCount.__table__).from_select(["offerId", "day", "bookingCount"], counts)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Increments have not been included in counts: apply them later.
+        _move_offer_daily_booking_count_increments(
+            REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS, REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS
+        )
+        raise
+    redis_client.delete(REDIS_REBUILDING_OFFER_DAILY_BOOKING_COUNTS)
+
+
+def _move_offer_daily_booking_count_increments(source: str, destination: str) -> None:
+    # `source` must not be written concurrently, `destination` may be.
+    redis_client = current_app.redis_client
+    increments = redis_client.hgetall(source)
+    if not increments:
+        return
+    pipeline = redis_client.pipeline()
+    for key, delta in increments.items():
+        pipeline.hincrby(destination, key, int(delta))
+    pipeline.delete(source)
+    pipeline.execute()
@@ -29,8 +29,10 @@ class CalculatedOfferAddress:
     street: str | None
 
 
-def get_offer_address(offer: Offer) -> CalculatedOfferAddress:
-    if FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active():
+def get_offer_address(offer: Offer, use_offerer_address: bool | None = None) -> CalculatedOfferAddress:
+    if use_offerer_address is None:
+        use_offerer_address = FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
+    if use_offerer_address:
         offerer_address = offer.offererAddress
         if offerer_address:
             return CalculatedOfferAddress(
@@ -22,6 +22,7 @@ import pcapi.core.providers.models as providers_models
 import pcapi.core.providers.repository as providers_repository
 from pcapi.core.users import models as users_models
 from pcapi.models import db
+from pcapi.models.feature import FeatureToggle
 from pcapi.repository import repository
 from pcapi.routes.serialization.venue_provider_serialize import PostVenueProviderBody
 from pcapi.validation.models.entity_validator import validate
@@ -405,6 +406,34 @@ def _siret_can_be_synchronized(
 def synchronize_stocks(
     stock_details: Iterable[providers_models.StockDetail], venue: offerers_models.Venue, provider_id: int | None = None
 ) -> dict[str, int]:
+    existing_stocks_by_provider_reference = None
+    unchanged_stocks_count = 0
+    if FeatureToggle.WIP_INCREMENTAL_STOCK_SYNCHRONIZATION.is_active():
+        # Compare incoming stocks with a snapshot of current stocks, and
+        # only process stocks that are new or have changed.
+        stock_details = list(stock_details)
+        existing_stocks_by_provider_reference = offers_repository.get_stocks_by_id_at_providers(
+            [stock_detail.stocks_provider_reference for stock_detail in stock_details]
+        )
+        changed_stock_details = [
+            stock_detail
+            for stock_detail in stock_details
+            if _has_stock_changed(
+                stock_detail,
+                existing_stocks_by_provider_reference.get(stock_detail.stocks_provider_reference),
+                provider_id,
+            )
+        ]
+        unchanged_stocks_count = len(stock_details) - len(changed_stock_details)
+        stock_details = changed_stock_details
+        if not stock_details:
+            return {
+                "new_offers": 0,
+                "new_stocks": 0,
+                "updated_stocks": 0,
+                "unchanged_stocks": unchanged_stocks_count,
+            }
+
     products_provider_references = [stock_detail.products_provider_reference for stock_detail in stock_details]
     # here product.id_at_providers is the "ref" field that provider api gives use.
     products_by_provider_reference = offers_repository.get_products_map_by_provider_reference(
@@ -460,8 +489,11 @@ def synchronize_stocks(
     new_offers_by_provider_reference = offers_repository.get_offers_map_by_id_at_provider(new_offers_references, venue)
     offers_by_provider_reference = {**offers_by_provider_reference, **new_offers_by_provider_reference}
 
-    stocks_provider_references = [stock.stocks_provider_reference for stock in stock_details]
-    stocks_by_provider_reference = offers_repository.get_stocks_by_id_at_providers(stocks_provider_references)
+    if existing_stocks_by_provider_reference is None:
+        stocks_provider_references = [stock.stocks_provider_reference for stock in stock_details]
+        stocks_by_provider_reference = offers_repository.get_stocks_by_id_at_providers(stocks_provider_references)
+    else:
+        stocks_by_provider_reference = existing_stocks_by_provider_reference
     update_stock_mapping, new_stocks, offer_ids = _get_stocks_to_upsert(
         stock_details,
         stocks_by_provider_reference,
@@ -481,11 +513,14 @@ def synchronize_stocks(
         log_extra={"provider_id": provider_id},
     )
 
-    return {
+    operations = {
         "new_offers": len(new_offers),
         "new_stocks": len(new_stocks),
         "updated_stocks": len(update_stock_mapping),
     }
+    if existing_stocks_by_provider_reference is not None:
+        operations["unchanged_stocks"] = unchanged_stocks_count
+    return operations
 
 
 def _build_new_offers_from_stock_details(
@@ -624,6 +659,34 @@ def _validate_stock_or_offer(model: offers_models.Offer | offers_models.Stock) -
     return True
 
 
+def _has_stock_changed(
+    stock_detail: providers_models.StockDetail, existing_stock: dict | None, provider_id: int | None
+) -> bool:
+    if existing_stock is None:
+        return True
+    # A price of zero is ignored, see `_get_stocks_to_upsert()`.
+    new_price = stock_detail.price or existing_stock["price"]
+    return (
+        existing_stock["price"] != new_price
+        or existing_stock["raw_provider_quantity"] != stock_detail.available_quantity
+        # Bookings may have been made or cancelled since the last synchronization.
+        or existing_stock["quantity"] != stock_detail.available_quantity + existing_stock["booking_quantity"]
+        or existing_stock["last_provider_id"] != provider_id
+        or existing_stock["is_soft_deleted"]
+    )
+
+
+def get_no_op_ratio(operations: typing.Mapping[str, int], stock_count: int) -> float | None:
+    """Return the ratio of received stocks that did not need any
+    update, or None if stocks have not been compared with current ones.
+    """
+    if "unchanged_stocks" not in operations:
+        return None
+    if not stock_count:
+        return 0.0
+    return round(operations["unchanged_stocks"] / stock_count, 3)
+
+
 def _should_reindex_offer(new_quantity: int, new_price: decimal.Decimal, existing_stock: dict) -> bool:
     if existing_stock["price"] != new_price:
         return True
@@ -1,4 +1,6 @@
 import abc
+import collections
+from concurrent import futures
 import datetime
 import functools
 import logging
@@ -6,7 +8,9 @@ import typing
 import uuid
 
 import PIL
+import flask
 import pydantic.v1 as pydantic
+import sqlalchemy as sa
 
 from pcapi import repository
 from pcapi import settings
@@ -25,6 +29,11 @@ from pcapi.utils import requests
 
 logger = logging.getLogger(__name__)
 
+# Number of search pages that are fetched ahead of the page that is
+# being saved.
+PAGE_PREFETCH_COUNT = 2
+THUMBNAIL_DOWNLOAD_WORKERS = 8
+
 
 def insert_local_provider_event_on_error(method: typing.Callable) -> typing.Callable:
     @functools.wraps(method)
@@ -50,40 +59,95 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
         self.provider = providers_repository.get_provider_by_name(providers_constants.TITELIVE_EPAGINE_PROVIDER_NAME)
 
     @insert_local_provider_event_on_error
-    def synchronize_products(self, from_date: datetime.date | None = None, from_page: int = 1) -> None:
+    def synchronize_products(self, from_date: datetime.date | None = None, from_page: int | None = None) -> None:
         if from_date is None:
             from_date = self.get_last_sync_date()
+        if from_page is None:
+            # Resume an interrupted sync of the same date after the last
+            # page that has been saved.
+            last_synced_page = self.get_last_synced_page(from_date)
+            from_page = last_synced_page + 1 if last_synced_page else 1
 
         with repository.transaction():
             start_sync_event = self.log_sync_status(providers_models.LocalProviderEventType.SyncStart)
             db.session.add(start_sync_event)
 
         products_to_update_pages = self.get_updated_titelive_pages(from_date, from_page)
-        for titelive_page in products_to_update_pages:
+        for page_index, titelive_page in products_to_update_pages:
             updated_products = self.upsert_titelive_page(titelive_page)
-            failed_to_update_products = []
-            # Saving the products one by one to avoid a rollback of the whole transaction if and when an error occurs
-            for product in updated_products:
-                try:
-                    with repository.transaction():
-                        db.session.add(product)
-                except Exception as e:  # pylint: disable=broad-except
-                    ean = product.extraData.get("ean") if product.extraData else None
-                    logger.error(
-                        "Error while saving product in db",
-                        extra={"exception": e, "productId": product.id, "ean": ean},
-                    )
-                    failed_to_update_products.append(product)
-            updated_products = [product for product in updated_products if product not in failed_to_update_products]
+            updated_products = self.save_products(updated_products)
 
             with repository.transaction():
                 updated_thumb_products = self.update_product_thumbnails(updated_products, titelive_page)
                 db.session.add_all(updated_thumb_products)
+                # Checkpoint used to resume the sync if it is interrupted.
+                page_sync_event = self.log_sync_status(
+                    providers_models.LocalProviderEventType.SyncPartEnd,
+                    f"from {from_date.isoformat()} page {page_index}",
+                )
+                db.session.add(page_sync_event)
 
         with repository.transaction():
             stop_sync_event = self.log_sync_status(providers_models.LocalProviderEventType.SyncEnd)
             db.session.add(stop_sync_event)
 
+    def save_products(self, products: list[offers_models.Product]) -> list[offers_models.Product]:
+        """Save products in a single transaction. If it fails, save them
+        one by one, and return the products that have been saved.
+        """
+        try:
+            with repository.transaction():
+                db.session.add_all(products)
+        except Exception:  # pylint: disable=broad-except
+            logger.info("Could not save Titelive products in a single transaction, saving them one by one")
+        else:
+            return products
+
+        failed_to_update_products = []
+        # Saving the products one by one to avoid a rollback of the whole transaction if and when an error occurs
+        for product in products:
+            try:
+                with repository.transaction():
+                    db.session.add(product)
+            except Exception as e:  # pylint: disable=broad-except
+                ean = product.extraData.get("ean") if product.extraData else None
+                logger.error(
+                    "Error while saving product in db",
+                    extra={"exception": e, "productId": product.id, "ean": ean},
+                )
+                failed_to_update_products.append(product)
+        return [product for product in products if product not in failed_to_update_products]
+
+    def get_last_synced_page(self, from_date: datetime.date) -> int | None:
+        """Return the last page that has been saved by the current sync,
+        or None if the last sync has ended or was not started from
+        ``from_date``.
+        """
+        page_payload_prefix = f"{self.titelive_base.value} : from "
+        from_date_payload_prefix = f"{page_payload_prefix}{from_date.isoformat()} page "
+        last_event = (
+            providers_models.LocalProviderEvent.query.filter(
+                providers_models.LocalProviderEvent.provider == self.provider,
+                sa.or_(
+                    sa.and_(
+                        providers_models.LocalProviderEvent.type == providers_models.LocalProviderEventType.SyncEnd,
+                        providers_models.LocalProviderEvent.payload == self.titelive_base.value,
+                    ),
+                    sa.and_(
+                        providers_models.LocalProviderEvent.type == providers_models.LocalProviderEventType.SyncPartEnd,
+                        providers_models.LocalProviderEvent.payload.startswith(page_payload_prefix),
+                    ),
+                ),
+            )
+            .order_by(providers_models.LocalProviderEvent.id.desc())
+            .first()
+        )
+        if last_event is None or last_event.type != providers_models.LocalProviderEventType.SyncPartEnd:
+            return None
+        if not last_event.payload.startswith(from_date_payload_prefix):
+            return None
+        return int(last_event.payload.removeprefix(from_date_payload_prefix))
+
     def get_last_sync_date(self) -> datetime.date:
         last_sync_event = (
             providers_models.LocalProviderEvent.query.filter(
@@ -111,22 +175,45 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
 
     def get_updated_titelive_pages(
         self, from_date: datetime.date, from_page: int
-    ) -> typing.Iterator[list[TiteliveWorkType]]:
-        page_index = from_page
-        has_next_page = True
-        while has_next_page:
-            json_response = titelive.search_products(self.titelive_base, from_date, page_index)
-            product_page = self.get_product_info_from_search_response(json_response)
-            recent_product_page = filter_recent_products(product_page, from_date)
-            allowed_product_page, not_allowed_eans = self.partition_allowed_products(recent_product_page)
-            allowed_product_page = [work for work in allowed_product_page if work.article]
-            offers_api.reject_inappropriate_products(not_allowed_eans, author=None)
-
-            yield allowed_product_page
+    ) -> typing.Iterator[tuple[int, list[TiteliveWorkType]]]:
+        """Yield the index and the allowed works of each search page.
 
-            # sometimes titelive returns a partially filled page while having a next page in store for us
-            has_next_page = bool(product_page)
-            page_index += 1
+        Next pages are fetched in a background thread while the caller
+        saves the current one.
+        """
+        app = flask.current_app._get_current_object()  # type: ignore[attr-defined]
+        next_page_index = from_page
+        pending_pages: collections.deque[tuple[int, futures.Future]] = collections.deque()
+
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                while len(pending_pages) < PAGE_PREFETCH_COUNT:
+                    future = executor.submit(self._fetch_titelive_page, app, from_date, next_page_index)
+                    pending_pages.append((next_page_index, future))
+                    next_page_index += 1
+
+                page_index, future = pending_pages.popleft()
+                product_page = future.result()
+                # sometimes titelive returns a partially filled page while having a next page in store for us
+                if not product_page:
+                    for _, pending_future in pending_pages:
+                        pending_future.cancel()
+                    break
+
+                recent_product_page = filter_recent_products(product_page, from_date)
+                allowed_product_page, not_allowed_eans = self.partition_allowed_products(recent_product_page)
+                allowed_product_page = [work for work in allowed_product_page if work.article]
+                offers_api.reject_inappropriate_products(not_allowed_eans, author=None)
+
+                yield page_index, allowed_product_page
+
+    def _fetch_titelive_page(
+        self, app: flask.Flask, from_date: datetime.date, page_index: int
+    ) -> list[TiteliveWorkType]:
+        # Run in a worker thread: must not use the database.
+        with app.app_context():
+            json_response = titelive.search_products(self.titelive_base, from_date, page_index)
+            return self.get_product_info_from_search_response(json_response)
 
     def get_product_info_from_search_response(self, titelive_json_response: list[dict]) -> list[TiteliveWorkType]:
         return self.deserialize_titelive_products(titelive_json_response)
@@ -197,22 +284,49 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
                         offers_models.TiteliveImageType.VERSO
                     ] = article.imagesUrl.verso
 
-        for product in products:
-            assert product.extraData, "product %s initialized without extra data" % product.id
+        app = flask.current_app._get_current_object()  # type: ignore[attr-defined]
+        uploads: list[tuple[offers_models.Product, dict, dict, list[futures.Future]]] = []
 
-            ean = product.extraData.get("ean")
-            assert ean, "product %s initialized without ean" % product.id
+        with futures.ThreadPoolExecutor(max_workers=THUMBNAIL_DOWNLOAD_WORKERS) as executor:
+            for product in products:
+                assert product.extraData, "product %s initialized without extra data" % product.id
 
-            new_thumbnail_urls = thumbnail_url_by_ean.get(ean)
-            if not new_thumbnail_urls:
-                logger.warning("No thumbnail for product ean %s", ean)
-                continue
-            try:
+                ean = product.extraData.get("ean")
+                assert ean, "product %s initialized without ean" % product.id
+
+                new_thumbnail_urls = thumbnail_url_by_ean.get(ean)
+                if not new_thumbnail_urls:
+                    logger.warning("No thumbnail for product ean %s", ean)
+                    continue
+
+                image_ids = {image_type: str(uuid.uuid4()) for image_type in new_thumbnail_urls}
+                product_uploads = [
+                    executor.submit(_upload_titelive_thumbnail, app, product, url, image_ids[image_type])
+                    for image_type, url in new_thumbnail_urls.items()
+                ]
+                uploads.append((product, new_thumbnail_urls, image_ids, product_uploads))
+
+            for product, new_thumbnail_urls, image_ids, product_uploads in uploads:
+                try:
+                    for upload in product_uploads:
+                        upload.result()
+                except (requests.ExternalAPIException, PIL.UnidentifiedImageError) as e:
+                    logger.error(
+                        "Error while downloading Titelive image",
+                        extra={
+                            "exception": e,
+                            "url_recto": new_thumbnail_urls.get(offers_models.TiteliveImageType.RECTO),
+                            "url_verso": new_thumbnail_urls.get(offers_models.TiteliveImageType.VERSO),
+                            "request_type": "image",
+                        },
+                    )
+                    continue
+
+                # Mediations of a product are only replaced once all its images have been uploaded.
                 self.remove_product_mediation(product)
                 for image_type in offers_models.TiteliveImageType:
-                    new_thumbnail_url = new_thumbnail_urls.get(image_type)
-                    if new_thumbnail_url is not None:
-                        image_id = str(uuid.uuid4())
+                    image_id = image_ids.get(image_type)
+                    if image_id is not None:
                         mediation = offers_models.ProductMediation(
                             productId=product.id,
                             lastProvider=self.provider,
@@ -222,29 +336,6 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
                         )
                         db.session.add(mediation)
 
-                        image_bytes = titelive.download_titelive_image(new_thumbnail_url)
-                        thumb_storage.create_thumb(
-                            product,
-                            image_bytes,
-                            storage_id_suffix_str="",
-                            keep_ratio=True,
-                            object_id=image_id,
-                        )
-                db.session.commit()
-            except (requests.ExternalAPIException, PIL.UnidentifiedImageError) as e:
-                db.session.rollback()
-                print("Error while downloading Titelive imageÔ")
-                logger.error(
-                    "Error while downloading Titelive image",
-                    extra={
-                        "exception": e,
-                        "url_recto": new_thumbnail_urls.get(offers_models.TiteliveImageType.RECTO),
-                        "url_verso": new_thumbnail_urls.get(offers_models.TiteliveImageType.VERSO),
-                        "request_type": "image",
-                    },
-                )
-                continue
-
         return products
 
     def remove_product_mediation(self, product: offers_models.Product) -> None:
@@ -265,6 +356,20 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
         return s
 
 
+def _upload_titelive_thumbnail(app: flask.Flask, product: offers_models.Product, url: str, image_id: str) -> None:
+    # Run in a worker thread: `product` is only passed along (it is not
+    # used by `create_thumb()` when `object_id` is given).
+    with app.app_context():
+        image_bytes = titelive.download_titelive_image(url)
+        thumb_storage.create_thumb(
+            product,
+            image_bytes,
+            storage_id_suffix_str="",
+            keep_ratio=True,
+            object_id=image_id,
+        )
+
+
 def filter_recent_products(
     titelive_product_page: list[TiteliveWorkType],
     from_date: datetime.date,
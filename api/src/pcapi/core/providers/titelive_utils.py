@@ -1,46 +1,16 @@
 import csv
-import json
 import os.path
 from pathlib import Path
 import typing
 from typing import TypedDict
 
-
-# Black is only used for the `flask update_gtl` command, which is only
-# used on development environments. We don't need (and thus don't
-# install) Black on production Docker image.
-try:
-    import black
-
-    HAS_BLACK = True
-except ImportError:
-    HAS_BLACK = False
-
 from pcapi import settings
 
 
 DIRECTORY = Path(__file__).resolve().parent
-FILENAME = "titelive_gtl.py"
+FILENAME = "titelive_gtl.tsv"
 FILE_PATH = DIRECTORY / FILENAME
 
-HEADER_DOCUMENTATION = """
-# pylint: skip-file
-# This source was generated
-# DO NOT EDIT !
-#
-# Tite live will provide update to this file a few times per year, in order to regenerate the file:
-#
-# 1. Save the new file in CSV format using tab separator:
-#     the format seems to change every time, so profread the stript befor ani new import.
-# 2. Run the following command:
-#     flask update_gtl --file GTL_2023.csv
-#
-# Intermediate levels:
-# - When value of level_02_code, level_03_code and level_04_code, level_02_code and level_03_code and level_04_code is "00", it means it is an intermediate GTL,
-# - When you have an intermediate GTL, level_02_label, level_03_label and level_04_label may be None.
-#
-"""
-
 COLUMN_INDICES = {
     "LEVEL_01_LABEL": 1,
     "LEVEL_02_LABEL": 3,
@@ -104,34 +74,29 @@ def _get_gtls_from_csv_reader(reader: typing.Any) -> dict[str, Gtl]:
     return gtls
 
 
+def write_gtls(gtls: dict[str, Gtl], path: Path) -> None:
+    # See `titelive_gtl.load_gtls()` about the format of the file.
+    with open(path, "w", encoding="utf-8", newline="\n") as fp:
+        for gtl_id, gtl in gtls.items():
+            labels = (
+                gtl["label"],
+                gtl["level_01_label"],
+                gtl["level_02_label"],
+                gtl["level_03_label"],
+                gtl["level_04_label"],
+            )
+            fp.write("\t".join((gtl_id, *(label or "" for label in labels))) + "\n")
+
+
 def generate_titelive_gtl_from_file(file: str) -> None:
     if not settings.TITELIVE_GENERATE_FROM_FILE_IN_DEV:
         raise RuntimeError("Not DEV environment")
-    assert HAS_BLACK
-
-    import_str = "from .titelive_utils import Gtl"
-    method_str = """
-def get_gtl(gtl_id: str) -> Gtl | None:
-    gtl_id_8chars = gtl_id.zfill(8)
-    return GTLS.get(gtl_id_8chars)
-    """
 
     with open(file, newline="", encoding="utf-8") as gtl_csv_file:
         gtl_reader = csv.reader(gtl_csv_file, delimiter="\t")
         gtls = _get_gtls_from_csv_reader(gtl_reader)
 
-        if not os.path.isdir(DIRECTORY):
-            os.mkdir(DIRECTORY)
-
-        with open(FILE_PATH, "w", encoding="utf-8") as gtl_python_file:
-            gtl_file_content = black.format_str(
-                f"""{HEADER_DOCUMENTATION}
-{import_str}
-{method_str}
-GTLS: dict[str, Gtl] = {json.dumps(gtls).encode('ascii').decode('unicode-escape')}
-""".replace(
-                    ": null", ": None"  # To replace all null (JSON) with None (Python)
-                ),
-                mode=black.FileMode(),
-            )
-            gtl_python_file.write(gtl_file_content)
+    if not os.path.isdir(DIRECTORY):
+        os.mkdir(DIRECTORY)
+
+    write_gtls(gtls, FILE_PATH)
@@ -1,9 +1,15 @@
+import collections
 from collections import abc
+from concurrent import futures
 import datetime
 import enum
 import logging
+import resource
+import threading
+import time
 import typing
 
+import flask
 from flask_sqlalchemy import BaseQuery
 import sqlalchemy as sa
 
@@ -13,6 +19,7 @@ from pcapi.connectors.big_query.queries.last_30_days_booking import Last30DaysBo
 from pcapi.core.bookings import models as bookings_models
 from pcapi.core.categories import subcategories_v2
 from pcapi.core.educational import models as educational_models
+from pcapi.core.logging import log_elapsed
 from pcapi.core.offerers import models as offerers_models
 from pcapi.core.offers import models as offers_models
 import pcapi.core.offers.repository as offers_repository
@@ -266,6 +273,250 @@ def index_offers_in_queue(from_error_queue: bool = False, max_batches_to_process
         n_batches += 1
 
 
+class _IndexationPipelineStats:
+    """Thread-safe accumulator of the number of items processed and
+    the time spent by each stage of the offer indexation pipeline.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = collections.defaultdict(int)
+        self._durations: dict[str, float] = collections.defaultdict(float)
+
+    def record(self, stage: str, count: int, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counts[stage] += count
+            self._durations[stage] += elapsed
+
+    def get_report(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": count,
+                    "elapsed": self._durations[stage],
+                    "per_second": count / self._durations[stage] if self._durations[stage] else None,
+                }
+                for stage, count in self._counts.items()
+            }
+
+
+def _push_offer_batch(
+    app: flask.Flask,
+    backend: base.SearchBackend,
+    stats: _IndexationPipelineStats,
+    processing_queue: str,
+    *,
+    objects: list[dict],
+    to_delete_ids: list[int],
+    from_error_queue: bool,
+) -> None:
+    """Send a batch of serialized offers to the indexation service and
+    delete the processing queue of the batch. This runs in a worker
+    thread and must not access the database.
+    """
+    start = time.perf_counter()
+    with app.app_context():
+        to_add_ids = [obj["objectID"] for obj in objects]
+        try:
+            backend.save_serialized_offers(objects)
+        except Exception as exc:  # pylint: disable=broad-except
+            if not settings.CATCH_INDEXATION_EXCEPTIONS:
+                raise
+            _log_indexation_error("offers", ids=to_add_ids, exc=exc, from_error_queue=from_error_queue)
+            backend.enqueue_offer_ids_in_error(to_add_ids)
+
+        try:
+            backend.unindex_offer_ids(to_delete_ids)
+        except Exception as exc:  # pylint: disable=broad-except
+            if not settings.CATCH_INDEXATION_EXCEPTIONS:
+                raise
+            _log_indexation_error("offers", ids=to_delete_ids, exc=exc, from_error_queue=from_error_queue)
+            backend.enqueue_offer_ids_in_error(to_delete_ids)
+
+        backend.delete_offer_processing_queue(processing_queue, from_error_queue=from_error_queue)
+    stats.record("push", len(objects) + len(to_delete_ids), start)
+
+
+def index_offers_in_queue_concurrently(
+    from_error_queue: bool = False,
+    max_batches_to_process: int | None = 100,
+    workers: int = 4,
+) -> dict:
+    """Pop offers from indexation queue and reindex them, like
+    `index_offers_in_queue()`, but as a pipeline: while previous
+    batches are sent to the indexation service by a pool of
+    ``workers`` threads, the next batches are popped, loaded and
+    serialized.
+
+    Loading and serialization happen in the calling thread, because
+    they need the database session, which must not be shared between
+    threads. Each batch has its own processing queue that is only
+    deleted once the batch has been sent. If the process crashes, the
+    ids will be moved back to the originating queue by
+    `clean_processing_queues()`.
+
+    Return a report of the throughput of each stage.
+    """
+    backend = _get_backend()
+    app = flask.current_app._get_current_object()  # type: ignore[attr-defined]
+    stats = _IndexationPipelineStats()
+    start = time.perf_counter()
+    n_batches = 0
+    n_offers = 0
+    pending: collections.deque[futures.Future] = collections.deque()
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while not max_batches_to_process or n_batches < max_batches_to_process:
+            stage_start = time.perf_counter()
+            processing_queue, offer_ids = backend.move_offer_ids_to_processing_queue(
+                count=settings.REDIS_OFFER_IDS_CHUNK_SIZE,
+                from_error_queue=from_error_queue,
+            )
+            stats.record("pop", len(offer_ids), stage_start)
+            if not offer_ids:
+                break
+            assert processing_queue  # helps mypy
+            n_batches += 1
+            n_offers += len(offer_ids)
+            log_extra = {"requested_count": len(offer_ids), "from_error_queue": from_error_queue}
+
+            try:
+                stage_start = time.perf_counter()
+                offers = get_base_query_for_offer_indexation().filter(offers_models.Offer.id.in_(offer_ids)).all()
+                to_add, to_delete_ids = _split_offers_to_reindex(backend, offers, log_extra)
+                last_x_days_bookings_count_by_offer = get_last_x_days_booking_count_by_offer(to_add)
+                stats.record("load", len(offers), stage_start)
+
+                stage_start = time.perf_counter()
+                objects = backend.serialize_offers(to_add, last_x_days_bookings_count_by_offer)
+                stats.record("serialize", len(objects), stage_start)
+
+                # some offers changes might make some venue ineligible for search
+                _reindex_venues_from_offers(offer_ids)
+            except Exception as exc:  # pylint: disable=broad-except
+                if not settings.CATCH_INDEXATION_EXCEPTIONS:
+                    raise
+                logger.exception(
+                    "Exception while reindexing offers, must fix manually",
+                    extra={"exc": str(exc), "offers": offer_ids},
+                )
+                backend.delete_offer_processing_queue(processing_queue, from_error_queue=from_error_queue)
+                continue
+
+            pending.append(
+                executor.submit(
+                    _push_offer_batch,
+                    app,
+                    backend,
+                    stats,
+                    processing_queue,
+                    objects=objects,
+                    to_delete_ids=to_delete_ids,
+                    from_error_queue=from_error_queue,
+                )
+            )
+            # Do not let serialized batches pile up in memory if the
+            # indexation service is slower than the database.
+            while len(pending) >= workers:
+                pending.popleft().result()
+
+        while pending:
+            pending.popleft().result()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "batches": n_batches,
+        "offers": n_offers,
+        "elapsed": elapsed,
+        "offers_per_second": n_offers / elapsed if elapsed else None,
+        "stages": stats.get_report(),
+    }
+    logger.info(
+        "Reindexed offers from queue with pipelined indexer",
+        extra=report | {"from_error_queue": from_error_queue, "workers": workers},
+    )
+    return report
+
+
+REDIS_REINDEX_ALL_OFFERS_CHECKPOINT = "search:reindex-all-offers:checkpoint:{from_id}:{to_id}"
+
+
+def _get_peak_rss() -> int:
+    """Return the peak resident set size of the current process, in
+    kilobytes (on Linux).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reindex_all_offers(
+    from_id: int = 0,
+    to_id: int | None = None,
+    batch_size: int = 1000,
+    restart: bool = False,
+) -> dict:
+    """Reindex all active offers whose id is greater than ``from_id``
+    and lower or equal to ``to_id``.
+
+    Offers are processed by batches of ids in ascending order (with
+    keyset pagination), and the session is emptied after each batch,
+    so that memory usage does not depend on the number of offers.
+
+    The last processed id is saved in Redis after each batch. If the
+    process is killed, running it again with the same range resumes
+    from there (unless ``restart`` is True). Several processes can
+    thus split the id space with distinct ranges.
+
+    Each batch is logged with the cumulative number of offers, offers
+    per second and peak RSS. The same figures are returned at the end.
+    """
+    redis_client = flask.current_app.redis_client
+    checkpoint_key = REDIS_REINDEX_ALL_OFFERS_CHECKPOINT.format(from_id=from_id, to_id=to_id or "")
+    last_id = from_id
+    if restart:
+        redis_client.delete(checkpoint_key)
+    elif checkpoint := redis_client.get(checkpoint_key):
+        last_id = int(checkpoint)
+        logger.info("Resuming reindexation of all offers", extra={"checkpoint": last_id, "from_id": from_id})
+
+    start = time.perf_counter()
+    n_offers = 0
+    while True:
+        offer_ids = offers_repository.get_active_offer_ids_after(last_id, batch_size, to_id=to_id)
+        if not offer_ids:
+            break
+        # Always send offers: this command is used to rebuild the
+        # index, whose content may not match fingerprints anymore.
+        reindex_offer_ids(offer_ids, force=True)
+        db.session.expunge_all()
+        last_id = offer_ids[-1]
+        redis_client.set(checkpoint_key, last_id)
+        n_offers += len(offer_ids)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Reindexed batch of offers",
+            extra={
+                "last_id": last_id,
+                "count": n_offers,
+                "elapsed": elapsed,
+                "offers_per_second": n_offers / elapsed,
+                "peak_rss_kb": _get_peak_rss(),
+            },
+        )
+
+    redis_client.delete(checkpoint_key)
+    elapsed = time.perf_counter() - start
+    report = {
+        "count": n_offers,
+        "last_id": last_id,
+        "elapsed": elapsed,
+        "offers_per_second": n_offers / elapsed if elapsed else None,
+        "peak_rss_kb": _get_peak_rss(),
+    }
+    logger.info("Reindexed all offers", extra=report | {"from_id": from_id, "to_id": to_id})
+    return report
+
+
 def index_all_collective_offers_and_templates() -> None:
     """Force reindexation of all collective offers and templates."""
     backend = _get_backend()
@@ -478,6 +729,8 @@ DEFAULT_DAYS_FOR_LAST_BOOKINGS = 30
 def get_offers_booking_count_by_id(
     offer_ids: abc.Collection[int], days: int = DEFAULT_DAYS_FOR_LAST_BOOKINGS
 ) -> dict[int, int]:
+    if FeatureToggle.WIP_USE_OFFER_DAILY_BOOKING_COUNTS.is_active():
+        return offers_repository.get_offers_booking_count_from_daily_counts(offer_ids, days)
     offer_booked_since_x_days = (
         offers_models.Offer.query.join(offers_models.Offer.stocks)
         .outerjoin(offers_models.Offer.product)
@@ -517,40 +770,65 @@ def get_last_x_days_booking_count_by_offer(offers: abc.Iterable[offers_models.Of
     return default_dict
 
 
-def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = False) -> None:
-    """Given a list of `Offer.id`, reindex or unindex each offer
-    (i.e. request the external indexation service an update or a
-    removal).
-
-    This function calls the external indexation service and may thus
-    be slow. It should not be called by usual code. You should rather
-    call `async_index_offer_ids()` instead to return quickly.
+def _split_offers_to_reindex(
+    backend: base.SearchBackend,
+    offers: abc.Iterable[offers_models.Offer],
+    log_extra: dict,
+) -> tuple[list[offers_models.Offer], list[int]]:
+    """Return offers that should be indexed and ids of offers that
+    should be unindexed.
     """
-    backend = _get_backend()
-
     to_add = []
     to_delete_ids = []
-
-    offers = get_base_query_for_offer_indexation().filter(offers_models.Offer.id.in_(offer_ids))
-
+    ineligible_ids = []
     for offer in offers:
-        if offer and offer.is_eligible_for_search:
+        if offer.is_eligible_for_search:
             to_add.append(offer)
-        elif backend.check_offer_is_indexed(offer):
-            to_delete_ids.append(offer.id)
+        else:
+            ineligible_ids.append(offer.id)
+
+    with log_elapsed(logger, "reindex_offer_ids: checked indexed offers", log_extra | {"count": len(ineligible_ids)}):
+        indexed_ids = backend.check_offer_ids_are_indexed(ineligible_ids)
+    for offer_id in ineligible_ids:
+        if offer_id in indexed_ids:
+            to_delete_ids.append(offer_id)
         else:
             # FIXME (dbaty, 2021-06-24). I think we could safely do
             # without the hashmap in Redis. Check the logs and see if
             # I am right!
             logger.info(
                 "Redis 'indexed_offers' set avoided unnecessary request to indexation service",
-                extra={"source": "reindex_offer_ids", "offer": offer.id},
+                extra={"source": "reindex_offer_ids", "offer": offer_id},
             )
+    return to_add, to_delete_ids
+
+
+def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = False, force: bool = False) -> None:
+    """Given a list of `Offer.id`, reindex or unindex each offer
+    (i.e. request the external indexation service an update or a
+    removal).
+
+    If ``force`` is True, offers are sent to the indexation service
+    even if they have not changed since they were last indexed.
+
+    This function calls the external indexation service and may thus
+    be slow. It should not be called by usual code. You should rather
+    call `async_index_offer_ids()` instead to return quickly.
+    """
+    backend = _get_backend()
+    log_extra = {"requested_count": len(offer_ids), "from_error_queue": from_error_queue}
+
+    with log_elapsed(logger, "reindex_offer_ids: loaded offers", log_extra):
+        offers = get_base_query_for_offer_indexation().filter(offers_models.Offer.id.in_(offer_ids)).all()
+
+    to_add, to_delete_ids = _split_offers_to_reindex(backend, offers, log_extra)
 
     # Handle new or updated available offers
-    last_x_days_bookings_count_by_offer = get_last_x_days_booking_count_by_offer(to_add)
+    with log_elapsed(logger, "reindex_offer_ids: computed booking counts", log_extra | {"count": len(to_add)}):
+        last_x_days_bookings_count_by_offer = get_last_x_days_booking_count_by_offer(to_add)
     try:
-        backend.index_offers(to_add, last_x_days_bookings_count_by_offer)
+        with log_elapsed(logger, "reindex_offer_ids: indexed offers", log_extra | {"count": len(to_add)}):
+            backend.index_offers(to_add, last_x_days_bookings_count_by_offer, force=force)
     except Exception as exc:  # pylint: disable=broad-except
         if not settings.CATCH_INDEXATION_EXCEPTIONS:
             raise
@@ -564,7 +842,8 @@ def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = F
 
     # Handle unavailable offers (deleted, expired, sold out, etc.)
     try:
-        backend.unindex_offer_ids(to_delete_ids)
+        with log_elapsed(logger, "reindex_offer_ids: unindexed offers", log_extra | {"count": len(to_delete_ids)}):
+            backend.unindex_offer_ids(to_delete_ids)
     except Exception as exc:  # pylint: disable=broad-except
         if not settings.CATCH_INDEXATION_EXCEPTIONS:
             raise
@@ -577,7 +856,8 @@ def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = F
         backend.enqueue_offer_ids_in_error(to_delete_ids)
 
     # some offers changes might make some venue ineligible for search
-    _reindex_venues_from_offers(offer_ids)
+    with log_elapsed(logger, "reindex_offer_ids: reindexed venues of offers", log_extra):
+        _reindex_venues_from_offers(offer_ids)
 
 
 def unindex_offer_ids(offer_ids: abc.Collection[int]) -> None:
@@ -723,6 +1003,10 @@ def get_last_x_days_bookings_for_movies(days: int = 30) -> dict[int, int]:
 
 
 def update_products_last_30_days_booking_count(batch_size: int = 1000) -> None:
+    # Offers without product use daily booking counts (when enabled),
+    # that are rebuilt here to fix any drift of incremental updates.
+    offers_repository.rebuild_offer_daily_booking_counts()
+
     updated_products = update_booking_count_by_product()
     if not updated_products:
         return
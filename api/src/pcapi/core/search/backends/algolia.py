@@ -3,6 +3,8 @@ import contextlib
 import datetime
 import decimal
 import enum
+import hashlib
+import json
 import logging
 import re
 import typing
@@ -12,7 +14,6 @@ import algoliasearch.http.requester
 import algoliasearch.search_client
 from flask import current_app
 import redis
-import sqlalchemy as sa
 
 from pcapi import settings
 from pcapi.core.categories import categories
@@ -22,6 +23,7 @@ import pcapi.core.educational.api.offer as educational_api_offer
 import pcapi.core.educational.models as educational_models
 import pcapi.core.offerers.api as offerers_api
 import pcapi.core.offerers.models as offerers_models
+from pcapi.core.offers.book_macro_sections import book_macro_sections
 import pcapi.core.offers.models as offers_models
 from pcapi.core.offers.utils import get_offer_address
 from pcapi.core.providers import titelive_gtl
@@ -71,6 +73,11 @@ DEFAULT_LATITUDE = 47.158459
 
 WORD_SPLITTER = re.compile(r"\W+")
 
+# If several music types share the same GTL id, keep the first one.
+TITELIVE_MUSIC_TYPE_LABEL_BY_GTL_ID = {
+    music_type.gtl_id: music_type.label for music_type in reversed(categories.TITELIVE_MUSIC_TYPES)
+}
+
 
 class Last30DaysBookingsRange(enum.Enum):
     VERY_LOW = "very-low"
@@ -295,33 +302,11 @@ class AlgoliaBackend(base.SearchBackend):
         # there. A separate cron job looks for these (specially-named)
         # queues and adds back their items to the originating queue
         # (see `clean_processing_queues`).
-        timestamp = datetime.datetime.utcnow().timestamp()
-        processing_queue = f"{queue}:processing:{timestamp}"
+        processing_queue = None
         try:
-            ids = self.redis_client.srandmember(queue, count)
-            with self.redis_client.pipeline(transaction=True) as pipeline:
-                for id_ in ids:
-                    pipeline.smove(queue, processing_queue, id_)
-                pipeline.execute()
-                batch = {int(id_) for id_ in ids}  # str -> int
-                logger.info(
-                    "Moved batch of object ids to index to processing queue",
-                    extra={
-                        "originating_queue": queue,
-                        "processing_queue": processing_queue,
-                        "requested_count": count,
-                        "effective_count": len(batch),
-                    },
-                )
-                yield batch
-                self.redis_client.delete(processing_queue)
-                logger.info(
-                    "Deleted processing queue",
-                    extra={
-                        "originating_queue": queue,
-                        "processing_queue": processing_queue,
-                    },
-                )
+            processing_queue, batch = self._move_ids_to_processing_queue(queue, count)
+            yield batch
+            self._delete_processing_queue(queue, processing_queue)
         except redis.exceptions.RedisError:
             logger.exception(
                 "Could not pop object ids to index from queue",
@@ -329,6 +314,63 @@ class AlgoliaBackend(base.SearchBackend):
             )
             yield set()
 
+    def _move_ids_to_processing_queue(self, queue: str, count: int) -> tuple[str, set[int]]:
+        timestamp = datetime.datetime.utcnow().timestamp()
+        processing_queue = f"{queue}:processing:{timestamp}"
+        ids = self.redis_client.srandmember(queue, count)
+        with self.redis_client.pipeline(transaction=True) as pipeline:
+            for id_ in ids:
+                pipeline.smove(queue, processing_queue, id_)
+            pipeline.execute()
+        batch = {int(id_) for id_ in ids}  # str -> int
+        logger.info(
+            "Moved batch of object ids to index to processing queue",
+            extra={
+                "originating_queue": queue,
+                "processing_queue": processing_queue,
+                "requested_count": count,
+                "effective_count": len(batch),
+            },
+        )
+        return processing_queue, batch
+
+    def _delete_processing_queue(self, queue: str, processing_queue: str) -> None:
+        self.redis_client.delete(processing_queue)
+        logger.info(
+            "Deleted processing queue",
+            extra={
+                "originating_queue": queue,
+                "processing_queue": processing_queue,
+            },
+        )
+
+    def move_offer_ids_to_processing_queue(
+        self,
+        count: int,
+        from_error_queue: bool = False,
+    ) -> tuple[str | None, set[int]]:
+        """Move a batch of offer ids from the indexation queue to a new
+        processing queue, and return the name of the processing queue
+        and the ids.
+
+        Unlike `pop_offer_ids_from_queue()`, this is not a context
+        manager: the caller must call `delete_offer_processing_queue()`
+        once all ids have been processed. It may do so from another
+        thread. If it never does (because of a crash), the ids will
+        eventually be moved back to the originating queue by
+        `clean_processing_queues()`.
+        """
+        queue = REDIS_OFFER_IDS_IN_ERROR_NAME if from_error_queue else REDIS_OFFER_IDS_NAME
+        try:
+            return self._move_ids_to_processing_queue(queue, count)
+        except redis.exceptions.RedisError:
+            logger.exception("Could not pop object ids to index from queue", extra={"originating_queue": queue})
+            return None, set()
+
+    def delete_offer_processing_queue(self, processing_queue: str, from_error_queue: bool = False) -> None:
+        queue = REDIS_OFFER_IDS_IN_ERROR_NAME if from_error_queue else REDIS_OFFER_IDS_NAME
+        self._delete_processing_queue(queue, processing_queue)
+
     def count_offers_to_index_from_queue(self, from_error_queue: bool = False) -> int:
         if from_error_queue:
             queue = REDIS_OFFER_IDS_IN_ERROR_NAME
@@ -359,29 +401,110 @@ class AlgoliaBackend(base.SearchBackend):
             # cache so that we do perform a request to Algolia.
             return True
 
-    def index_offers(self, offers: abc.Collection[offers_models.Offer], last_30_days_bookings: dict[int, int]) -> None:
+    def check_offer_ids_are_indexed(self, offer_ids: abc.Collection[int]) -> set[int]:
+        """Return the subset of ``offer_ids`` that are in the cache of
+        indexed offers, with a single Redis request.
+        """
+        if not offer_ids:
+            return set()
+        offer_ids = list(offer_ids)
+        try:
+            values = self.redis_client.hmget(
+                REDIS_HASHMAP_INDEXED_OFFERS_NAME,
+                [str(offer_id) for offer_id in offer_ids],
+            )
+        except redis.exceptions.RedisError:
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not check whether offers exist in cache", extra={"offers": offer_ids})
+            # See `check_offer_is_indexed()`: when we don't know, we
+            # say that offers are in the cache.
+            return set(offer_ids)
+        return {offer_id for offer_id, value in zip(offer_ids, values) if value is not None}
+
+    def index_offers(
+        self,
+        offers: abc.Collection[offers_models.Offer],
+        last_30_days_bookings: dict[int, int],
+        force: bool = False,
+    ) -> None:
         if not offers:
             return
-        objects = [self.serialize_offer(offer, last_30_days_bookings.get(offer.id) or 0) for offer in offers]
+        objects = self.serialize_offers(offers, last_30_days_bookings)
+        self.save_serialized_offers(objects, force=force)
+
+    def serialize_offers(
+        self,
+        offers: abc.Collection[offers_models.Offer],
+        last_30_days_bookings: dict[int, int],
+    ) -> list[dict]:
+        use_offerer_address = FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
+        objects = [
+            self.serialize_offer(offer, last_30_days_bookings.get(offer.id) or 0, use_offerer_address)
+            for offer in offers
+        ]
+        logger.info(
+            "Serialized offers to index",
+            extra={"count": len(objects), "book_macro_sections": book_macro_sections.get_stats()},
+        )
+        return objects
+
+    def save_serialized_offers(self, objects: abc.Collection[dict], force: bool = False) -> None:
+        """Send already serialized offers to the indexation service.
+
+        Offers whose fingerprint (see `get_offer_fingerprint()`) has
+        not changed since they were last indexed are skipped, unless
+        ``force`` is True (e.g. to rebuild a lost index).
+
+        This function does not access the database. It may thus be
+        called from another thread than the one that loaded and
+        serialized offers.
+        """
+        if not objects:
+            return
+        fingerprints = {obj["objectID"]: get_offer_fingerprint(obj) for obj in objects}
+        if settings.ALGOLIA_SKIP_UNCHANGED_OFFERS and not force:
+            previous_fingerprints = self._get_indexed_offer_fingerprints(list(fingerprints))
+            objects = [
+                obj for obj in objects if previous_fingerprints.get(obj["objectID"]) != fingerprints[obj["objectID"]]
+            ]
+            logger.info(
+                "Skipped unchanged offers",
+                extra={"count": len(fingerprints) - len(objects), "total": len(fingerprints)},
+            )
+            if not objects:
+                return
         self.algolia_offers_client.save_objects(objects)
 
         try:
-            # We used to store a summary of each offer, which is why
-            # we used hashmap and not a set. But since we don't need
-            # the value anymore, we can store the lightest object
-            # possible to make Redis use less memory. In the future,
-            # we may even remove the hashmap if it's not proven useful
-            # (see log in reindex_offer_ids)
-            offer_ids = [offer.id for offer in offers]
+            # The value of each offer is the fingerprint of its last
+            # indexed version. Legacy entries have an empty string,
+            # which never matches, so that these offers are indexed
+            # again.
+            offer_ids = [obj["objectID"] for obj in objects]
             pipeline = self.redis_client.pipeline(transaction=True)
             for offer_id in offer_ids:
-                pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_NAME, str(offer_id), "")
+                pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_NAME, str(offer_id), fingerprints[offer_id])
             pipeline.execute()
         except Exception:  # pylint: disable=broad-except
             logger.exception("Could not add to list of indexed offers", extra={"offers": offer_ids})
         finally:
             pipeline.reset()
 
+    def _get_indexed_offer_fingerprints(self, offer_ids: list[int]) -> dict[int, str]:
+        try:
+            values = self.redis_client.hmget(
+                REDIS_HASHMAP_INDEXED_OFFERS_NAME,
+                [str(offer_id) for offer_id in offer_ids],
+            )
+        except redis.exceptions.RedisError:
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not get fingerprints of indexed offers", extra={"offers": offer_ids})
+            # Reindex all offers, as we would do without fingerprints.
+            return {}
+        return {offer_id: value for offer_id, value in zip(offer_ids, values) if value}
+
     def index_collective_offer_templates(
         self,
         collective_offer_templates: abc.Collection[educational_models.CollectiveOfferTemplate],
@@ -447,7 +570,19 @@ class AlgoliaBackend(base.SearchBackend):
         self.algolia_collective_offers_templates_client.clear_objects()
 
     @classmethod
-    def serialize_offer(cls, offer: offers_models.Offer, last_30_days_bookings: int) -> dict:
+    def serialize_offer(
+        cls,
+        offer: offers_models.Offer,
+        last_30_days_bookings: int,
+        use_offerer_address: bool | None = None,
+    ) -> dict:
+        """Serialize an offer for the search engine.
+
+        ``use_offerer_address`` may be given by callers that serialize
+        many offers, so that the feature flag is only looked up once.
+        """
+        if use_offerer_address is None:
+            use_offerer_address = FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
         venue = offer.venue
         offerer = venue.managingOfferer
         prices = {stock.price for stock in offer.bookableStocks}
@@ -499,16 +634,7 @@ class AlgoliaBackend(base.SearchBackend):
         macro_section = None
         section = (extra_data.get("rayon") or "").strip().lower()
         if section:
-            try:
-                macro_section = (
-                    offers_models.BookMacroSection.query.filter(
-                        sa.func.lower(offers_models.BookMacroSection.section) == section
-                    )
-                    .with_entities(offers_models.BookMacroSection.macroSection)
-                    .scalar()
-                ).strip()
-            except AttributeError:
-                macro_section = None
+            macro_section = book_macro_sections.get_macro_section(section)
 
         gtl = titelive_gtl.get_gtl(gtl_id) if gtl_id else None
 
@@ -519,7 +645,7 @@ class AlgoliaBackend(base.SearchBackend):
             gtl_code_3 = gtl_id[:6] + "00" * 1
             gtl_code_4 = gtl_id
 
-        offer_address = get_offer_address(offer)
+        offer_address = get_offer_address(offer, use_offerer_address=use_offerer_address)
         address = offer_address.street
         city = offer_address.city
         department_code = offer_address.departmentCode
@@ -597,7 +723,7 @@ class AlgoliaBackend(base.SearchBackend):
                 "publicName": venue.publicName,
                 "venue_type": venue.venueTypeCode.name,
             },
-            "_geoloc": position(venue, offer),
+            "_geoloc": position(venue, offer, use_offerer_address=use_offerer_address),
         }
 
         if offer.subcategory.category.id == categories.LIVRE.id and gtl:
@@ -609,11 +735,7 @@ class AlgoliaBackend(base.SearchBackend):
             categories.MUSIQUE_ENREGISTREE.id,
             categories.MUSIQUE_LIVE.id,
         ):
-            gtl_label = next(
-                (music_type.label for music_type in categories.TITELIVE_MUSIC_TYPES if music_type.gtl_id == gtl_id),
-                None,
-            )
-            object_to_index["offer"]["gtl_level1"] = gtl_label
+            object_to_index["offer"]["gtl_level1"] = TITELIVE_MUSIC_TYPE_LABEL_BY_GTL_ID.get(gtl_id)
 
         for section in ("offer", "offerer", "venue"):
             object_to_index[section] = {
@@ -803,10 +925,36 @@ class AlgoliaBackend(base.SearchBackend):
         return ids
 
 
-def position(venue: offerers_models.Venue, offer: offers_models.Offer | None = None) -> dict[str, float]:
+# Fields that change at each serialization, even if the offer has not
+# changed. They are ignored when computing the fingerprint.
+OFFER_FINGERPRINT_IGNORED_FIELDS = ("indexedAt",)
+
+
+def get_offer_fingerprint(serialized_offer: dict) -> str:
+    """Return a short hash of a serialized offer, that only changes
+    when the content that is sent to Algolia changes.
+    """
+    content = serialized_offer | {
+        "offer": {
+            key: value
+            for key, value in serialized_offer["offer"].items()
+            if key not in OFFER_FINGERPRINT_IGNORED_FIELDS
+        },
+    }
+    dump = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.blake2b(dump.encode(), digest_size=8).hexdigest()
+
+
+def position(
+    venue: offerers_models.Venue,
+    offer: offers_models.Offer | None = None,
+    use_offerer_address: bool | None = None,
+) -> dict[str, float]:
     latitude = None
     longitude = None
-    if FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active():
+    if use_offerer_address is None:
+        use_offerer_address = FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
+    if use_offerer_address:
         if offer and offer.offererAddress:
             latitude = offer.offererAddress.address.latitude
             longitude = offer.offererAddress.address.longitude
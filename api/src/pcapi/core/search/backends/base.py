@@ -42,17 +42,41 @@ class SearchBackend:
     def pop_venue_ids_for_offers_from_queue(self, count: int) -> contextlib.AbstractContextManager:
         raise NotImplementedError()
 
+    def move_offer_ids_to_processing_queue(
+        self,
+        count: int,
+        from_error_queue: bool = False,
+    ) -> tuple[str | None, set[int]]:
+        raise NotImplementedError()
+
+    def delete_offer_processing_queue(self, processing_queue: str, from_error_queue: bool = False) -> None:
+        raise NotImplementedError()
+
     def count_offers_to_index_from_queue(self, from_error_queue: bool = False) -> int:
         raise NotImplementedError()
 
     def check_offer_is_indexed(self, offer: "offers_models.Offer") -> bool:
         raise NotImplementedError()
 
+    def check_offer_ids_are_indexed(self, offer_ids: abc.Collection[int]) -> set[int]:
+        raise NotImplementedError()
+
     def index_offers(
-        self, offers: "abc.Collection[offers_models.Offer]", last_30_days_bookings: dict[int, int]
+        self,
+        offers: "abc.Collection[offers_models.Offer]",
+        last_30_days_bookings: dict[int, int],
+        force: bool = False,
     ) -> None:
         raise NotImplementedError()
 
+    def serialize_offers(
+        self, offers: "abc.Collection[offers_models.Offer]", last_30_days_bookings: dict[int, int]
+    ) -> list[dict]:
+        raise NotImplementedError()
+
+    def save_serialized_offers(self, objects: abc.Collection[dict], force: bool = False) -> None:
+        raise NotImplementedError()
+
     def index_collective_offer_templates(
         self, collective_offer_templates: "abc.Collection[educational_models.CollectiveOfferTemplate]"
     ) -> None:
@@ -21,10 +21,23 @@ logger = logging.getLogger(__name__)
 
 
 @blueprint.cli.command("index_offers_in_algolia_by_offer")
+@click.option(
+    "--workers",
+    help="Number of threads that send offers to Algolia. If set, use the pipelined indexer.",
+    type=int,
+    default=0,
+)
+@click.option("--max-batches", help="Maximum number of batches to process (0 for all)", type=int, default=100)
 @log_cron_with_transaction
-def index_offers_in_algolia_by_offer() -> None:
+def index_offers_in_algolia_by_offer(workers: int = 0, max_batches: int = 100) -> None:
     """Pop offers from indexation queue and reindex them."""
-    search.index_offers_in_queue()
+    if workers:
+        report = search.index_offers_in_queue_concurrently(max_batches_to_process=max_batches, workers=workers)
+        print(f"Reindexed {report['offers']} offers in {report['elapsed']:.1f}s")
+        for stage, stage_report in report["stages"].items():
+            print(f"  {stage}: {stage_report['count']} items in {stage_report['elapsed']:.1f}s")
+    else:
+        search.index_offers_in_queue(max_batches_to_process=max_batches)
 
 
 @blueprint.cli.command("index_offers_in_algolia_by_venue")
@@ -135,6 +148,26 @@ def partially_index_offers(
     )
 
 
+@blueprint.cli.command("reindex_all_offers")
+@click.option("--from-id", help="Only reindex offers whose id is greater than this one", type=int, default=0)
+@click.option("--to-id", help="Only reindex offers whose id is lower or equal to this one", type=int, default=None)
+@click.option("--batch-size", help="Number of offers per batch", type=int, default=1000)
+@click.option("--restart", help="Ignore the checkpoint of a previous run", is_flag=True, default=False)
+def reindex_all_offers(from_id: int, to_id: int | None, batch_size: int, restart: bool) -> None:
+    """Reindex active offers, by batches of ascending ids.
+
+    The last processed id is saved after each batch: if the command
+    is interrupted, run it again with the same range to resume. To
+    split the work between several processes, give each of them a
+    distinct range with `--from-id` and `--to-id`.
+    """
+    report = search.reindex_all_offers(from_id=from_id, to_id=to_id, batch_size=batch_size, restart=restart)
+    print(
+        f"Reindexed {report['count']} offers (last id: {report['last_id']}) in {report['elapsed']:.1f}s: "
+        f"{report['offers_per_second'] or 0:.1f} offers/s, peak RSS: {report['peak_rss_kb'] // 1024} MB"
+    )
+
+
 @blueprint.cli.command("partially_index_collective_offer_templates")
 @click.option("--clear", help="Clear search index first", type=bool, default=False)
 @click.option("--batch-size", help="Number of templates per page", type=int, default=10_000)
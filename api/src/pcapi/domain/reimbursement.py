@@ -1,13 +1,18 @@
 import datetime
 from decimal import Decimal
+import secrets
+
+from flask import current_app as app
 
 from pcapi.core.bookings.models import Booking
 from pcapi.core.categories import subcategories_v2 as subcategories
 from pcapi.core.educational.models import CollectiveBooking
+from pcapi.core.finance import conf as finance_conf
 from pcapi.core.finance import utils as finance_utils
 import pcapi.core.finance.api as finance_api
 import pcapi.core.finance.models as finance_models
 from pcapi.core.offers.models import Offer
+from pcapi.models import db
 
 
 # A new set rules are in effect as of 1 September 2021 (i.e. 31 August 22:00 UTC)
@@ -215,8 +220,10 @@ assert [r.description for r in REGULAR_RULES] == [
 
 
 class CustomRuleFinder:
-    def __init__(self) -> None:
-        self.rules = finance_models.CustomReimbursementRule.query.all()
+    def __init__(self, rules: list[finance_models.CustomReimbursementRule] | None = None) -> None:
+        if rules is None:
+            rules = finance_models.CustomReimbursementRule.query.all()
+        self.rules = rules
         self.rules_by_offer = self._partition_by_field("offerId")
         self.rules_by_venue = self._partition_by_field("venueId")
         self.rules_by_offerer = self._partition_by_field("offererId")
@@ -240,6 +247,58 @@ class CustomRuleFinder:
         return None
 
 
+# Process-wide finder, shared by all pricing runs of the process. It
+# is reloaded only when the version stamp stored in Redis changes,
+# i.e. when a custom reimbursement rule has been created or edited.
+_shared_custom_rule_finder: CustomRuleFinder | None = None
+_shared_custom_rule_finder_version: str | None = None
+
+
+def _get_custom_rules_version() -> str:
+    version = app.redis_client.get(finance_conf.REDIS_CUSTOM_REIMBURSEMENT_RULES_VERSION)
+    if version is None:
+        # The key may have been evicted (or never set): initialize it
+        # with a new value, so that any cached finder is reloaded.
+        new_version = secrets.token_hex(8)
+        app.redis_client.set(finance_conf.REDIS_CUSTOM_REIMBURSEMENT_RULES_VERSION, new_version, nx=True)
+        # Another process may have initialized it first: use its value.
+        version = app.redis_client.get(finance_conf.REDIS_CUSTOM_REIMBURSEMENT_RULES_VERSION)
+        if version is None:
+            # Evicted again in the meantime: the finder will be
+            # reloaded on the next call anyway.
+            return new_version
+    return version
+
+
+def bump_custom_rules_version() -> None:
+    """Invalidate the shared custom rule finder of all processes.
+
+    This must be called after each change of a custom reimbursement
+    rule has been committed.
+    """
+    app.redis_client.set(finance_conf.REDIS_CUSTOM_REIMBURSEMENT_RULES_VERSION, secrets.token_hex(8))
+
+
+def get_shared_custom_rule_finder() -> CustomRuleFinder:
+    """Return a process-wide finder of custom reimbursement rules,
+    reloaded from the database only if rules have changed since it
+    was built.
+    """
+    global _shared_custom_rule_finder  # pylint: disable=global-statement
+    global _shared_custom_rule_finder_version  # pylint: disable=global-statement
+
+    version = _get_custom_rules_version()
+    if _shared_custom_rule_finder is None or version != _shared_custom_rule_finder_version:
+        rules = finance_models.CustomReimbursementRule.query.all()
+        # Detach rules from the session: they would otherwise be
+        # expired (and lazily reloaded one by one) on each commit.
+        for rule in rules:
+            db.session.expunge(rule)
+        _shared_custom_rule_finder = CustomRuleFinder(rules)
+        _shared_custom_rule_finder_version = version
+    return _shared_custom_rule_finder
+
+
 def get_reimbursement_rule(
     booking: Booking | CollectiveBooking,
     custom_rule_finder: CustomRuleFinder,
@@ -34,6 +34,7 @@ ACCEPTED_FEATURES_MAPPING = {
 class AllocineStocks(LocalProvider):
     name = "Allociné"
     can_create = True
+    bulk_mode = True
 
     def __init__(self, allocine_venue_provider: providers_models.AllocineVenueProvider):
         super().__init__(allocine_venue_provider)
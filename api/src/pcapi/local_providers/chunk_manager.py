@@ -18,9 +18,9 @@ def get_object_from_current_chunks(
     return None
 
 
-def save_chunks(chunk_to_insert: dict[str, Model], chunk_to_update: dict[str, Model]) -> None:
+def save_chunks(chunk_to_insert: dict[str, Model], chunk_to_update: dict[str, Model], bulk: bool = False) -> None:
     if len(chunk_to_insert) > 0:
         insert_chunk(chunk_to_insert)
 
     if len(chunk_to_update) > 0:
-        update_chunk(chunk_to_update)
+        update_chunk(chunk_to_update, bulk=bulk)
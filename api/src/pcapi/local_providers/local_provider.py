@@ -1,9 +1,12 @@
 from abc import abstractmethod
+from collections import defaultdict
 from collections.abc import Iterator
 from datetime import datetime
 import logging
 import typing
 
+from sqlalchemy.orm import exc as sa_exc
+
 from pcapi.connectors.thumb_storage import create_thumb
 from pcapi.core import search
 import pcapi.core.finance.api as finance_api
@@ -29,6 +32,12 @@ CHUNK_MAX_SIZE = 1000
 
 
 class LocalProvider(Iterator):
+    # In bulk mode, existing objects of each item returned by the
+    # iterator are fetched with one query per model type (instead of
+    # one query per object), and updated objects are written by
+    # flushing the session (instead of a separate bulk update).
+    bulk_mode = False
+
     def __init__(self, venue_provider: providers_models.VenueProvider | None = None, **options: typing.Any) -> None:
         self.venue_provider = venue_provider
         self.updatedObjects = 0
@@ -192,11 +201,47 @@ class LocalProvider(Iterator):
 
         return query.one_or_none()
 
+    def get_existing_objects(
+        self, providable_infos: list[ProvidableInfo]
+    ) -> dict[str, offers_models.Product | offers_models.Offer | offers_models.Stock]:
+        """Return existing objects of ``providable_infos``, indexed by
+        their chunk key, with one query per model type.
+        """
+        ids_by_model_type: dict[type[offers_models.Product | offers_models.Offer | offers_models.Stock], list[str]] = (
+            defaultdict(list)
+        )
+        for providable_info in providable_infos:
+            ids_by_model_type[providable_info.type].append(providable_info.id_at_providers)
+
+        existing_objects: dict[str, offers_models.Product | offers_models.Offer | offers_models.Stock] = {}
+        for model_type, ids_at_providers in ids_by_model_type.items():
+            # See `get_existing_object()` about Offer.
+            if issubclass(model_type, offers_models.Offer):
+                column = offers_models.Offer.idAtProvider
+            else:
+                column = model_type.idAtProviders
+            query = model_type.query.filter(column.in_(ids_at_providers))
+            if model_type == offers_models.Stock:
+                query = query.with_for_update()
+            for pc_object in query:
+                key = f"{getattr(pc_object, column.key)}|{model_type.__name__}"
+                if key in existing_objects:
+                    # Same error as `get_existing_object()` (with `one_or_none()`).
+                    raise sa_exc.MultipleResultsFound(f"Multiple {model_type.__name__} found for {key}")
+                existing_objects[key] = pc_object
+        return existing_objects
+
     def get_existing_pc_obj(
-        self, providable_info: ProvidableInfo, chunk_to_insert: dict, chunk_to_update: dict
+        self,
+        providable_info: ProvidableInfo,
+        chunk_to_insert: dict,
+        chunk_to_update: dict,
+        existing_objects: dict | None = None,
     ) -> offers_models.Product | offers_models.Offer | offers_models.Stock | None:
         object_in_current_chunk = get_object_from_current_chunks(providable_info, chunk_to_insert, chunk_to_update)
         if object_in_current_chunk is None:
+            if existing_objects is not None:
+                return existing_objects.get(f"{providable_info.id_at_providers}|{providable_info.type.__name__}")
             return self.get_existing_object(providable_info.type, providable_info.id_at_providers)
 
         return object_in_current_chunk
@@ -227,9 +272,12 @@ class LocalProvider(Iterator):
                 self.checkedObjects += 1
                 continue
 
+            existing_objects = self.get_existing_objects(providable_infos) if self.bulk_mode else None
             for providable_info in providable_infos:
                 chunk_key = providable_info.id_at_providers + "|" + str(providable_info.type.__name__)
-                pc_object = self.get_existing_pc_obj(providable_info, chunk_to_insert, chunk_to_update)
+                pc_object = self.get_existing_pc_obj(
+                    providable_info, chunk_to_insert, chunk_to_update, existing_objects
+                )
                 last_update_for_current_provider = get_last_update_for_provider(self.provider.id, pc_object)
 
                 if pc_object is None:
@@ -280,7 +328,7 @@ class LocalProvider(Iterator):
                 self.checkedObjects += 1
 
                 if len(chunk_to_insert) + len(chunk_to_update) >= CHUNK_MAX_SIZE:
-                    save_chunks(chunk_to_insert, chunk_to_update)
+                    save_chunks(chunk_to_insert, chunk_to_update, bulk=self.bulk_mode)
                     _reindex_offers(
                         list(chunk_to_insert.values()) + list(chunk_to_update.values()),
                         self.venue_provider,
@@ -289,7 +337,7 @@ class LocalProvider(Iterator):
                     chunk_to_update = {}
 
         if len(chunk_to_insert) + len(chunk_to_update) > 0:
-            save_chunks(chunk_to_insert, chunk_to_update)
+            save_chunks(chunk_to_insert, chunk_to_update, bulk=self.bulk_mode)
             _reindex_offers(
                 list(chunk_to_insert.values()) + list(chunk_to_update.values()),
                 self.venue_provider,
@@ -5,6 +5,7 @@ import time
 from typing import Counter
 from typing import Generator
 
+from pcapi.core.providers.api import get_no_op_ratio
 from pcapi.core.providers.api import synchronize_stocks
 from pcapi.core.providers.models import Provider
 from pcapi.core.providers.models import StockDetail
@@ -27,6 +28,7 @@ def synchronize_venue_provider(venue_provider: VenueProvider) -> None:
     provider_api = provider.getProviderAPI()
 
     stats: Counter = Counter()
+    stock_count = 0
     for raw_stocks in _get_stocks_by_batch(
         venue_provider.venueIdAtOfferProvider, provider_api, venue_provider.lastSyncDate
     ):
@@ -35,6 +37,7 @@ def synchronize_venue_provider(venue_provider: VenueProvider) -> None:
         )
         operations = synchronize_stocks(stock_details, venue, provider_id=provider.id)
         stats += Counter(operations)
+        stock_count += len(stock_details)
 
     venue_provider.lastSyncDate = start_sync_date
     repository.save(venue_provider)
@@ -46,6 +49,8 @@ def synchronize_venue_provider(venue_provider: VenueProvider) -> None:
             "venue": venue.id,
             "provider": provider.name,
             "duration": time.perf_counter() - start,
+            "stocks": stock_count,
+            "no_op_ratio": get_no_op_ratio(stats, stock_count),
             **stats,
         },
     )
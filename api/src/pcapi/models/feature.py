@@ -1,8 +1,11 @@
 import enum
 import logging
+import os
+import time
 
 from alembic import op
 import flask
+import redis
 from sqlalchemy import Column
 from sqlalchemy import String
 from sqlalchemy import Text
@@ -23,6 +26,90 @@ class DisabledFeatureError(Exception):
     pass
 
 
+# Redis channel where a message is published whenever a feature flag is
+# toggled, so that processes can refresh their cache of feature flags.
+REDIS_FEATURES_CHANGED_CHANNEL = "features:changed"
+# Process caches check for messages at most once per this number of seconds.
+FEATURES_CHANGED_POLL_INTERVAL = 1
+
+
+class FeatureCache:
+    """Process-local snapshot of the status of all feature flags.
+
+    The snapshot is reloaded every `FEATURE_FLAGS_CACHE_REFRESH_INTERVAL`
+    seconds, or as soon as a change is notified on the
+    `REDIS_FEATURES_CHANGED_CHANNEL` channel. Otherwise, checking a
+    feature flag is a dictionary lookup.
+    """
+
+    def __init__(self) -> None:
+        # Number of database queries that have been saved by the cache.
+        self.saved_reads = 0
+        self._features: dict[str, bool] = {}
+        self._loaded_at = 0.0
+        self._polled_at = 0.0
+        self._pid: int | None = None
+        self._pubsub: redis.client.PubSub | None = None
+
+    def is_active(self, name: str) -> bool:
+        now = time.monotonic()
+        is_outdated = now - self._loaded_at >= settings.FEATURE_FLAGS_CACHE_REFRESH_INTERVAL
+        if self._pid != os.getpid() or is_outdated or self._has_changed(now):
+            self._load(now)
+        else:
+            self.saved_reads += 1
+        return self._features[name]
+
+    def _load(self, now: float) -> None:
+        if self._pid != os.getpid():
+            # The process has been forked (e.g. by the RQ worker): do not
+            # share the Redis connection of the parent process.
+            self._pid = os.getpid()
+            self._pubsub = None
+        if self._pubsub is None:
+            self._subscribe()
+        self._features = {f.name: f.isActive for f in db.session.query(Feature.name, Feature.isActive)}
+        self._loaded_at = self._polled_at = now
+        if self.saved_reads:
+            logger.info("Reloaded feature flags in process cache", extra={"saved_reads": self.saved_reads})
+
+    def _subscribe(self) -> None:
+        if not flask.has_app_context():
+            return
+        try:
+            pubsub = flask.current_app.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REDIS_FEATURES_CHANGED_CHANNEL)
+        except redis.exceptions.RedisError:
+            logger.exception("Could not subscribe to feature flag changes")
+            return
+        self._pubsub = pubsub
+
+    def _has_changed(self, now: float) -> bool:
+        if self._pubsub is None or now - self._polled_at < FEATURES_CHANGED_POLL_INTERVAL:
+            return False
+        self._polled_at = now
+        changed = False
+        try:
+            # Do not wait: only read messages that have already been received.
+            while self._pubsub.get_message(timeout=0) is not None:
+                changed = True
+        except redis.exceptions.RedisError:
+            logger.exception("Could not check feature flag changes")
+            # Rely on the refresh interval, and subscribe again on next load.
+            self._pubsub = None
+        return changed
+
+
+feature_cache = FeatureCache()
+
+
+def notify_features_changed() -> None:
+    try:
+        flask.current_app.redis_client.publish(REDIS_FEATURES_CHANGED_CHANNEL, "")
+    except redis.exceptions.RedisError:
+        logger.exception("Could not notify feature flag changes")
+
+
 class FeatureToggle(enum.Enum):
     ALGOLIA_BOOKINGS_NUMBER_COMPUTATION = (
         "Active le calcul du nombre des réservations lors de l'indexation des offres sur Algolia"
@@ -143,6 +230,27 @@ class FeatureToggle(enum.Enum):
     WIP_ENABLE_CLICKHOUSE_IN_BO = "Utiliser Clickhouse pour les statistiques des acteurs culturels dans le BO"
     WIP_HEADLINE_OFFER = "Activer l'offre à la une"
     WIP_IS_OPEN_TO_PUBLIC = "Activer l'utilisation du critère 'ouvert au public' pour les synchro"
+    WIP_USE_PRICING_POINT_REVENUE_LEDGER = (
+        "Utiliser le chiffre d'affaires annuel pré-calculé des points de valorisation lors de la valorisation"
+    )
+    WIP_USE_OFFER_DAILY_BOOKING_COUNTS = (
+        "Utiliser le nombre de réservations quotidien pré-calculé des offres lors de l'indexation"
+    )
+    WIP_REFRESH_CINEMA_STOCKS_IN_BACKGROUND = (
+        "Mettre à jour les places restantes des séances de cinéma en tâche de fond, et non à l'affichage de l'offre"
+    )
+    WIP_ASYNC_BOOKING_SIDE_EFFECTS = (
+        "Envoyer les emails et mettre à jour les services externes en tâche de fond après une réservation"
+    )
+    WIP_TWO_PHASE_EXTERNAL_BOOKINGS = (
+        "Ne pas verrouiller le stock pendant l'appel au fournisseur lors d'une réservation avec billetterie externe"
+    )
+    WIP_INCREMENTAL_STOCK_SYNCHRONIZATION = (
+        "Ne mettre à jour que les stocks modifiés lors des synchronisations de stocks de livres"
+    )
+    WIP_UNACCENTED_OFFER_NAME_SEARCH = (
+        "Rechercher les offres du portail pro par nom sans tenir compte des accents, et les trier par pertinence"
+    )
 
     def is_active(self) -> bool:
         if flask.has_request_context():
@@ -153,6 +261,8 @@ class FeatureToggle(enum.Enum):
                     {f.name: f.isActive for f in db.session.query(Feature.name, Feature.isActive)},
                 )
             return flask.request._cached_features[self.name]  # type: ignore[attr-defined]
+        if settings.FEATURE_FLAGS_CACHE_REFRESH_INTERVAL:
+            return feature_cache.is_active(self.name)
         return Feature.query.filter_by(name=self.name).one().isActive
 
     def __bool__(self) -> bool:
@@ -200,6 +310,7 @@ FEATURES_DISABLED_BY_DEFAULT: tuple[FeatureToggle, ...] = (
     FeatureToggle.LOG_EMS_CINEMAS_AVAILABLE_FOR_SYNC,
     FeatureToggle.SYNCHRONIZE_TITELIVE_API_MUSIC_PRODUCTS,
     FeatureToggle.WIP_ENABLE_ALGOLIA_SEARCH_IN_BO,
+    FeatureToggle.WIP_ASYNC_BOOKING_SIDE_EFFECTS,
     FeatureToggle.WIP_BENEFICIARY_EXTRACT_TOOL,
     FeatureToggle.WIP_DISABLE_CANCEL_BOOKING_NOTIFICATION,
     FeatureToggle.WIP_DISABLE_NOTIFY_USERS_BOOKINGS_NOT_RETRIEVED,
@@ -217,11 +328,17 @@ FEATURES_DISABLED_BY_DEFAULT: tuple[FeatureToggle, ...] = (
     FeatureToggle.WIP_ENABLE_PRO_ONBOARDING,
     FeatureToggle.WIP_ENABLE_REMINDER_MARKETING_MAIL_METADATA_DISPLAY,
     FeatureToggle.WIP_HEADLINE_OFFER,
+    FeatureToggle.WIP_INCREMENTAL_STOCK_SYNCHRONIZATION,
     FeatureToggle.WIP_IS_OPEN_TO_PUBLIC,
     FeatureToggle.WIP_OFFERER_STATS_V2,
+    FeatureToggle.WIP_REFRESH_CINEMA_STOCKS_IN_BACKGROUND,
     FeatureToggle.WIP_SUGGESTED_SUBCATEGORIES,
+    FeatureToggle.WIP_TWO_PHASE_EXTERNAL_BOOKINGS,
     FeatureToggle.WIP_UBBLE_V2,
+    FeatureToggle.WIP_UNACCENTED_OFFER_NAME_SEARCH,
+    FeatureToggle.WIP_USE_OFFER_DAILY_BOOKING_COUNTS,
     FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE,
+    FeatureToggle.WIP_USE_PRICING_POINT_REVENUE_LEDGER,
     # Please keep alphabetic order
 )
 
@@ -48,6 +48,7 @@ tables_to_clean: list[flask_sqlalchemy.Model] = [
     finance_models.PricingLine,
     finance_models.PricingLog,
     finance_models.Pricing,
+    finance_models.PricingPointRevenue,
     finance_models.InvoiceLine,
     finance_models.Invoice,
     finance_models.FinanceEvent,
@@ -75,6 +76,7 @@ tables_to_clean: list[flask_sqlalchemy.Model] = [
     criteria_models.Criterion,
     educational_models.CollectiveOffer,
     educational_models.CollectiveOfferTemplate,
+    offers_models.OfferDailyBookingCount,
     offers_models.Offer,
     offers_models.PriceCategory,
     offers_models.PriceCategoryLabel,
@@ -11,10 +11,26 @@ def insert_chunk(chunk_to_insert: dict[str, Model]) -> None:
     db.session.commit()
 
 
-def update_chunk(chunk_to_update: dict[str, Model]) -> None:
+_MODELS_BY_NAME: dict[str, type[Model]] = {}
+
+
+def _get_models_by_name() -> dict[str, type[Model]]:
     # Access `Model.registry` here, not at module-scope,
     # because it may not be populated yet if this module is imported too early.
-    MODELS = {mapper.class_.__name__: mapper.class_ for mapper in Base.registry.mappers}
+    if not _MODELS_BY_NAME:
+        _MODELS_BY_NAME.update({mapper.class_.__name__: mapper.class_ for mapper in Base.registry.mappers})
+    return _MODELS_BY_NAME
+
+
+def update_chunk(chunk_to_update: dict[str, Model], bulk: bool = False) -> None:
+    if bulk:
+        # Objects of the chunk have been loaded (and modified) in the
+        # session: flushing the session writes their changes, without
+        # having to copy them in dictionaries.
+        db.session.commit()
+        return
+
+    MODELS = _get_models_by_name()
 
     models_in_chunk: set[str] = set(_extract_model_name_from_chunk_key(key) for key in chunk_to_update.keys())
 
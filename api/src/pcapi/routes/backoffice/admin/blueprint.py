@@ -18,6 +18,7 @@ from pcapi.models import db
 from pcapi.models import feature as feature_models
 from pcapi.notifications.internal.transactional import change_feature_flip as change_feature_flip_internal_message
 from pcapi.repository import atomic
+from pcapi.repository import on_commit
 
 from . import forms
 from .. import blueprint
@@ -159,6 +160,7 @@ def toggle_feature_flag(feature_flag_id: int, set_to_active: bool) -> utils.Back
     db.session.add(feature_flag)
     db.session.flush()
     change_feature_flip_internal_message.send(feature=feature_flag, current_user=current_user)
+    on_commit(feature_models.notify_features_changed)
 
     flash(
         f"Le feature flag {feature_flag.name} a été " + ("activé" if feature_flag.isActive else "désactivé"), "success"
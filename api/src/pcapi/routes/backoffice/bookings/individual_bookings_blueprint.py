@@ -1,6 +1,5 @@
 from collections import defaultdict
 import datetime
-from io import BytesIO
 import logging
 import re
 import typing
@@ -215,13 +214,12 @@ def get_individual_booking_csv_download() -> utils.BackofficeResponse:
     if not form.validate():
         raise BadRequest()
 
-    export_data = booking_repository.get_export(
+    bookings_query = booking_repository.get_export_query(
         user=current_user,
         booking_period=typing.cast(tuple[datetime.date, datetime.date], form.from_to_date.data),
         venue_id=form.venue.data,
-        export_type=bookings_models.BookingExportType.CSV,
     )
-    buffer = BytesIO(typing.cast(str, export_data).encode("utf-8-sig"))
+    buffer = booking_repository.get_export_file(bookings_query, bookings_models.BookingExportType.CSV)
     return send_file(buffer, as_attachment=True, download_name="reservations_pass_culture.csv", mimetype="text/csv")
 
 
@@ -232,13 +230,12 @@ def get_individual_booking_xlsx_download() -> utils.BackofficeResponse:
     if not form.validate():
         raise BadRequest()
 
-    export_data = booking_repository.get_export(
+    bookings_query = booking_repository.get_export_query(
         user=current_user,
         booking_period=typing.cast(tuple[datetime.date, datetime.date], form.from_to_date.data),
         venue_id=form.venue.data,
-        export_type=bookings_models.BookingExportType.EXCEL,
     )
-    buffer = BytesIO(typing.cast(bytes, export_data))
+    buffer = booking_repository.get_export_file(bookings_query, bookings_models.BookingExportType.EXCEL)
     return send_file(
         buffer,
         as_attachment=True,
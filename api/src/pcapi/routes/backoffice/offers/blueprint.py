@@ -2,7 +2,6 @@ from collections import namedtuple
 import datetime
 import decimal
 import functools
-from io import BytesIO
 import logging
 import re
 import typing
@@ -1345,12 +1344,11 @@ def edit_offer_venue(offer_id: int) -> utils.BackofficeResponse:
 @list_offers_blueprint.route("/<int:offer_id>/bookings.csv", methods=["GET"])
 @atomic()
 def download_bookings_csv(offer_id: int) -> utils.BackofficeResponse:
-    export_data = booking_repository.get_export(
+    bookings_query = booking_repository.get_export_query(
         user=current_user,
         offer_id=offer_id,
-        export_type=bookings_models.BookingExportType.CSV,
     )
-    buffer = BytesIO(typing.cast(str, export_data).encode("utf-8-sig"))
+    buffer = booking_repository.get_export_file(bookings_query, bookings_models.BookingExportType.CSV)
     return send_file(
         buffer,
         as_attachment=True,
@@ -1362,12 +1360,11 @@ def download_bookings_csv(offer_id: int) -> utils.BackofficeResponse:
 @list_offers_blueprint.route("/<int:offer_id>/bookings.xlsx", methods=["GET"])
 @atomic()
 def download_bookings_xlsx(offer_id: int) -> utils.BackofficeResponse:
-    export_data = booking_repository.get_export(
+    bookings_query = booking_repository.get_export_query(
         user=current_user,
         offer_id=offer_id,
-        export_type=bookings_models.BookingExportType.EXCEL,
     )
-    buffer = BytesIO(typing.cast(bytes, export_data))
+    buffer = booking_repository.get_export_file(bookings_query, bookings_models.BookingExportType.EXCEL)
     return send_file(
         buffer,
         as_attachment=True,
@@ -3,8 +3,10 @@ import logging
 from pcapi import settings
 from pcapi.core.educational.utils import create_adage_jwt_fake_valid_token
 from pcapi.models import db
+from pcapi.models import feature as feature_models
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.feature import Feature
+from pcapi.repository import on_commit
 from pcapi.routes.adage_iframe import blueprint
 from pcapi.routes.apis import public_api
 from pcapi.routes.serialization import BaseModel
@@ -24,6 +26,7 @@ def set_features(body: serializers.FeaturesToggleRequest) -> None:
     for feature in body.features:
         Feature.query.filter_by(name=feature.name).update({"isActive": feature.isActive})
         db.session.commit()
+    on_commit(feature_models.notify_features_changed)
 
 
 class AdageFakeToken(BaseModel):
@@ -4,6 +4,7 @@ from pcapi.core.categories import subcategories_v2
 import pcapi.core.mails.transactional as transactional_mails
 from pcapi.core.offerers.models import Venue
 from pcapi.core.offers import api
+from pcapi.core.offers import cinema_stocks
 from pcapi.core.offers import repository
 from pcapi.core.offers.exceptions import OfferReportError
 from pcapi.core.offers.models import Offer
@@ -13,6 +14,7 @@ from pcapi.core.offers.models import Stock
 from pcapi.core.users.models import User
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.api_errors import ResourceNotFoundError
+from pcapi.models.feature import FeatureToggle
 from pcapi.models.offer_mixin import OfferValidationStatus
 from pcapi.repository import atomic
 from pcapi.routes.native.security import authenticated_and_active_user_required
@@ -35,7 +37,7 @@ def get_offer(offer_id: str) -> serializers.OfferResponse:
     offer = query.first_or_404()
 
     if offer.isActive:
-        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+        _update_cinema_stock_quantity(offer)
 
     return serializers.OfferResponse.from_orm(offer)
 
@@ -48,11 +50,21 @@ def get_offer_v2(offer_id: int) -> serializers.OfferResponseV2:
     offer = query.first_or_404()
 
     if offer.isActive:
-        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+        _update_cinema_stock_quantity(offer)
 
     return serializers.OfferResponseV2.from_orm(offer)
 
 
+def _update_cinema_stock_quantity(offer: Offer) -> None:
+    if offer.subcategoryId != subcategories_v2.SEANCE_CINE.id:
+        return
+    if FeatureToggle.WIP_REFRESH_CINEMA_STOCKS_IN_BACKGROUND.is_active():
+        # Stocks are refreshed by the `refresh_cinema_stocks` cron task.
+        cinema_stocks.record_offer_view(offer)
+    else:
+        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+
+
 @blueprint.native_route("/offers/stocks", methods=["POST"])
 @spectree_serialize(deprecated=True, response_model=serializers.OffersStocksResponse, api=blueprint.api)
 def get_offers_showtimes(body: serializers.OffersStocksRequest) -> serializers.OffersStocksResponse:
@@ -20,7 +20,7 @@ from pcapi.core.offers.models import Offer
 from pcapi.core.offers.models import Reason
 from pcapi.core.offers.models import ReasonMeta
 from pcapi.core.providers import constants as provider_constants
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl
 from pcapi.core.users.models import ExpenseDomain
 from pcapi.domain.movie_types import get_movie_label
 from pcapi.domain.music_types import MUSIC_SUB_TYPES_LABEL_BY_CODE
@@ -207,9 +207,9 @@ class OfferImageResponse(BaseModel):
 
 
 def get_gtl_labels(gtl_id: str) -> GtlLabels | None:
-    if gtl_id not in GTLS:
+    gtl_infos = get_gtl(gtl_id)
+    if gtl_infos is None:
         return None
-    gtl_infos = GTLS[gtl_id]
     label = gtl_infos.get("label")
     if label:
         return GtlLabels(
@@ -1,9 +1,13 @@
+import codecs
 from datetime import date
 import math
-from typing import cast
+import tempfile
+import typing
 
+import flask
 from flask_login import current_user
 from flask_login import login_required
+from flask_sqlalchemy import BaseQuery
 
 from pcapi.core.bookings import models as bookings_models
 from pcapi.core.bookings.models import BookingExportType
@@ -81,26 +85,19 @@ def get_user_has_bookings() -> UserHasBookingResponse:
     },
     api=blueprint.pro_private_schema,
 )
-def export_bookings_for_offer_as_csv(offer_id: int, query: BookingsExportQueryModel) -> bytes:
+def export_bookings_for_offer_as_csv(offer_id: int, query: BookingsExportQueryModel) -> flask.Response:
     user = current_user._get_current_object()
     offer = Offer.query.get(int(offer_id))
 
     if not users_repository.has_access(user, offer.venue.managingOffererId):
         raise api_errors.ForbiddenError({"global": "You are not allowed to access this offer"})
 
-    if query.status == BookingsExportStatusFilter.VALIDATED:
-        return cast(
-            str,
-            booking_repository.export_validated_bookings_by_offer_id(
-                offer_id, event_beginning_date=query.event_date, export_type=BookingExportType.CSV
-            ),
-        ).encode("utf-8-sig")
-    return cast(
-        str,
-        booking_repository.export_bookings_by_offer_id(
-            offer_id, event_beginning_date=query.event_date, export_type=BookingExportType.CSV
-        ),
-    ).encode("utf-8-sig")
+    bookings_query = booking_repository.get_offer_export_query(
+        offer_id,
+        event_beginning_date=query.event_date,
+        validated_only=query.status == BookingsExportStatusFilter.VALIDATED,
+    )
+    return _make_csv_response(booking_repository.stream_offer_export_as_csv(bookings_query))
 
 
 @blueprint.pro_private_api.route("/bookings/offer/<int:offer_id>/excel", methods=["GET"])
@@ -113,26 +110,19 @@ def export_bookings_for_offer_as_csv(offer_id: int, query: BookingsExportQueryMo
     },
     api=blueprint.pro_private_schema,
 )
-def export_bookings_for_offer_as_excel(offer_id: int, query: BookingsExportQueryModel) -> bytes:
+def export_bookings_for_offer_as_excel(offer_id: int, query: BookingsExportQueryModel) -> flask.Response:
     user = current_user._get_current_object()
     offer = Offer.query.get(int(offer_id))
 
     if not users_repository.has_access(user, offer.venue.managingOffererId):
         raise api_errors.ForbiddenError({"global": "You are not allowed to access this offer"})
 
-    if query.status == BookingsExportStatusFilter.VALIDATED:
-        return cast(
-            bytes,
-            booking_repository.export_validated_bookings_by_offer_id(
-                offer_id, event_beginning_date=query.event_date, export_type=BookingExportType.EXCEL
-            ),
-        )
-    return cast(
-        bytes,
-        booking_repository.export_bookings_by_offer_id(
-            offer_id, event_beginning_date=query.event_date, export_type=BookingExportType.EXCEL
-        ),
+    bookings_query = booking_repository.get_offer_export_query(
+        offer_id,
+        event_beginning_date=query.event_date,
+        validated_only=query.status == BookingsExportStatusFilter.VALIDATED,
     )
+    return _make_excel_response(booking_repository.write_offer_export_as_excel, bookings_query)
 
 
 @blueprint.pro_private_api.route("/bookings/csv", methods=["GET"])
@@ -145,7 +135,7 @@ def export_bookings_for_offer_as_excel(offer_id: int, query: BookingsExportQuery
     },
     api=blueprint.pro_private_schema,
 )
-def get_bookings_csv(query: ListBookingsQueryModel) -> bytes:
+def get_bookings_csv(query: ListBookingsQueryModel) -> flask.Response:
     return _create_booking_export_file(query, BookingExportType.CSV)
 
 
@@ -159,7 +149,7 @@ def get_bookings_csv(query: ListBookingsQueryModel) -> bytes:
     },
     api=blueprint.pro_private_schema,
 )
-def get_bookings_excel(query: ListBookingsQueryModel) -> bytes:
+def get_bookings_excel(query: ListBookingsQueryModel) -> flask.Response:
     return _create_booking_export_file(query, BookingExportType.EXCEL)
 
 
@@ -214,7 +204,7 @@ def get_offer_price_categories_and_schedules_by_dates(offer_id: int) -> EventDat
     )
 
 
-def _create_booking_export_file(query: ListBookingsQueryModel, export_type: BookingExportType) -> bytes:
+def _create_booking_export_file(query: ListBookingsQueryModel, export_type: BookingExportType) -> flask.Response:
     venue_id = query.venue_id
     event_date = query.event_date
     booking_period = None
@@ -225,15 +215,37 @@ def _create_booking_export_file(query: ListBookingsQueryModel, export_type: Book
         )
     booking_status = query.booking_status_filter
 
-    export_data = booking_repository.get_export(
+    bookings_query = booking_repository.get_export_query(
         user=current_user._get_current_object(),  # for tests to succeed, because current_user is actually a LocalProxy
         booking_period=booking_period,
         status_filter=booking_status,
         event_date=event_date,
         venue_id=venue_id,
-        export_type=export_type,
     )
 
     if export_type == BookingExportType.CSV:
-        return cast(str, export_data).encode("utf-8-sig")
-    return cast(bytes, export_data)
+        return _make_csv_response(booking_repository.stream_export_as_csv(bookings_query))
+    return _make_excel_response(booking_repository.write_export_as_excel, bookings_query)
+
+
+def _make_csv_response(chunks: typing.Iterator[str]) -> flask.Response:
+    """Stream the CSV export, so that it is never fully held in memory."""
+
+    def generate() -> typing.Iterator[bytes]:
+        yield codecs.BOM_UTF8
+        for chunk in chunks:
+            yield chunk.encode("utf-8")
+
+    return flask.Response(flask.stream_with_context(generate()), mimetype="text/csv")
+
+
+def _make_excel_response(
+    write_export: typing.Callable[[BaseQuery, typing.BinaryIO], None], bookings_query: BaseQuery
+) -> flask.Response:
+    """Write the Excel export to a temporary file (that is deleted once
+    sent), so that it is never fully held in memory.
+    """
+    output = tempfile.TemporaryFile()
+    write_export(bookings_query, output)
+    output.seek(0)
+    return flask.send_file(output, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
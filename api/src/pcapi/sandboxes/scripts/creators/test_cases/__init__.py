@@ -16,7 +16,7 @@ from pcapi.core.offers import api as offers_api
 from pcapi.core.offers import factories as offers_factories
 from pcapi.core.offers.models import TiteliveImageType
 from pcapi.core.providers import factories as providers_factories
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
 from pcapi.core.reactions.factories import ReactionFactory
 from pcapi.core.reactions.models import ReactionTypeEnum
 from pcapi.core.users import factories as users_factories
@@ -106,7 +106,7 @@ def create_offers_with_gtls() -> None:
 def create_offers_for_each_gtl_level_1(size_per_gtl_level_1: int, venue: offerers_models.Venue) -> None:
     for gtl_id_prefix in range(1, 14):
         gtl_id_prefix_str = str(gtl_id_prefix).zfill(2)
-        gtl_ids = [gtl_id for gtl_id in GTLS if gtl_id.startswith(gtl_id_prefix_str)]
+        gtl_ids = [gtl_id for gtl_id in get_gtl_ids() if gtl_id.startswith(gtl_id_prefix_str)]
 
         for _ in range(size_per_gtl_level_1):
             gtl_id = random.choice(gtl_ids)
@@ -119,6 +119,12 @@ def cancel_unstored_external_bookings() -> None:
     bookings_api.cancel_unstored_external_bookings()
 
 
+@blueprint.cli.command("release_stale_reserved_external_bookings")
+@log_cron_with_transaction
+def release_stale_reserved_external_bookings() -> None:
+    bookings_api.release_stale_reserved_external_bookings()
+
+
 @blueprint.cli.command("cancel_ems_external_bookings")
 @log_cron_with_transaction
 @cron_require_feature(FeatureToggle.EMS_CANCEL_PENDING_EXTERNAL_BOOKING)
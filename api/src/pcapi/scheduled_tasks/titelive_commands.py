@@ -25,13 +25,13 @@ blueprint = Blueprint(__name__, __name__)
 )
 @click.option(
     "--from-page",
-    help="page to sync from, defaults to 1",
+    help="page to sync from, defaults to the page after the last saved page of an interrupted sync, or 1",
     type=int,
-    default=1,
+    default=None,
 )
 @log_cron_with_transaction
 @cron_require_feature(FeatureToggle.SYNCHRONIZE_TITELIVE_API_MUSIC_PRODUCTS)
-def synchronize_titelive_music_products(from_date: datetime.datetime | None, from_page: int) -> None:
+def synchronize_titelive_music_products(from_date: datetime.datetime | None, from_page: int | None) -> None:
     TiteliveMusicSearch().synchronize_products(from_date.date() if from_date else None, from_page)
 
 
@@ -44,11 +44,11 @@ def synchronize_titelive_music_products(from_date: datetime.datetime | None, fro
 )
 @click.option(
     "--from-page",
-    help="page to sync from, defaults to 1",
+    help="page to sync from, defaults to the page after the last saved page of an interrupted sync, or 1",
     type=int,
-    default=1,
+    default=None,
 )
 @log_cron_with_transaction
 @cron_require_feature(FeatureToggle.SYNCHRONIZE_TITELIVE_PRODUCTS)
-def synchronize_titelive_book_products(from_date: datetime.datetime | None, from_page: int) -> None:
+def synchronize_titelive_book_products(from_date: datetime.datetime | None, from_page: int | None) -> None:
     TiteliveBookSearch().synchronize_products(from_date.date() if from_date else None, from_page)
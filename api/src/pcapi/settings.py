@@ -104,6 +104,13 @@ REDIS_VENUE_IDS_FOR_OFFERS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_FOR_
 REDIS_VENUE_IDS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_CHUNK_SIZE", 1000))
 
 
+# FEATURE FLAGS
+# Outside of requests (workers, cron tasks and other commands), feature
+# flags are cached by each process for this number of seconds. The cache
+# is disabled if 0.
+FEATURE_FLAGS_CACHE_REFRESH_INTERVAL = int(os.environ.get("FEATURE_FLAGS_CACHE_REFRESH_INTERVAL", 0))
+
+
 # SENTRY
 ENABLE_SENTRY = bool(int(os.environ.get("ENABLE_SENTRY", 0)))
 SENTRY_DSN = secrets_utils.get("SENTRY_DSN", "")
@@ -169,6 +176,8 @@ ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE = int(
     os.environ.get("ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE", 10000)
 )
 ALGOLIA_OFFERS_INDEX_MAX_SIZE = int(os.environ.get("ALGOLIA_OFFERS_INDEX_MAX_SIZE", -1))
+# Do not send offers whose content has not changed since they were last indexed.
+ALGOLIA_SKIP_UNCHANGED_OFFERS = bool(int(os.environ.get("ALGOLIA_SKIP_UNCHANGED_OFFERS", 1)))
 
 ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE = int(os.environ.get("ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE", 10000))
 ALGOLIA_LAST_30_DAYS_BOOKINGS_RANGE_THRESHOLDS = utils.env_get_list(
@@ -30,3 +30,49 @@ def pop_from_queue(queue_name: str) -> dict | None:
         logger.exception("Could not pop element from queue", extra={"queue": queue_name})
         return None
     return json.loads(item) if item else None
+
+
+def move_many_to_processing_queue(queue_name: str, processing_queue_name: str, count: int) -> list[str]:
+    """Move at most ``count`` items from the head of ``queue_name`` to
+    ``processing_queue_name``, and return them as JSON strings.
+
+    Items must be removed from the processing queue with
+    ``remove_from_processing_queue()`` once processed. Items of a
+    consumer that dies before are moved back by ``requeue_processing_queue()``.
+    """
+    redis_client = current_app.redis_client
+    try:
+        # Each LMOVE is atomic: an item is always in one of the queues.
+        pipeline = redis_client.pipeline(transaction=False)
+        for _ in range(count):
+            pipeline.lmove(queue_name, processing_queue_name, "LEFT", "RIGHT")
+        items = pipeline.execute()
+    except redis.exceptions.RedisError:
+        logger.exception("Could not move elements to processing queue", extra={"queue": queue_name})
+        return []
+    return [item for item in items if item is not None]
+
+
+def remove_from_processing_queue(processing_queue_name: str, items: list[str]) -> None:
+    redis_client = current_app.redis_client
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        for item in items:
+            pipeline.lrem(processing_queue_name, 1, item)
+        pipeline.execute()
+    except redis.exceptions.RedisError:
+        logger.exception("Could not remove elements from processing queue", extra={"queue": processing_queue_name})
+
+
+def requeue_processing_queue(processing_queue_name: str, queue_name: str) -> int:
+    """Move all items of ``processing_queue_name`` back to the head of
+    ``queue_name``, in their original order, and return their number.
+    """
+    redis_client = current_app.redis_client
+    count = 0
+    try:
+        while redis_client.lmove(processing_queue_name, queue_name, "RIGHT", "LEFT") is not None:
+            count += 1
+    except redis.exceptions.RedisError:
+        logger.exception("Could not requeue elements of processing queue", extra={"queue": processing_queue_name})
+    return count
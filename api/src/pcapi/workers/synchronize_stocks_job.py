@@ -37,6 +37,7 @@ def synchronize_stocks_job(serialized_stock_details: list[dict], venue_id: int)
         extra={
             "venue": venue_id,
             "stocks": len(stock_details),
+            "no_op_ratio": api.get_no_op_ratio(operations, len(stock_details)),
             **operations,
         },
     )
@@ -1,9 +1,13 @@
+from concurrent import futures
 import dataclasses
 from datetime import datetime
 from datetime import timedelta
 import json
 import logging
+import os
 import re
+import threading
+import time
 from unittest import mock
 from unittest.mock import patch
 
@@ -16,6 +20,7 @@ from pcapi.connectors.ems import EMSAPIException
 from pcapi.connectors.ems import EMSBookingConnector
 from pcapi.core import search
 from pcapi.core.bookings import api
+from pcapi.core.bookings import constants as bookings_constants
 from pcapi.core.bookings import exceptions
 from pcapi.core.bookings import factories as bookings_factories
 from pcapi.core.bookings import models
@@ -40,6 +45,7 @@ import pcapi.core.finance.models as finance_models
 import pcapi.core.mails.testing as mails_testing
 from pcapi.core.mails.transactional.sendinblue_template_ids import TransactionalEmail
 from pcapi.core.offerers import factories as offerers_factories
+from pcapi.core.offers import repository as offers_repository
 import pcapi.core.offers.factories as offers_factories
 import pcapi.core.offers.models as offers_models
 import pcapi.core.providers.factories as providers_factories
@@ -49,6 +55,7 @@ from pcapi.core.testing import assert_num_queries
 from pcapi.core.testing import override_features
 from pcapi.core.users.constants import SuspensionReason
 import pcapi.core.users.factories as users_factories
+from pcapi.core.users.models import User
 from pcapi.models import db
 from pcapi.models import feature
 import pcapi.notifications.push.testing as push_testing
@@ -145,6 +152,266 @@ class BookOfferConcurrencyTest:
         assert models.Booking.query.filter(models.Booking.status == BookingStatus.CANCELLED).count() == 1
 
 
+def _create_stock_linked_to_ticketing_service():
+    provider = providers_factories.ProviderFactory(
+        bookingExternalUrl="https://api.example.com/book",
+        cancelExternalUrl="https://api.example.com/cancel",
+    )
+    return offers_factories.EventStockFactory(
+        offer__lastProvider=provider,
+        offer__withdrawalType=offers_models.WithdrawalTypeEnum.IN_APP,
+        idAtProviders="",
+        quantity=100,
+        dnBookedQuantity=10,
+    )
+
+
+@pytest.mark.usefixtures("clean_database")
+class TwoPhaseExternalBookingTest:
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_stock_and_user_are_not_locked_while_booking_external_ticket(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+        engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+
+        def book_event_ticket(booking, stock, beneficiary, provider, venue_provider):
+            # `NOWAIT` raises if rows are locked by the booking transaction.
+            with engine.connect() as connection:
+                row = connection.execute(
+                    text("""SELECT "dnBookedQuantity" FROM stock WHERE id = :stock_id FOR UPDATE NOWAIT"""),
+                    {"stock_id": stock_id},
+                ).one()
+                connection.execute(
+                    text("""SELECT id FROM "user" WHERE id = :user_id FOR UPDATE NOWAIT"""),
+                    {"user_id": beneficiary.id},
+                )
+            assert row.dnBookedQuantity == 11  # reserved
+            return [Ticket(barcode="1234567890123", seat_number="A1")], 5
+
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=book_event_ticket):
+            booking = api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        assert booking.status == BookingStatus.CONFIRMED
+        assert [external_booking.barcode for external_booking in booking.externalBookings] == ["1234567890123"]
+        stock = offers_models.Stock.query.get(stock_id)
+        assert stock.dnBookedQuantity == 11
+        assert stock.quantity == 16  # dnBookedQuantity + remaining quantity
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_release_reserved_quantity_if_provider_fails(self):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+
+        with patch(
+            "pcapi.core.bookings.api.external_bookings_api.book_event_ticket",
+            side_effect=external_bookings_exceptions.ExternalBookingSoldOutError(),
+        ):
+            with pytest.raises(external_bookings_exceptions.ExternalBookingSoldOutError):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        assert models.Booking.query.count() == 0
+        stock = offers_models.Stock.query.get(stock_id)
+        assert stock.dnBookedQuantity == 10
+        assert stock.quantity == 10  # sold out
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_release_reserved_quantity_if_confirmation_fails(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+
+        with (
+            patch(
+                "pcapi.core.bookings.api.external_bookings_api.book_event_ticket",
+                return_value=([Ticket(barcode="1234567890123", seat_number="A1")], 5),
+            ),
+            patch(
+                "pcapi.core.bookings.api._confirm_booking", side_effect=sqlalchemy.exc.OperationalError("", {}, None)
+            ),
+        ):
+            with pytest.raises(sqlalchemy.exc.OperationalError):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        assert models.Booking.query.count() == 0
+        assert models.ExternalBooking.query.count() == 0
+        assert offers_models.Stock.query.get(stock_id).dnBookedQuantity == 10
+        assert not app.redis_client.zcard(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME)
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_release_stale_reservation(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+
+        # The process is killed during the call to the provider.
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=SystemExit):
+            with pytest.raises(SystemExit):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+        db.session.rollback()
+        booking = models.Booking.query.one()
+        assert offers_models.Stock.query.get(stock_id).dnBookedQuantity == 11
+
+        api.release_stale_reserved_external_bookings()
+
+        # The reservation is too recent to be released.
+        assert models.Booking.query.count() == 1
+
+        app.redis_client.zadd(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, {str(booking.id): 0})
+        api.release_stale_reserved_external_bookings()
+
+        assert models.Booking.query.count() == 0
+        assert offers_models.Stock.query.get(stock_id).dnBookedQuantity == 10
+        assert not app.redis_client.zcard(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME)
+
+    def _cancel_during_provider_call(self, app, booking_id):
+        # Cancelled by another request, while the provider is called.
+        def cancel():
+            with app.app_context():
+                booking = models.Booking.query.get(booking_id)
+                assert api._cancel_booking(booking, BookingCancellationReasons.BENEFICIARY)
+
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(cancel).result()
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_do_not_confirm_reservation_cancelled_during_provider_call(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+
+        def book_event_ticket(booking, stock, beneficiary, provider, venue_provider):
+            self._cancel_during_provider_call(app, booking.id)
+            return [Ticket(barcode="1234567890123", seat_number="A1")], 5
+
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=book_event_ticket):
+            with pytest.raises(external_bookings_exceptions.ExternalBookingException):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        booking = models.Booking.query.one()
+        assert booking.status == BookingStatus.CANCELLED
+        assert models.ExternalBooking.query.count() == 0
+        assert finance_models.FinanceEvent.query.count() == 0
+        stock = offers_models.Stock.query.get(stock_id)
+        assert stock.dnBookedQuantity == 10
+        assert stock.quantity == 100
+        assert not app.redis_client.zcard(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME)
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_do_not_release_reservation_twice_if_cancelled_during_provider_call(self, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+
+        def book_event_ticket(booking, stock, beneficiary, provider, venue_provider):
+            self._cancel_during_provider_call(app, booking.id)
+            raise external_bookings_exceptions.ExternalBookingException()
+
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=book_event_ticket):
+            with pytest.raises(external_bookings_exceptions.ExternalBookingException):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        booking = models.Booking.query.one()
+        assert booking.status == BookingStatus.CANCELLED
+        assert offers_models.Stock.query.get(stock_id).dnBookedQuantity == 10
+        assert not app.redis_client.zcard(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME)
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_do_not_count_other_reservations_in_stock_quantity(self, app):
+        stock = _create_stock_linked_to_ticketing_service()
+        stock_id = stock.id
+        pending_beneficiary, beneficiary = users_factories.BeneficiaryGrant18Factory.create_batch(2)
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=SystemExit):
+            with pytest.raises(SystemExit):
+                api.book_offer(beneficiary=pending_beneficiary, stock_id=stock_id, quantity=1)
+        db.session.rollback()
+        pending_booking_id = models.Booking.query.one().id
+
+        with patch(
+            "pcapi.core.bookings.api.external_bookings_api.book_event_ticket",
+            return_value=([Ticket(barcode="1234567890123", seat_number="A1")], 5),
+        ):
+            api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        stock = offers_models.Stock.query.get(stock_id)
+        assert stock.dnBookedQuantity == 12
+        assert stock.quantity == 16  # dnBookedQuantity - other reservation + remaining quantity
+        assert app.redis_client.zrange(bookings_constants.REDIS_RESERVED_EXTERNAL_BOOKINGS_NAME, 0, -1) == [
+            str(pending_booking_id)
+        ]
+
+    @override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True)
+    def test_concurrent_bookings_call_provider_at_the_same_time(self, app):
+        n_bookings = 3
+        stock_id = _create_stock_linked_to_ticketing_service().id
+        user_ids = [user.id for user in users_factories.BeneficiaryGrant18Factory.create_batch(n_bookings)]
+        # Each provider call waits for all others to have started, which
+        # would time out if bookings were serialized by the stock lock.
+        barrier = threading.Barrier(n_bookings, timeout=10)
+
+        def book_event_ticket(booking, stock, beneficiary, provider, venue_provider):
+            barrier.wait()
+            return [Ticket(barcode=booking.token, seat_number=None)], None
+
+        def book(user_id):
+            with app.app_context():
+                beneficiary = User.query.get(user_id)
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=book_event_ticket):
+            with futures.ThreadPoolExecutor(max_workers=n_bookings) as executor:
+                for future in [executor.submit(book, user_id) for user_id in user_ids]:
+                    future.result()
+
+        assert models.Booking.query.filter_by(stockId=stock_id).count() == n_bookings
+        assert offers_models.Stock.query.get(stock_id).dnBookedQuantity == 10 + n_bookings
+
+    # Wall-clock measurement, too flaky to be asserted on: run it with
+    # `BENCHMARK_EXTERNAL_BOOKINGS=1 pytest -s -k throughput`.
+    @pytest.mark.skipif(not os.environ.get("BENCHMARK_EXTERNAL_BOOKINGS"), reason="opt-in benchmark")
+    def test_throughput_on_hot_stock_with_slow_provider(self, app):
+        """Print bookings/sec of concurrent bookings of a single stock,
+        when the provider takes `delay` seconds to answer.
+
+        Bookings locking the stock are serialized: `n_bookings * delay`
+        must stay below the lock timeout of the database connection.
+        """
+        n_bookings = int(os.environ.get("BENCHMARK_EXTERNAL_BOOKINGS_COUNT", 10))
+        delay = float(os.environ.get("BENCHMARK_EXTERNAL_BOOKINGS_DELAY", 0.3))
+
+        def book_event_ticket(booking, stock, beneficiary, provider, venue_provider):
+            time.sleep(delay)
+            return [Ticket(barcode=booking.token, seat_number=None)], None
+
+        def book(user_id, stock_id):
+            with app.app_context():
+                beneficiary = User.query.get(user_id)
+                api.book_offer(beneficiary=beneficiary, stock_id=stock_id, quantity=1)
+
+        def measure_bookings_per_second():
+            stock_id = _create_stock_linked_to_ticketing_service().id
+            user_ids = [user.id for user in users_factories.BeneficiaryGrant18Factory.create_batch(n_bookings)]
+            start = time.perf_counter()
+            with futures.ThreadPoolExecutor(max_workers=n_bookings) as executor:
+                for future in [executor.submit(book, user_id, stock_id) for user_id in user_ids]:
+                    future.result()
+            duration = time.perf_counter() - start
+            assert models.Booking.query.filter_by(stockId=stock_id).count() == n_bookings
+            return n_bookings / duration
+
+        with patch("pcapi.core.bookings.api.external_bookings_api.book_event_ticket", side_effect=book_event_ticket):
+            locked_rate = measure_bookings_per_second()
+            with override_features(WIP_TWO_PHASE_EXTERNAL_BOOKINGS=True):
+                two_phase_rate = measure_bookings_per_second()
+
+        print(
+            f"\n{n_bookings} concurrent bookings of one stock, provider answering in {delay}s:"
+            f"\n  stock locked during the provider call: {locked_rate:.2f} bookings/sec"
+            f"\n  two-phase booking: {two_phase_rate:.2f} bookings/sec"
+        )
+
+
 @pytest.mark.usefixtures("db_session")
 class BookOfferTest:
     @mock.patch("pcapi.core.search.async_index_offer_ids")
@@ -183,6 +450,10 @@ class BookOfferTest:
         assert booking.cancellationLimitDate is None
         assert booking.priceCategoryLabel is None
         assert stock.dnBookedQuantity == 7
+        offers_repository.apply_pending_offer_daily_booking_counts()
+        assert offers_repository.get_offers_booking_count_from_daily_counts([stock.offerId], days=30) == {
+            stock.offerId: 1
+        }
 
         mocked_async_index_offer_ids.assert_called_once_with(
             [stock.offer.id],
@@ -1873,26 +2144,40 @@ class AutoMarkAsUsedAfterEventTest:
         educational_factories.CollectiveBookingFactory(collectiveStock__beginningDatetime=event_date)
 
         queries = 1  # select feature flag
+        queries += 1  # update individual bookings
         queries += 1  # select individual bookings
-        # fmt: off
-        queries += 2 * (
-            1  # fetch pricing point
-            + 1  # insert finance event
-        )
-        # fmt: on
-        queries += 1  # update all individual bookings
+        queries += 1  # select pricing point links
+        queries += 1  # insert finance events
+        queries += 1  # update individual bookings (none left)
+        queries += 1  # update collective bookings
         queries += 1  # select collective bookings
-        # fmt: off
-        queries += 2 * (
-            1  # fetch pricing point
-            + 1  # insert finance event
-        )
-        # fmt: on
-        queries += 1  # update all collective bookings
+        queries += 1  # select pricing point links
+        queries += 1  # insert finance events
+        queries += 1  # update collective bookings (none left)
 
         with assert_num_queries(queries):
             api.auto_mark_as_used_after_event()
 
+    def test_update_by_chunks(self):
+        event_date = datetime.utcnow() - timedelta(days=3)
+        bookings = bookings_factories.BookingFactory.create_batch(3, stock__beginningDatetime=event_date)
+        offerers_factories.VenuePricingPointLinkFactory(
+            venue=bookings[0].venue,
+            pricingPoint=bookings[0].venue,
+            timespan=[event_date - timedelta(days=1), None],
+        )
+
+        api.auto_mark_as_used_after_event(chunk_size=2)
+
+        assert {booking.status for booking in Booking.query} == {BookingStatus.USED}
+        events = finance_models.FinanceEvent.query.order_by(finance_models.FinanceEvent.bookingId).all()
+        assert [event.bookingId for event in events] == sorted(booking.id for booking in bookings)
+        assert events[0].status == finance_models.FinanceEventStatus.READY
+        assert events[0].pricingPointId == bookings[0].venueId
+        assert events[0].pricingOrderingDate == events[0].valueDate
+        assert events[1].status == finance_models.FinanceEventStatus.PENDING
+        assert events[1].pricingPointId is None
+
     def test_does_not_update_when_event_date_is_only_1_day_before(self):
         event_date = datetime.utcnow() - timedelta(days=1)
         bookings_factories.BookingFactory(stock__beginningDatetime=event_date)
@@ -5,6 +5,7 @@ from datetime import time
 from datetime import timedelta
 from io import BytesIO
 from io import StringIO
+from unittest import mock
 
 from dateutil import tz
 import openpyxl
@@ -5287,6 +5288,40 @@ class GetCsvReportTest:
             assert sorted([line[pos_cm] for line in data]) == ["annulé", "confirmé", "remboursé", "validé"]
 
 
+class StreamExportTest:
+    def _create_bookings(self):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.OffererFactory()
+        offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
+        stock = offers_factories.ThingStockFactory(offer__venue__managingOfferer=offerer)
+        bookings_factories.BookingFactory.create_batch(2, stock=stock)
+        bookings_factories.BookingFactory(stock=stock, quantity=2)
+        return pro
+
+    @mock.patch("pcapi.core.bookings.constants.EXPORT_BATCH_SIZE", 1)
+    def test_stream_csv_by_chunks(self):
+        pro = self._create_bookings()
+        query = booking_repository.get_export_query(user=pro, status_filter=None)
+
+        chunks = list(booking_repository.stream_export_as_csv(query))
+
+        # header and first booking, 3 other rows (duo booking is duplicated), last empty chunk
+        assert len(chunks) == 5
+        assert "".join(chunks) == booking_repository.get_export(user=pro, status_filter=None)
+
+    def test_get_export_file(self):
+        pro = self._create_bookings()
+        query = booking_repository.get_export_query(user=pro, status_filter=None)
+
+        with booking_repository.get_export_file(query, BookingExportType.CSV) as export_file:
+            content = export_file.read().decode("utf-8-sig")
+        assert content == booking_repository.get_export(user=pro, status_filter=None)
+
+        with booking_repository.get_export_file(query, BookingExportType.EXCEL) as export_file:
+            worksheet = openpyxl.load_workbook(export_file).active
+        assert worksheet.max_row == 1 + 4
+
+
 class GetExcelReportTest:
     @override_features(WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE=False)
     def test_should_return_excel_export_according_to_booking_attributes(self):
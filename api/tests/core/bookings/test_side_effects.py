@@ -0,0 +1,115 @@
+import dataclasses
+from unittest import mock
+
+import pytest
+
+from pcapi.core import search
+from pcapi.core.bookings import api
+from pcapi.core.bookings import constants
+from pcapi.core.bookings import factories as bookings_factories
+from pcapi.core.bookings import side_effects
+import pcapi.core.mails.testing as mails_testing
+from pcapi.core.mails.transactional.sendinblue_template_ids import TransactionalEmail
+import pcapi.core.offers.factories as offers_factories
+from pcapi.core.testing import override_features
+import pcapi.core.users.factories as users_factories
+import pcapi.notifications.push.testing as push_testing
+from pcapi.utils import queue
+
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+
+class AsyncBookingSideEffectsTest:
+    @override_features(WIP_ASYNC_BOOKING_SIDE_EFFECTS=True)
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_book_offer_queues_side_effects(self, mocked_async_index_offer_ids, app):
+        beneficiary = users_factories.BeneficiaryGrant18Factory()
+        stock = offers_factories.StockFactory(offer__bookingEmail="offerer@example.com")
+
+        booking = api.book_offer(beneficiary=beneficiary, stock_id=stock.id, quantity=1)
+
+        assert not mails_testing.outbox
+        assert not push_testing.requests
+        mocked_async_index_offer_ids.assert_not_called()
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE) == 1
+
+        assert side_effects.process_queued_side_effects() == 1
+
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE) == 0
+        assert [email["template"] for email in mails_testing.outbox] == [
+            dataclasses.asdict(TransactionalEmail.FIRST_VENUE_BOOKING_TO_PRO.value),
+            dataclasses.asdict(TransactionalEmail.BOOKING_CONFIRMATION_BY_BENEFICIARY.value),
+        ]
+        assert len(push_testing.requests) == 3  # event + user attributes (iOS and Android)
+        mocked_async_index_offer_ids.assert_called_once_with(
+            [booking.stock.offerId],
+            reason=search.IndexationReason.BOOKING_CREATION,
+        )
+
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_process_by_batches(self, mocked_async_index_offer_ids, app):
+        user = users_factories.BeneficiaryGrant18Factory()
+        stock = offers_factories.StockFactory(offer__bookingEmail="offerer@example.com")
+        bookings = bookings_factories.BookingFactory.create_batch(2, user=user, stock=stock)
+        bookings.append(bookings_factories.BookingFactory(stock__offer__bookingEmail="offerer@example.com"))
+        cancelled_booking = bookings_factories.CancelledBookingFactory(user=user, stock=stock)
+        for booking in bookings + [cancelled_booking]:
+            queue.add_to_queue(
+                constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE,
+                {"booking_id": booking.id, "first_venue_booking": False},
+            )
+
+        assert side_effects.process_queued_side_effects(batch_size=10) == 4
+
+        # No email nor event for the cancelled booking
+        assert len(mails_testing.outbox) == 2 * 3
+        # 3 events, and a single update of the attributes of each user
+        assert len(push_testing.requests) == 3 + 2 * 2
+        mocked_async_index_offer_ids.assert_called_once_with(
+            sorted({stock.offerId, bookings[2].stock.offerId}),
+            reason=search.IndexationReason.BOOKING_CREATION,
+        )
+
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_log_error_of_a_booking_and_process_others(self, mocked_async_index_offer_ids, app):
+        bookings = bookings_factories.BookingFactory.create_batch(2, stock__offer__bookingEmail="offerer@example.com")
+        for booking in bookings:
+            queue.add_to_queue(
+                constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE,
+                {"booking_id": booking.id, "first_venue_booking": False},
+            )
+
+        with mock.patch(
+            "pcapi.core.bookings.side_effects.track_offer_booked_event",
+            side_effect=[Exception("Batch is down"), None],
+        ):
+            assert side_effects.process_queued_side_effects() == 2
+
+        assert len(mails_testing.outbox) == 2  # emails of the second booking
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE) == 0
+
+    def test_retry_failed_batch_on_next_run(self, app):
+        booking = bookings_factories.BookingFactory(stock__offer__bookingEmail="offerer@example.com")
+        queue.add_to_queue(
+            constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE,
+            {"booking_id": booking.id, "first_venue_booking": False},
+        )
+
+        with mock.patch("pcapi.core.search.async_index_offer_ids", side_effect=Exception("Redis is down")):
+            assert side_effects.process_queued_side_effects() == 0
+
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_QUEUE) == 0
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE) == 1
+        assert len(mails_testing.outbox) == 2
+        assert len(push_testing.requests) == 1  # event
+
+        with mock.patch("pcapi.core.search.async_index_offer_ids") as mocked_async_index_offer_ids:
+            assert side_effects.process_queued_side_effects() == 1
+
+        mocked_async_index_offer_ids.assert_called_once()
+        # Emails and event are not sent twice, user attributes are updated.
+        assert len(mails_testing.outbox) == 2
+        assert len(push_testing.requests) == 1 + 2
+        assert app.redis_client.llen(constants.REDIS_BOOKING_SIDE_EFFECTS_PROCESSING_QUEUE) == 0
+        assert not app.redis_client.scard(constants.REDIS_BOOKING_SIDE_EFFECTS_NOTIFIED_BOOKINGS)
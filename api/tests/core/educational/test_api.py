@@ -385,6 +385,35 @@ class GetCulturalPartnersTest:
         }
 
 
+class AutocompleteEducationalRedactorForUaiTest:
+    def test_search_names_and_emails(self) -> None:
+        redactors = educational_api_adage.autocomplete_educational_redactor_for_uai("0470009E", "hen")
+        assert [redactor["nom"] for redactor in redactors] == ["POINTCARE", "HENMAR"]
+
+        redactors = educational_api_adage.autocomplete_educational_redactor_for_uai("0470009E", "Mariá Sklo")
+        assert [redactor["nom"] for redactor in redactors] == ["SKLODOWSKA"]
+
+        redactors = educational_api_adage.autocomplete_educational_redactor_for_uai("0470009E", "raymar")
+        assert redactors == []
+
+        redactors = educational_api_adage.autocomplete_educational_redactor_for_uai(
+            "0470009E", "raymar", use_email=True
+        )
+        assert [redactor["nom"] for redactor in redactors] == ["HENMAR"]
+
+    def test_directory_is_rebuilt_when_cache_is_refreshed(self) -> None:
+        directory = educational_api_adage.get_educational_redactor_directory("0470009E")
+        assert educational_api_adage.get_educational_redactor_directory("0470009E") is directory
+
+        current_app.redis_client.set(
+            "api:adage_educational_redactor_for_uai:0470009E",
+            json.dumps([{"civilite": "Mme.", "nom": "CURIE", "prenom": "MARIE", "mail": "marie.curie@example.com"}]),
+        )
+        new_directory = educational_api_adage.get_educational_redactor_directory("0470009E")
+        assert new_directory is not directory
+        assert [redactor["nom"] for redactor in new_directory.search("curie")] == ["CURIE"]
+
+
 @pytest.mark.usefixtures("db_session")
 class EACPendingBookingWithConfirmationLimitDate3DaysTest:
     @time_machine.travel("2022-11-26 18:29")
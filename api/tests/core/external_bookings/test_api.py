@@ -11,6 +11,7 @@ from pcapi.core.external_bookings.api import EXTERNAL_BOOKINGS_TIMEOUT_IN_SECOND
 from pcapi.core.external_bookings.api import _get_external_bookings_client_api
 from pcapi.core.external_bookings.api import book_event_ticket
 from pcapi.core.external_bookings.api import cancel_event_ticket
+from pcapi.core.external_bookings.api import disable_external_bookings
 from pcapi.core.external_bookings.api import get_active_cinema_venue_provider
 from pcapi.core.external_bookings.api import send_booking_notification_to_external_service
 from pcapi.core.external_bookings.cds.client import CineDigitalServiceAPI
@@ -23,6 +24,7 @@ import pcapi.core.providers.factories as providers_factories
 from pcapi.core.providers.repository import get_provider_by_local_class
 from pcapi.core.testing import override_features
 import pcapi.core.users.factories as user_factories
+from pcapi.models.feature import FeatureToggle
 from pcapi.tasks.serialization.external_api_booking_notification_tasks import BookingAction
 
 
@@ -689,3 +691,14 @@ class SendBookingNotificationToExternalServiceTest:
         # Notification Url
         notificationUrl = mocked_task.call_args.args[0].notificationUrl
         assert notificationUrl == "https://myvenue.com/notif"
+
+
+@pytest.mark.usefixtures("db_session")
+class DisableExternalBookingsTest:
+    @patch("pcapi.models.feature.notify_features_changed")
+    def test_disable_external_bookings(self, mocked_notify_features_changed):
+        disable_external_bookings()
+
+        assert FeatureToggle.DISABLE_CDS_EXTERNAL_BOOKINGS.is_active()
+        assert FeatureToggle.DISABLE_EMS_EXTERNAL_BOOKINGS.is_active()
+        mocked_notify_features_changed.assert_called_once_with()
@@ -0,0 +1,108 @@
+import json
+from unittest import mock
+
+import pytest
+
+from pcapi.core.external_bookings import models as external_bookings_models
+
+
+KEY_TEMPLATE = "api:cinema_provider:test:stocks:%s:%s"
+KEY = "api:cinema_provider:test:stocks:cinema_id:film_id"
+
+
+class FakeExternalBookingClientAPI(external_bookings_models.ExternalBookingsClientAPI):
+    def __init__(self, cinema_id: str, connector, request_timeout: int | None = None) -> None:
+        super().__init__(cinema_id, request_timeout=request_timeout)
+        self.connector = connector
+
+    @external_bookings_models.cache_external_call(key_template=KEY_TEMPLATE, expire=60)
+    def get_film_showtimes_stocks(self, film_id):
+        return json.dumps(self.connector.make_request(film_id))
+
+    @external_bookings_models.cache_external_call(key_template=KEY_TEMPLATE)
+    def get_movies(self, film_id):
+        return json.dumps(self.connector.make_request(film_id))
+
+
+class CacheExternalCallTest:
+    def test_cache_result(self, app):
+        connector = mock.Mock()
+        connector.make_request.return_value = {"1": 10}
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+
+        assert client.get_film_showtimes_stocks("film_id") == {"1": 10}
+        assert client.get_film_showtimes_stocks("film_id") == {"1": 10}
+
+        assert connector.make_request.call_count == 1
+        assert app.redis_client.ttl(KEY) == 60
+        assert app.redis_client.ttl(f"{KEY}:stale") == 60 + external_bookings_models.STALE_CACHE_TIMEOUT
+        assert not app.redis_client.exists(f"{KEY}:lock")
+
+    def test_serve_stale_result_when_provider_fails(self, app):
+        connector = mock.Mock()
+        connector.make_request.side_effect = [{"1": 10}, Exception("Provider is down")]
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+        client.get_film_showtimes_stocks("film_id")
+        app.redis_client.delete(KEY)  # expire fresh result
+
+        assert client.get_film_showtimes_stocks("film_id") == {"1": 10}
+        assert connector.make_request.call_count == 2
+        assert not app.redis_client.exists(f"{KEY}:lock")
+
+    def test_raise_when_provider_fails_without_stale_result(self, app):
+        connector = mock.Mock()
+        connector.make_request.side_effect = Exception("Provider is down")
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+
+        with pytest.raises(Exception, match="Provider is down"):
+            client.get_film_showtimes_stocks("film_id")
+        assert not app.redis_client.exists(f"{KEY}:lock")
+
+    def test_serve_stale_result_while_another_request_refreshes_it(self, app):
+        connector = mock.Mock()
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+        app.redis_client.set(f"{KEY}:stale", json.dumps({"1": 5}))
+        app.redis_client.set(f"{KEY}:lock", "other-request")
+
+        assert client.get_film_showtimes_stocks("film_id") == {"1": 5}
+        connector.make_request.assert_not_called()
+
+    def test_wait_for_result_of_another_request(self, app):
+        connector = mock.Mock()
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+        app.redis_client.set(f"{KEY}:lock", "other-request")
+
+        def other_request_has_finished(_interval):
+            app.redis_client.set(KEY, json.dumps({"1": 3}))
+
+        with mock.patch("time.sleep", side_effect=other_request_has_finished):
+            assert client.get_film_showtimes_stocks("film_id") == {"1": 3}
+        connector.make_request.assert_not_called()
+
+    def test_wait_for_another_request_at_most_for_request_timeout(self, app):
+        connector = mock.Mock()
+        connector.make_request.return_value = {"1": 10}
+        client = FakeExternalBookingClientAPI("cinema_id", connector, request_timeout=2)
+        app.redis_client.set(f"{KEY}:lock", "other-request")
+        clock = [0.0]
+
+        def sleep(interval):
+            clock[0] += interval
+
+        with mock.patch("pcapi.core.external_bookings.models.time") as time_mock:
+            time_mock.monotonic.side_effect = lambda: clock[0]
+            time_mock.sleep.side_effect = sleep
+            assert client.get_film_showtimes_stocks("film_id") == {"1": 10}
+
+        assert 2 < clock[0] < 2 + 2 * external_bookings_models.CACHE_LOCK_POLL_INTERVAL
+        assert connector.make_request.call_count == 1
+
+    def test_do_not_keep_stale_result_without_expiration(self, app):
+        connector = mock.Mock()
+        connector.make_request.return_value = {"1": 10}
+        client = FakeExternalBookingClientAPI("cinema_id", connector)
+
+        assert client.get_movies("film_id") == {"1": 10}
+
+        assert app.redis_client.ttl(KEY) == -1
+        assert not app.redis_client.exists(f"{KEY}:stale")
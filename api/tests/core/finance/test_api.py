@@ -991,8 +991,10 @@ class PriceEventTest:
         queries += 1  # fetch event again with multiple joinedload
         queries += 1  # select existing Pricing (if any)
         queries += 1  # select dependent pricings
+        queries += 1  # Get feature
         queries += 1  # calculate revenue
         queries += 1  # select all CustomReimbursementRule
+        queries += 1  # update PricingPointRevenue
         queries += 1  # update status of FinanceEvent
         queries += 1  # insert 1 Pricing
         queries += 1  # insert 2 PricingLine
@@ -1057,7 +1059,7 @@ class PriceEventsTest:
         assert event1.status == models.FinanceEventStatus.PRICED
         assert event2.status == models.FinanceEventStatus.PRICED
 
-    @mock.patch("pcapi.core.finance.api.price_event", lambda booking: None)
+    @mock.patch("pcapi.core.finance.api.price_event", lambda event, rule_finder: None)
     def test_num_queries(self):
         factories.UsedBookingFinanceEventFactory(
             booking__dateUsed=self.few_minutes_ago,
@@ -1071,9 +1073,168 @@ class PriceEventsTest:
         n_queries = 0
         n_queries += 1  # count of events to price
         n_queries += 1  # select events
+        n_queries += 1  # select custom reimbursement rules (once per process)
         with assert_num_queries(n_queries):
             api.price_events(min_date=self.few_minutes_ago)
 
+        # Rules are not reloaded on the next run if they have not changed.
+        n_queries -= 1
+        with assert_num_queries(n_queries):
+            api.price_events(min_date=self.few_minutes_ago)
+
+    def test_shard(self):
+        event1 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__offer__venue__pricing_point="self",
+        )
+        event2 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__offer__venue__pricing_point="self",
+        )
+        count = event2.pricingPointId - event1.pricingPointId + 1
+        shard = (event1.pricingPointId % count, count)
+
+        report = api.price_events(min_date=self.few_minutes_ago, shard=shard)
+
+        assert report.priced_events == 1
+        assert not report.errored_pricing_point_ids
+        assert event1.status == models.FinanceEventStatus.PRICED
+        assert event2.status == models.FinanceEventStatus.READY
+
+    def _make_events_of_two_pricing_points(self):
+        pricing_point = offerers_factories.VenueFactory(pricing_point="self")
+        user = users_factories.RichBeneficiaryFactory()
+        events = [
+            factories.UsedBookingFinanceEventFactory(
+                booking__dateUsed=self.few_minutes_ago + datetime.timedelta(seconds=i),
+                booking__stock__price=price,
+                booking__user=user,
+                booking__stock__offer__venue=pricing_point,
+            )
+            for i, price in enumerate((19_990, 20, 100))
+        ]
+        events.append(
+            factories.UsedBookingFinanceEventFactory(
+                booking__dateUsed=self.few_minutes_ago,
+                booking__stock__offer__venue__pricing_point="self",
+            )
+        )
+        return events
+
+    def test_group_by_pricing_point(self):
+        events = self._make_events_of_two_pricing_points()
+
+        api.price_events(min_date=self.few_minutes_ago, group_by_pricing_point=True)
+
+        pricings = [models.Pricing.query.filter_by(event=event).one() for event in events]
+        assert all(event.status == models.FinanceEventStatus.PRICED for event in events)
+        assert [pricing.revenue for pricing in pricings[:3]] == [19_990_00, 20_010_00, 20_110_00]
+        assert [pricing.amount for pricing in pricings[:3]] == [-19_990_00, -19_00, -95_00]
+        assert [pricing.standardRule for pricing in pricings[:3]] == [
+            "Remboursement total pour les offres physiques",
+            "Remboursement à 95% entre 20 000 € et 40 000 € par lieu (>= 2021-09-01)",
+            "Remboursement à 95% entre 20 000 € et 40 000 € par lieu (>= 2021-09-01)",
+        ]
+        assert all(len(pricing.lines) == 2 for pricing in pricings)
+        assert sum(line.amount for line in pricings[1].lines) == pricings[1].amount
+
+    def test_group_by_pricing_point_gives_same_pricings(self):
+        def _get_pricings(events):
+            return [
+                (
+                    pricing.revenue,
+                    pricing.amount,
+                    pricing.standardRule,
+                    sorted((line.category.value, line.amount) for line in pricing.lines),
+                )
+                for pricing in (
+                    models.Pricing.query.filter(
+                        models.Pricing.event == event,
+                        models.Pricing.status != models.PricingStatus.CANCELLED,
+                    ).one()
+                    for event in events
+                )
+            ]
+
+        events = self._make_events_of_two_pricing_points()
+        api.price_events(min_date=self.few_minutes_ago)
+        expected = _get_pricings(events)
+
+        for event in events:
+            api.force_event_repricing(event, models.PricingLogReason.CHANGE_AMOUNT)
+        db.session.commit()
+        api.price_events(min_date=self.few_minutes_ago, group_by_pricing_point=True)
+
+        assert _get_pricings(events) == expected
+
+
+class RevenueLedgerTest:
+    def _price_booking(self, venue, price, user=None):
+        booking_kwargs = {}
+        if user:
+            booking_kwargs["user"] = user
+        booking = bookings_factories.UsedBookingFactory(stock__offer__venue=venue, stock__price=price, **booking_kwargs)
+        event = factories.UsedBookingFinanceEventFactory(booking=booking)
+        api.price_event(event)
+        return event
+
+    def _get_ledger_revenue(self, venue):
+        year = api._get_revenue_year(datetime.datetime.utcnow())
+        ledger = models.PricingPointRevenue.query.filter_by(pricingPoint=venue, year=year).one_or_none()
+        return ledger.revenue if ledger else 0
+
+    def test_updated_on_pricing_and_cancellation(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        self._price_booking(venue, 10)
+        event2 = self._price_booking(venue, 20)
+        collective_event = factories.UsedCollectiveBookingFinanceEventFactory(
+            collectiveBooking__collectiveStock__collectiveOffer__venue=venue,
+        )
+        api.price_event(collective_event)
+        assert self._get_ledger_revenue(venue) == 30_00
+
+        # Cancel the latest pricing: earlier pricings are left untouched.
+        api.cancel_latest_event(event2.booking)
+        db.session.commit()
+        assert self._get_ledger_revenue(venue) == 10_00
+        assert api.check_revenue_ledger() == []
+
+    def test_updated_on_dependent_pricings_deletion(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        event1 = self._price_booking(venue, 10)
+        self._price_booking(venue, 20)
+        assert self._get_ledger_revenue(venue) == 30_00
+
+        # Cancelling the first pricing deletes the second one.
+        api.force_event_repricing(event1, models.PricingLogReason.CHANGE_AMOUNT)
+        db.session.commit()
+        assert self._get_ledger_revenue(venue) == 0
+        assert api.check_revenue_ledger() == []
+
+    @pytest.mark.features(WIP_USE_PRICING_POINT_REVENUE_LEDGER=True)
+    def test_used_for_pricing(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        self._price_booking(venue, 19_990, user=users_factories.RichBeneficiaryFactory())
+        event = self._price_booking(venue, 20)
+        pricing = models.Pricing.query.filter_by(event=event).one()
+        assert pricing.revenue == 20_010_00
+        assert pricing.standardRule == "Remboursement à 95% entre 20 000 € et 40 000 € par lieu (>= 2021-09-01)"
+
+    def test_check_and_fix(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        self._price_booking(venue, 10)
+        ledger = models.PricingPointRevenue.query.one()
+        ledger.revenue = 1
+        db.session.commit()
+
+        year = api._get_revenue_year(datetime.datetime.utcnow())
+        expected = [{"pricing_point": venue.id, "year": year, "expected_revenue": 10_00, "actual_revenue": 1}]
+        assert api.check_revenue_ledger() == expected
+        assert api.check_revenue_ledger(fix=True) == expected
+        db.session.refresh(ledger)
+        assert ledger.revenue == 10_00
+        assert api.check_revenue_ledger() == []
+
 
 class AddEventTest:
     def test_used(self):
@@ -1184,6 +1345,64 @@ class AddEventTest:
         assert event.pricingOrderingDate == validation_date
 
 
+class AddEventsBulkTest:
+    def test_used(self):
+        motive = models.FinanceEventMotive.BOOKING_USED
+        pricing_point = offerers_factories.VenueFactory()
+        booking = bookings_factories.UsedBookingFactory(stock__offer__venue__pricing_point=pricing_point)
+        collective_booking = educational_factories.UsedCollectiveBookingFactory(
+            collectiveStock__collectiveOffer__venue__pricing_point=pricing_point,
+        )
+        booking_without_pricing_point = bookings_factories.UsedBookingFactory()
+        bookings = [booking, collective_booking, booking_without_pricing_point]
+        # Factories commit, which expires all objects. Load bookings and
+        # their stock, except the stock of the first booking.
+        for loaded_booking in (booking, booking_without_pricing_point):
+            assert loaded_booking.stock
+        assert collective_booking.collectiveStock
+        db.session.expire(booking, ["stock"])
+
+        queries = 1  # select pricing point links
+        queries += 1  # select stock of expired booking
+        queries += 1  # insert events
+        with assert_num_queries(queries):
+            assert api.add_events_bulk(motive, bookings) == 3
+
+        event1, event2, event3 = models.FinanceEvent.query.order_by(models.FinanceEvent.id).all()
+        assert event1.booking == booking
+        assert event1.status == models.FinanceEventStatus.READY
+        assert event1.motive == motive
+        assert event1.valueDate == booking.dateUsed
+        assert event1.venue == booking.venue
+        assert event1.pricingPoint == pricing_point
+        assert event1.pricingOrderingDate == booking.dateUsed
+        assert event2.collectiveBooking == collective_booking
+        assert event2.status == models.FinanceEventStatus.READY
+        assert event2.pricingPoint == pricing_point
+        assert event2.pricingOrderingDate == collective_booking.collectiveStock.endDatetime
+        assert event3.booking == booking_without_pricing_point
+        assert event3.status == models.FinanceEventStatus.PENDING
+        assert event3.pricingPoint is None
+        assert event3.pricingOrderingDate is None
+
+    def test_cancelled_after_use(self):
+        motive = models.FinanceEventMotive.BOOKING_CANCELLED_AFTER_USE
+        booking = bookings_factories.CancelledBookingFactory()
+
+        api.add_events_bulk(motive, [booking])
+
+        event = models.FinanceEvent.query.one()
+        assert event.booking == booking
+        assert event.status == models.FinanceEventStatus.NOT_TO_BE_PRICED
+        assert event.valueDate == booking.cancellationDate
+
+    def test_incident_motive(self):
+        booking = bookings_factories.UsedBookingFactory()
+
+        with pytest.raises(ValueError):
+            api.add_events_bulk(models.FinanceEventMotive.INCIDENT_NEW_PRICE, [booking])
+
+
 class CancelLatestEventTest:
     def test_with_booking_used(self):
         event = factories.UsedBookingFinanceEventFactory(
@@ -3220,9 +3439,11 @@ class GenerateInvoicesTest:
 
 
 class GenerateInvoiceTest:
+    # Feature flags have already been fetched (and cached on the
+    # request) when pricing events, hence no query to select
+    # WIP_ENABLE_NEW_FINANCE_WORKFLOW.
     EXPECTED_NUM_QUERIES = (
-        1  # select feature flag WIP_ENABLE_NEW_FINANCE_WORKFLOW
-        + 1  # lock reimbursement point
+        1  # lock reimbursement point
         + 1  # select cashflows, pricings, pricing_lines, and custom_reimbursement_rules
         + 1  # select and lock ReferenceScheme
         + 1  # update ReferenceScheme
@@ -1856,9 +1856,11 @@ class GenerateInvoicesTest:
 
 
 class GenerateInvoiceTest:
+    # Feature flags have already been fetched (and cached on the
+    # request) when pricing events, hence no query to select
+    # WIP_ENABLE_NEW_FINANCE_WORKFLOW.
     EXPECTED_NUM_QUERIES = (
-        1  # select feature flag WIP_ENABLE_NEW_FINANCE_WORKFLOW
-        + 1  # lock reimbursement point
+        1  # lock reimbursement point
         + 1  # select cashflows, pricings, pricing_lines, and custom_reimbursement_rules
         + 1  # select and lock ReferenceScheme
         + 1  # update ReferenceScheme
@@ -140,3 +140,26 @@ def test_generate_cashflows_calls_generate_invoices(run_command):
     assert len(pricing.cashflows) == 1
     cashflow = pricing.cashflows[0]
     assert cashflow.status == finance_models.CashflowStatus.PENDING_ACCEPTANCE
+
+
+@pytest.mark.features(PRICE_FINANCE_EVENTS=True)
+def test_price_finance_events_in_parallel(run_command):
+    few_minutes_ago = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    events = [
+        finance_factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=few_minutes_ago,
+            booking__stock__offer__venue__pricing_point="self",
+        )
+        for _ in range(4)
+    ]
+    event_ids = [event.id for event in events]
+    # Both shards have events to price.
+    assert {event.pricingPointId % 2 for event in events} == {0, 1}
+
+    result = run_command("price_finance_events", "--workers", "2", raise_on_error=True)
+
+    assert "Priced 4 events" in result.output
+    pricings = finance_models.Pricing.query.filter(finance_models.Pricing.eventId.in_(event_ids)).all()
+    assert sorted(pricing.eventId for pricing in pricings) == sorted(event_ids)
+    priced_events = finance_models.FinanceEvent.query.filter(finance_models.FinanceEvent.id.in_(event_ids))
+    assert {event.status for event in priced_events} == {finance_models.FinanceEventStatus.PRICED}
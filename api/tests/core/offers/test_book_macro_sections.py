@@ -0,0 +1,30 @@
+import pytest
+
+from pcapi.core.offers import book_macro_sections
+from pcapi.core.testing import assert_num_queries
+
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+
+class BookMacroSectionTableTest:
+    def test_lookup(self):
+        table = book_macro_sections.BookMacroSectionTable()
+
+        # sections are inserted by a migration
+        with assert_num_queries(1):
+            assert table.get_macro_section("Policier / Thriller format poche") == "Policier"
+            assert table.get_macro_section("policier / thriller format poche") == "Policier"
+            assert table.get_macro_section("unknown section") is None
+
+        stats = table.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["loads"] == 1
+        assert stats["size"] > 0
+
+    def test_refresh_when_stale(self):
+        table = book_macro_sections.BookMacroSectionTable(refresh_interval=0)
+        table.get_macro_section("unknown section")
+        table.get_macro_section("unknown section")
+        assert table.get_stats()["loads"] == 2
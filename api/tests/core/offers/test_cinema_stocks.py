@@ -0,0 +1,111 @@
+import time
+from unittest import mock
+
+import pytest
+
+from pcapi.core.bookings import factories as bookings_factories
+from pcapi.core.categories import subcategories_v2 as subcategories
+from pcapi.core.offers import cinema_stocks
+from pcapi.core.offers import factories as offers_factories
+from pcapi.core.providers import factories as providers_factories
+from pcapi.core.providers.repository import get_provider_by_local_class
+
+
+pytestmark = pytest.mark.usefixtures("db_session")
+
+
+def _create_cinema_offer():
+    provider = get_provider_by_local_class("CDSStocks")
+    venue_provider = providers_factories.VenueProviderFactory(provider=provider)
+    offer = offers_factories.EventOfferFactory(
+        subcategoryId=subcategories.SEANCE_CINE.id,
+        venue=venue_provider.venue,
+        lastProvider=provider,
+    )
+    stock = offers_factories.EventStockFactory(offer=offer)
+    return offer, stock
+
+
+class RecordOfferViewTest:
+    def test_record_cinema_offer_view(self, app):
+        offer, _ = _create_cinema_offer()
+
+        cinema_stocks.record_offer_view(offer)
+        cinema_stocks.record_offer_view(offer)
+
+        assert app.redis_client.zscore(cinema_stocks.REDIS_CINEMA_OFFER_VIEWS, offer.id) == 2
+
+    def test_ignore_other_offers(self, app):
+        offer = offers_factories.OfferFactory(subcategoryId=subcategories.LIVRE_PAPIER.id)
+
+        cinema_stocks.record_offer_view(offer)
+
+        assert app.redis_client.zcard(cinema_stocks.REDIS_CINEMA_OFFER_VIEWS) == 0
+
+
+class RefreshCinemaStocksTest:
+    @mock.patch("pcapi.core.offers.api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places")
+    def test_refresh_most_active_offers_first(self, mocked_update, app):
+        quiet_offer, _ = _create_cinema_offer()
+        viewed_offer, _ = _create_cinema_offer()
+        booked_offer, booked_stock = _create_cinema_offer()
+        bookings_factories.BookingFactory(stock=booked_stock)
+        offers_factories.EventStockFactory(offer__subcategoryId=subcategories.SEANCE_CINE.id)  # no cinema provider
+        for _ in range(3):
+            cinema_stocks.record_offer_view(viewed_offer)
+
+        report = cinema_stocks.refresh_cinema_stocks(max_offers=2)
+
+        refreshed_offers = [call.args[0] for call in mocked_update.call_args_list]
+        assert refreshed_offers == [booked_offer, viewed_offer]
+        assert report["offers"] == 3
+        assert report["refreshed"] == 2
+        assert report["errors"] == 0
+        assert report["never_refreshed"] == 1
+        assert app.redis_client.zcard(cinema_stocks.REDIS_CINEMA_OFFER_VIEWS) == 0
+        assert app.redis_client.hexists(cinema_stocks.REDIS_CINEMA_OFFER_REFRESHED_AT, viewed_offer.id)
+        assert not app.redis_client.hexists(cinema_stocks.REDIS_CINEMA_OFFER_REFRESHED_AT, quiet_offer.id)
+
+        mocked_update.reset_mock()
+        report = cinema_stocks.refresh_cinema_stocks(max_offers=2)
+
+        # Offers that have just been refreshed are skipped.
+        mocked_update.assert_called_once_with(quiet_offer)
+        assert report["refreshed"] == 1
+        assert report["never_refreshed"] == 0
+
+    @mock.patch("pcapi.core.offers.api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places")
+    def test_refresh_offers_refreshed_long_ago(self, mocked_update, app):
+        offer, _ = _create_cinema_offer()
+        app.redis_client.hset(cinema_stocks.REDIS_CINEMA_OFFER_REFRESHED_AT, offer.id, time.time() - 120)
+
+        report = cinema_stocks.refresh_cinema_stocks(min_interval=60)
+
+        mocked_update.assert_called_once_with(offer)
+        assert report["refreshed"] == 1
+        assert report["max_staleness"] < 60
+
+    @mock.patch("pcapi.core.offers.api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places")
+    def test_provider_error(self, mocked_update, app):
+        offer, _ = _create_cinema_offer()
+        cinema_stocks.record_offer_view(offer)
+        mocked_update.return_value = False
+
+        report = cinema_stocks.refresh_cinema_stocks()
+
+        assert report["refreshed"] == 0
+        assert report["errors"] == 1
+        assert not app.redis_client.hexists(cinema_stocks.REDIS_CINEMA_OFFER_REFRESHED_AT, offer.id)
+        # The offer is retried first by the next run.
+        assert app.redis_client.zscore(cinema_stocks.REDIS_CINEMA_OFFER_VIEWS, offer.id) == 1
+
+    @mock.patch("pcapi.core.offers.api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places")
+    def test_unexpected_error(self, mocked_update, app):
+        offer, _ = _create_cinema_offer()
+        mocked_update.side_effect = Exception("Unexpected error")
+
+        report = cinema_stocks.refresh_cinema_stocks()
+
+        assert report["refreshed"] == 0
+        assert report["errors"] == 1
+        assert not app.redis_client.hexists(cinema_stocks.REDIS_CINEMA_OFFER_REFRESHED_AT, offer.id)
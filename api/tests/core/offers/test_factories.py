@@ -4,7 +4,7 @@ from pcapi.core.categories import subcategories_v2 as subcategories
 from pcapi.core.offers.factories import OfferFactory
 from pcapi.core.offers.factories import ProductFactory
 from pcapi.core.offers.models import OfferExtraData
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
 from pcapi.domain import music_types
 from pcapi.domain import show_types
 
@@ -113,7 +113,7 @@ class ProductFactoryTest:
         assert book_product.extraData is not None
         assert isinstance(book_product.extraData.get("author"), str)
         assert re.match(r"\d{13}", book_product.extraData.get("ean"))
-        assert book_product.extraData.get("gtl_id") in GTLS
+        assert book_product.extraData.get("gtl_id") in get_gtl_ids()
 
     def test_generate_CDs_extra_data(self):
         concert_product = ProductFactory(
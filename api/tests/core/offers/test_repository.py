@@ -1,4 +1,5 @@
 import datetime
+from unittest import mock
 
 import pytest
 import time_machine
@@ -527,6 +528,50 @@ class GetCappedOffersForFiltersTest:
             assert len(offers) == 1
             assert expected_offer.id == offers[0].id
 
+        @pytest.mark.usefixtures("db_session")
+        @override_features(WIP_UNACCENTED_OFFER_NAME_SEARCH=True)
+        def should_ignore_accents_and_rank_by_relevance(self):
+            # given
+            user_offerer = offerers_factories.UserOffererFactory()
+            venue = offerers_factories.VenueFactory(managingOfferer=user_offerer.offerer)
+            exact_offer = factories.OfferFactory(name="Mon océan", venue=venue)
+            partial_offer = factories.OfferFactory(name="Mon bel OCEAN bleu et ses poissons", venue=venue)
+            factories.OfferFactory(name="Mon lac", venue=venue)
+
+            # when
+            offers = repository.get_capped_offers_for_filters(
+                user_id=user_offerer.user.id,
+                user_is_admin=user_offerer.user.has_admin_role,
+                offers_limit=10,
+                name_keywords_or_ean="mon ocean",
+            )
+
+            # then
+            assert [offer.id for offer in offers] == [exact_offer.id, partial_offer.id]
+
+        @pytest.mark.usefixtures("db_session")
+        @override_features(WIP_UNACCENTED_OFFER_NAME_SEARCH=True)
+        def should_return_the_most_relevant_offers_first(self):
+            # given
+            user_offerer = offerers_factories.UserOffererFactory()
+            venue = offerers_factories.VenueFactory(managingOfferer=user_offerer.offerer)
+            factories.OfferFactory.create_batch(3, name="Mon bel océan et ses poissons", venue=venue)
+            exact_offer = factories.OfferFactory(name="Océan", venue=venue)
+            factories.OfferFactory.create_batch(3, name="Mon océan bleu", venue=venue)
+
+            # when
+            offers = repository.get_capped_offers_for_filters(
+                user_id=user_offerer.user.id,
+                user_is_admin=user_offerer.user.has_admin_role,
+                offers_limit=2,
+                name_keywords_or_ean="ocean",
+            )
+
+            # then
+            assert len(offers) == 2
+            assert offers[0].id == exact_offer.id
+            assert offers[1].name == "Mon océan bleu"
+
     class StatusFiltersTest:
         def init_test_data(self):
             self.venue = offerers_factories.VenueFactory()
@@ -1320,6 +1365,18 @@ def admin_user_fixture():
 
 @pytest.mark.usefixtures("db_session")
 class GetCollectiveOffersTemplateByFiltersTest:
+    @override_features(WIP_UNACCENTED_OFFER_NAME_SEARCH=True)
+    def test_name_filter_ignores_accents(self, admin_user):
+        template = educational_factories.CollectiveOfferTemplateFactory(name="Atelier théâtre")
+        educational_factories.CollectiveOfferTemplateFactory(name="Atelier cinéma")
+
+        result = repository.get_collective_offers_template_by_filters(
+            user_id=admin_user.id,
+            user_is_admin=True,
+            name_keywords="atelier theatre",
+        ).one()
+        assert result.id == template.id
+
     def test_status_filter_no_crash(self, admin_user):
         template = educational_factories.CollectiveOfferTemplateFactory()
         educational_factories.CollectiveOfferTemplateFactory(validation=offer_mixin.OfferValidationStatus.REJECTED)
@@ -1474,6 +1531,98 @@ class GetPaginatedActiveOfferIdsTest:
         assert repository.get_paginated_active_offer_ids(batch_size=2, page=1) == [offer1.id]
 
 
+@pytest.mark.usefixtures("db_session")
+class OfferDailyBookingCountTest:
+    def test_update_and_get_counts(self):
+        offer = factories.OfferFactory()
+        other_offer = factories.OfferFactory()
+        now = datetime.datetime.utcnow()
+
+        repository.update_offer_daily_booking_count(offer.id, now, 1)
+        repository.update_offer_daily_booking_count(offer.id, now, 1)
+        repository.update_offer_daily_booking_count(offer.id, now - datetime.timedelta(days=2), 1)
+        repository.update_offer_daily_booking_count(offer.id, now - datetime.timedelta(days=2), -1)
+        repository.update_offer_daily_booking_count(offer.id, now - datetime.timedelta(days=20), 1)
+        repository.update_offer_daily_booking_count(other_offer.id, now, -1)  # never below 0
+        assert models.OfferDailyBookingCount.query.count() == 0  # not updated until applied
+
+        assert repository.apply_pending_offer_daily_booking_counts() == 3
+        assert repository.get_offers_booking_count_from_daily_counts([offer.id, other_offer.id], days=30) == {
+            offer.id: 3
+        }
+        assert repository.get_offers_booking_count_from_daily_counts([offer.id], days=10) == {offer.id: 2}
+
+    def test_ignore_old_bookings(self):
+        offer = factories.OfferFactory()
+        repository.update_offer_daily_booking_count(
+            offer.id, datetime.datetime.utcnow() - datetime.timedelta(days=60), 1
+        )
+        assert repository.apply_pending_offer_daily_booking_counts() == 0
+        assert models.OfferDailyBookingCount.query.count() == 0
+
+    def test_apply_increments_of_failed_run(self, app):
+        offer = factories.OfferFactory()
+        repository.update_offer_daily_booking_count(offer.id, datetime.datetime.utcnow(), 1)
+        # A previous run failed after taking pending increments.
+        app.redis_client.rename(
+            repository.REDIS_PENDING_OFFER_DAILY_BOOKING_COUNTS, repository.REDIS_PROCESSING_OFFER_DAILY_BOOKING_COUNTS
+        )
+        repository.update_offer_daily_booking_count(offer.id, datetime.datetime.utcnow(), 1)
+
+        assert repository.apply_pending_offer_daily_booking_counts() == 1
+        assert repository.get_offers_booking_count_from_daily_counts([offer.id], days=30) == {offer.id: 1}
+        assert repository.apply_pending_offer_daily_booking_counts() == 1
+        assert repository.get_offers_booking_count_from_daily_counts([offer.id], days=30) == {offer.id: 2}
+
+    def test_rebuild(self):
+        stock = factories.StockFactory()
+        bookings_factories.BookingFactory.create_batch(2, stock=stock)
+        bookings_factories.CancelledBookingFactory(stock=stock)
+        bookings_factories.BookingFactory(
+            stock=stock, dateCreated=datetime.datetime.utcnow() - datetime.timedelta(days=60)
+        )
+        stale_offer = factories.OfferFactory()
+        repository.update_offer_daily_booking_count(stale_offer.id, datetime.datetime.utcnow(), 5)
+        repository.apply_pending_offer_daily_booking_counts()
+        repository.update_offer_daily_booking_count(stale_offer.id, datetime.datetime.utcnow(), 1)
+
+        repository.rebuild_offer_daily_booking_counts()
+        assert repository.apply_pending_offer_daily_booking_counts() == 0
+
+        assert repository.get_offers_booking_count_from_daily_counts([stock.offerId, stale_offer.id], days=30) == {
+            stock.offerId: 2
+        }
+
+    def test_keep_increments_recorded_during_rebuild(self):
+        stock = factories.StockFactory()
+        bookings_factories.BookingFactory(stock=stock)
+        delete_counts = models.OfferDailyBookingCount.query.delete
+
+        def book_during_rebuild():
+            # Booking committed after the start of the rebuild.
+            repository.update_offer_daily_booking_count(stock.offerId, datetime.datetime.utcnow(), 1)
+            return delete_counts()
+
+        with mock.patch.object(models.OfferDailyBookingCount, "query", mock.Mock(delete=book_during_rebuild)):
+            repository.rebuild_offer_daily_booking_counts()
+
+        assert repository.apply_pending_offer_daily_booking_counts() == 1
+        assert repository.get_offers_booking_count_from_daily_counts([stock.offerId], days=30) == {stock.offerId: 2}
+
+    def test_keep_pending_increments_if_rebuild_fails(self):
+        offer = factories.OfferFactory()
+        repository.update_offer_daily_booking_count(offer.id, datetime.datetime.utcnow(), 1)
+
+        with mock.patch.object(
+            models.OfferDailyBookingCount, "query", mock.Mock(delete=mock.Mock(side_effect=Exception("timeout")))
+        ):
+            with pytest.raises(Exception, match="timeout"):
+                repository.rebuild_offer_daily_booking_counts()
+
+        assert repository.apply_pending_offer_daily_booking_counts() == 1
+        assert repository.get_offers_booking_count_from_daily_counts([offer.id], days=30) == {offer.id: 1}
+
+
 @pytest.mark.usefixtures("db_session")
 class GetPaginatedOfferIdsByVenueIdTest:
     def test_limit_and_page_arguments(self):
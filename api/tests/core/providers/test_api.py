@@ -23,6 +23,7 @@ from pcapi.core.providers import api
 from pcapi.core.providers import exceptions
 from pcapi.core.providers import models as providers_models
 import pcapi.core.providers.factories as providers_factories
+from pcapi.core.testing import override_features
 from pcapi.core.users import factories as users_factories
 from pcapi.local_providers.provider_api import synchronize_provider_api
 from pcapi.models import db
@@ -236,6 +237,63 @@ class SynchronizeStocksTest:
             log_extra={"provider_id": provider.id},
         )
 
+    @override_features(WIP_INCREMENTAL_STOCK_SYNCHRONIZATION=True)
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_only_update_changed_stocks(self, mock_async_index_offer_ids):
+        venue = offerers_factories.VenueFactory()
+        siret = venue.siret
+        provider = providers_factories.ProviderFactory()
+        spec = [
+            {"ref": "3010000101789", "available": 6, "price": 12},  # unchanged
+            {"ref": "3010000101797", "available": 4, "price": 0},  # unchanged, zero price is ignored
+            {"ref": "3010000103769", "available": 5, "price": 12},  # new quantity
+            {"ref": "3010000107163", "available": 2, "price": 14},  # new price
+            {"ref": "3010000108123", "available": 3, "price": 12},  # booked since last synchronization
+        ]
+        stock_kwargs = {"price": 12, "lastProviderId": provider.id}
+        unchanged_stock = create_stock(spec[0]["ref"], siret, venue, quantity=6, rawProviderQuantity=6, **stock_kwargs)
+        free_stock = create_stock(spec[1]["ref"], siret, venue, quantity=4, rawProviderQuantity=4, **stock_kwargs)
+        quantity_stock = create_stock(spec[2]["ref"], siret, venue, quantity=6, rawProviderQuantity=6, **stock_kwargs)
+        price_stock = create_stock(spec[3]["ref"], siret, venue, quantity=2, rawProviderQuantity=2, **stock_kwargs)
+        booked_stock = create_stock(spec[4]["ref"], siret, venue, quantity=3, rawProviderQuantity=3, **stock_kwargs)
+        BookingFactory(stock=booked_stock)
+        stock_details = synchronize_provider_api._build_stock_details_from_raw_stocks(spec, siret, provider, venue.id)
+
+        operations = api.synchronize_stocks(stock_details, venue, provider_id=provider.id)
+
+        assert operations == {"new_offers": 0, "new_stocks": 0, "updated_stocks": 3, "unchanged_stocks": 2}
+        assert api.get_no_op_ratio(operations, len(stock_details)) == 0.4
+        assert unchanged_stock.quantity == 6
+        assert free_stock.price == 12
+        assert quantity_stock.quantity == 5
+        assert price_stock.price == 14
+        assert booked_stock.quantity == 4
+        assert booked_stock.rawProviderQuantity == 3
+        mock_async_index_offer_ids.assert_called_once_with(
+            {price_stock.offerId},
+            reason=search.IndexationReason.STOCK_SYNCHRONIZATION,
+            log_extra={"provider_id": provider.id},
+        )
+
+    @override_features(WIP_INCREMENTAL_STOCK_SYNCHRONIZATION=True)
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_nothing_changed(self, mock_async_index_offer_ids):
+        venue = offerers_factories.VenueFactory()
+        provider = providers_factories.ProviderFactory()
+        spec = [{"ref": "3010000101789", "available": 6, "price": 12}]
+        create_stock(
+            spec[0]["ref"], venue.siret, venue, quantity=6, rawProviderQuantity=6, price=12, lastProviderId=provider.id
+        )
+        stock_details = synchronize_provider_api._build_stock_details_from_raw_stocks(
+            spec, venue.siret, provider, venue.id
+        )
+
+        operations = api.synchronize_stocks(stock_details, venue, provider_id=provider.id)
+
+        assert operations == {"new_offers": 0, "new_stocks": 0, "updated_stocks": 0, "unchanged_stocks": 1}
+        assert api.get_no_op_ratio(operations, len(stock_details)) == 1
+        mock_async_index_offer_ids.assert_not_called()
+
     def test_build_new_offers_from_stock_details(self):
         # Given
         spec = [
@@ -1,7 +1,13 @@
+from unittest import mock
+
 import pytest
 
 from pcapi.connectors.serialization.titelive_serializers import _format_gtl_code
+from pcapi.core.providers import titelive_utils
 from pcapi.core.providers.titelive_gtl import get_gtl
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
+from pcapi.core.providers.titelive_gtl import load_gtls
+from pcapi.core.testing import override_settings
 
 
 @pytest.mark.parametrize(
@@ -59,6 +65,28 @@ def test_get_gtl_not_found():
     assert gtl is None
 
 
+def test_get_gtl_ids():
+    gtl_ids = get_gtl_ids()
+    assert "01030102" in gtl_ids
+    assert all(len(gtl_id) == 8 for gtl_id in gtl_ids)
+
+
+@override_settings(TITELIVE_GENERATE_FROM_FILE_IN_DEV=True)
+def test_generate_titelive_gtl_from_file(tmp_path):
+    csv_path = tmp_path / "GTL.csv"
+    csv_path.write_text("01000000\tLittérature\n01030000\tŒuvres classiques\n01030100\tAntiquité\n", encoding="utf-8")
+    data_path = tmp_path / "titelive_gtl.tsv"
+
+    with mock.patch.object(titelive_utils, "FILE_PATH", data_path):
+        titelive_utils.generate_titelive_gtl_from_file(str(csv_path))
+
+    assert load_gtls(data_path) == {
+        "01000000": ("Littérature", "Littérature", None, None, None),
+        "01030000": ("Œuvres classiques", "Littérature", "Œuvres classiques", None, None),
+        "01030100": ("Antiquité", "Littérature", "Œuvres classiques", "Antiquité", None),
+    }
+
+
 @pytest.mark.parametrize(
     "input_, output",
     [("50300", "05030000"), ("110400", "11040000"), ("2050000", "02050000")],
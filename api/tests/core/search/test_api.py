@@ -150,6 +150,22 @@ class ReindexOfferIdsTest:
         # then
         assert search_testing.search_store["offers"] == {}
 
+    def test_check_indexed_offers_in_bulk(self, app):
+        indexed = make_unbookable_offer()
+        not_indexed = make_unbookable_offer()
+        search_testing.search_store["offers"][indexed.id] = "dummy"
+        app.redis_client.hset(algolia.REDIS_HASHMAP_INDEXED_OFFERS_NAME, indexed.id, "")
+
+        with (
+            mock.patch.object(app.redis_client, "hmget", wraps=app.redis_client.hmget) as mocked_hmget,
+            mock.patch.object(app.redis_client, "hexists") as mocked_hexists,
+        ):
+            search.reindex_offer_ids([indexed.id, not_indexed.id])
+
+        assert mocked_hmget.call_count == 1
+        assert not mocked_hexists.called
+        assert search_testing.search_store["offers"] == {}
+
     def test_that_base_query_is_correct(self, app):
         # Make sure that `get_base_query_for_offer_indexation` loads
         # all offers and related data that is expected by
@@ -322,6 +338,64 @@ class IndexOffersInQueueTest:
         assert app.redis_client.smembers(queue) <= set(str(id_) for id_ in items)
 
 
+@override_settings(REDIS_OFFER_IDS_CHUNK_SIZE=3)
+class IndexOffersInQueueConcurrentlyTest:
+    def test_index_whole_queue(self, app):
+        bookable_offers = [make_bookable_offer() for _ in range(5)]
+        unbookable_offer = make_unbookable_offer()
+        search_testing.search_store["offers"][unbookable_offer.id] = "dummy"
+        app.redis_client.hset(algolia.REDIS_HASHMAP_INDEXED_OFFERS_NAME, unbookable_offer.id, "")
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        app.redis_client.sadd(queue, *[offer.id for offer in bookable_offers], unbookable_offer.id)
+
+        report = search.index_offers_in_queue_concurrently(max_batches_to_process=None, workers=2)
+
+        assert set(search_testing.search_store["offers"]) == {offer.id for offer in bookable_offers}
+        assert report["batches"] == 2
+        assert report["offers"] == 6
+        assert report["stages"]["serialize"]["count"] == 5
+        assert report["stages"]["push"]["count"] == 6
+        # The main queue and processing queues have been deleted.
+        assert app.redis_client.keys(f"{queue}*") == []
+
+    def test_limit_is_set(self, app):
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        app.redis_client.sadd(queue, *[make_bookable_offer().id for _ in range(8)])
+
+        report = search.index_offers_in_queue_concurrently(max_batches_to_process=2, workers=2)
+
+        assert report["batches"] == 2
+        assert len(search_testing.search_store["offers"]) == 6
+        assert app.redis_client.scard(queue) == 2
+
+    @mock.patch("pcapi.core.search.backends.testing.FakeClient.save_objects", fail)
+    @override_settings(CATCH_INDEXATION_EXCEPTIONS=False)
+    def test_processing_queue_is_kept_upon_error(self, app):
+        offer = make_bookable_offer()
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        app.redis_client.sadd(queue, offer.id)
+
+        with pytest.raises(ValueError):
+            search.index_offers_in_queue_concurrently(workers=2)
+
+        assert app.redis_client.scard(queue) == 0
+        processing_queues = app.redis_client.keys(f"{queue}:processing:*")
+        assert len(processing_queues) == 1
+        assert app.redis_client.smembers(processing_queues[0]) == {str(offer.id)}
+
+    @mock.patch("pcapi.core.search.backends.testing.FakeClient.save_objects", fail)
+    @override_settings(CATCH_INDEXATION_EXCEPTIONS=True)  # as on prod: don't raise errors
+    def test_handle_indexation_error(self, app):
+        offer = make_bookable_offer()
+        app.redis_client.sadd(algolia.REDIS_OFFER_IDS_NAME, offer.id)
+
+        search.index_offers_in_queue_concurrently(workers=2)
+
+        assert search_testing.search_store["offers"] == {}
+        assert app.redis_client.smembers(algolia.REDIS_OFFER_IDS_IN_ERROR_NAME) == {str(offer.id)}
+        assert app.redis_client.keys(f"{algolia.REDIS_OFFER_IDS_NAME}:processing:*") == []
+
+
 @override_features(ENABLE_VENUE_STRICT_SEARCH=True)
 def test_unindex_offer_ids(app):
     offer1 = make_bookable_offer()
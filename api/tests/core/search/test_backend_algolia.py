@@ -137,6 +137,15 @@ def test_check_offer_is_indexed(app):
     assert not backend.check_offer_is_indexed(FakeOffer(id=2))
 
 
+def test_check_offer_ids_are_indexed(app):
+    backend = get_backend()
+    app.redis_client.hset("indexed_offers", "1", "")
+    app.redis_client.hset("indexed_offers", "3", "")
+    assert backend.check_offer_ids_are_indexed([1, 2, 3]) == {1, 3}
+    assert backend.check_offer_ids_are_indexed([2]) == set()
+    assert backend.check_offer_ids_are_indexed([]) == set()
+
+
 @pytest.mark.usefixtures("db_session")
 def test_index_offers(app):
     backend = get_backend()
@@ -150,6 +159,70 @@ def test_index_offers(app):
     assert backend.check_offer_is_indexed(offer)
 
 
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_skips_unchanged_offers(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 1
+        fingerprint = app.redis_client.hget("indexed_offers", str(offer.id))
+        assert fingerprint
+
+        # Nothing changed (but `indexedAt`): skip.
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 1
+
+        offer.name = "New name"
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 2
+        assert app.redis_client.hget("indexed_offers", str(offer.id)) != fingerprint
+
+
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_force_unchanged_offers(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer], {offer.id: 0})
+        backend.index_offers([offer], {offer.id: 0}, force=True)
+        assert posted.call_count == 2
+
+
+@pytest.mark.usefixtures("db_session")
+@override_settings(ALGOLIA_SKIP_UNCHANGED_OFFERS=False)
+def test_index_offers_without_skipping_unchanged_offers(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer], {offer.id: 0})
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 2
+
+
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_with_legacy_empty_fingerprint(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    app.redis_client.hset("indexed_offers", str(offer.id), "")
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 1
+    assert app.redis_client.hget("indexed_offers", str(offer.id))
+
+
+def test_offer_fingerprint_ignores_indexed_at():
+    serialized = {"objectID": 1, "offer": {"name": "Offer", "indexedAt": "2024-01-01T00:00:00"}, "venue": {}}
+    same = serialized | {"offer": {"name": "Offer", "indexedAt": "2024-06-01T00:00:00"}}
+    other = serialized | {"offer": {"name": "Other", "indexedAt": "2024-01-01T00:00:00"}}
+    assert algolia.get_offer_fingerprint(serialized) == algolia.get_offer_fingerprint(same)
+    assert algolia.get_offer_fingerprint(serialized) != algolia.get_offer_fingerprint(other)
+
+
 def test_unindex_offer_ids(app):
     backend = get_backend()
     app.redis_client.hset("indexed_offers", "1", "")
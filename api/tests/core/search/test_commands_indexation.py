@@ -10,7 +10,7 @@ from pcapi.core.educational import factories as educational_factories
 from pcapi.core.offerers import factories as offerers_factories
 from pcapi.core.offers import factories as offers_factories
 from pcapi.core.offers import models as offers_models
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
 from pcapi.core.search import testing as search_testing
 from pcapi.repository import repository
 
@@ -43,6 +43,47 @@ def test_partially_index_offers(app):
     assert set(search_testing.search_store["offers"].keys()) == expected_to_be_reindexed
 
 
+@pytest.mark.usefixtures("clean_database")
+def test_reindex_all_offers(app):
+    offer_ids = [offers_factories.StockFactory().offer.id for _ in range(5)]
+    inactive_offer_id = offers_factories.StockFactory(offer__isActive=False).offer.id
+
+    # fmt: off
+    run_command(
+        app,
+        "reindex_all_offers",
+        "--from-id", offer_ids[0],
+        "--to-id", offer_ids[3],
+        "--batch-size", 2,
+    )
+    # fmt: on
+
+    assert set(search_testing.search_store["offers"].keys()) == set(offer_ids[1:4])
+    assert inactive_offer_id not in search_testing.search_store["offers"]
+    # The checkpoint is deleted once the whole range is processed.
+    assert not app.redis_client.keys("search:reindex-all-offers:checkpoint:*")
+
+
+@pytest.mark.usefixtures("clean_database")
+def test_reindex_all_offers_resumes_from_checkpoint(app):
+    offer_ids = [offers_factories.StockFactory().offer.id for _ in range(3)]
+    checkpoint_key = search.REDIS_REINDEX_ALL_OFFERS_CHECKPOINT.format(from_id=0, to_id="")
+    app.redis_client.set(checkpoint_key, offer_ids[0])
+
+    report = search.reindex_all_offers()
+
+    assert report["count"] == 2
+    assert set(search_testing.search_store["offers"].keys()) == set(offer_ids[1:])
+
+    # Offers are sent again even if they have not changed, e.g. if the
+    # index has been lost.
+    search_testing.reset_search_store()
+    app.redis_client.set(checkpoint_key, offer_ids[0])
+    report = search.reindex_all_offers(restart=True)
+    assert report["count"] == 3
+    assert set(search_testing.search_store["offers"].keys()) == set(offer_ids)
+
+
 @pytest.mark.usefixtures("clean_database")
 @mock.patch("pcapi.core.search.async_index_offer_ids")
 def test_update_products_booking_count_and_reindex_offers(mocked_async_index_offer_ids, app):
@@ -199,7 +240,7 @@ class StagingIndexationTest:
 
     def test_get_offers_with_gtl(self):
         stock_with_gtl = offers_factories.StockFactory.create_batch(
-            size=20, offer__isActive=True, offer__extraData={"gtl_id": random.choice(list(GTLS.keys()))}
+            size=20, offer__isActive=True, offer__extraData={"gtl_id": random.choice(list(get_gtl_ids()))}
         )
         offers_factories.StockFactory.create_batch(size=20, offer__isActive=True)
 
@@ -221,7 +262,7 @@ class StagingIndexationTest:
                                 lambda gtl_id, gtl_id_prefix=gtl_id_prefix: gtl_id.startswith(
                                     str(gtl_id_prefix).zfill(2)
                                 ),
-                                GTLS.keys(),
+                                get_gtl_ids(),
                             )
                         )
                     )
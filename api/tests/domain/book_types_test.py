@@ -2,7 +2,8 @@ import re
 
 import pytest
 
-from pcapi.core.providers.titelive_gtl import GTLS
+from pcapi.core.providers.titelive_gtl import get_gtl
+from pcapi.core.providers.titelive_gtl import get_gtl_ids
 from pcapi.domain.book_types import BOOK_TYPES
 
 
@@ -17,7 +18,7 @@ class BookTypesTest:
 
     @pytest.mark.skip(reason="Waiting for a long term way of handling new GTL when Titelive makes an update")
     def test_book_types_are_included_in_gtls(self):
-        gtl_codes = set(GTLS.keys())
+        gtl_codes = set(get_gtl_ids())
         book_types_codes = {gtl.code for book_type in BOOK_TYPES for gtl in book_type.gtls}
         book_subtypes_codes = {
             gtl.code for book_type in BOOK_TYPES for book_subtype in book_type.children for gtl in book_subtype.gtls
@@ -34,7 +35,7 @@ class BookTypesTest:
         ]
         all_book_gtls = book_types_gtls + book_subtypes_gtls
         for gtl in all_book_gtls:
-            assert gtl.label == GTLS[gtl.code]["label"]
+            assert gtl.label == get_gtl(gtl.code)["label"]
 
     def test_book_types_positions_are_consistent(self):
         assert list(range(1, len(BOOK_TYPES) + 1)) == sorted([book_type.position for book_type in BOOK_TYPES])
@@ -12,6 +12,7 @@ import pcapi.core.finance.factories as finance_factories
 import pcapi.core.finance.models as finance_models
 import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offers.factories as offers_factories
+from pcapi.core.testing import assert_num_queries
 import pcapi.core.users.factories as users_factories
 from pcapi.domain import reimbursement
 
@@ -462,6 +463,33 @@ class CustomRuleFinderTest:
         assert finder.get_rule(another_booking) is None  # no rule for this offer
 
 
+@pytest.mark.usefixtures("db_session")
+class SharedCustomRuleFinderTest:
+    def test_rules_are_loaded_once(self):
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        booking = bookings_factories.UsedBookingFactory(stock__offer__venue__pricing_point="self")
+        rule = finance_factories.CustomReimbursementRuleFactory(offer=booking.stock.offer, timespan=(yesterday, None))
+
+        with assert_num_queries(1):
+            finder = reimbursement.get_shared_custom_rule_finder()
+        with assert_num_queries(0):
+            assert reimbursement.get_shared_custom_rule_finder() is finder
+        assert finder.get_rule(booking).id == rule.id
+
+    def test_rules_are_reloaded_after_version_bump(self):
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        booking = bookings_factories.UsedBookingFactory(stock__offer__venue__pricing_point="self")
+        finder = reimbursement.get_shared_custom_rule_finder()
+        assert finder.get_rule(booking) is None
+
+        rule = finance_factories.CustomReimbursementRuleFactory(offer=booking.stock.offer, timespan=(yesterday, None))
+        assert reimbursement.get_shared_custom_rule_finder() is finder  # not invalidated yet
+
+        reimbursement.bump_custom_rules_version()
+        finder = reimbursement.get_shared_custom_rule_finder()
+        assert finder.get_rule(booking).id == rule.id
+
+
 def assert_total_reimbursement(booking_reimbursement, rule, booking):
     assert booking_reimbursement.booking == booking
     assert isinstance(booking_reimbursement.rule, rule)
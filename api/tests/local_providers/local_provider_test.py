@@ -88,6 +88,36 @@ class UpdateObjectsTest:
         assert product.name == "New Product"
         assert product.dateModifiedAtLastProvider == providable_info.date_modified_at_provider
 
+    @patch("tests.local_providers.provider_test_utils.TestBulkLocalProvider.__next__")
+    def test_bulk_mode_creates_and_updates_objects(self, next_function):
+        provider = providers_factories.AllocineProviderFactory(localClass="TestBulkLocalProvider")
+        existing_info = ProvidableInfo(
+            type=offers_models.Product, id_at_providers="1", date_modified_at_provider=datetime(2018, 1, 1)
+        )
+        new_info = ProvidableInfo(
+            type=offers_models.Product, id_at_providers="2", date_modified_at_provider=datetime(2018, 1, 1)
+        )
+        offers_factories.ThingProductFactory(
+            dateModifiedAtLastProvider=datetime(2000, 1, 1),
+            lastProvider=provider,
+            idAtProviders=existing_info.id_at_providers,
+            name="Old product name",
+            subcategoryId=subcategories.LIVRE_PAPIER.id,
+        )
+        local_provider = provider_test_utils.TestBulkLocalProvider()
+        next_function.side_effect = [[existing_info, new_info]]
+
+        with patch.object(local_provider, "get_existing_object") as mocked_get_existing_object:
+            local_provider.updateObjects()
+
+        mocked_get_existing_object.assert_not_called()
+        products = offers_models.Product.query.order_by(offers_models.Product.idAtProviders).all()
+        assert [product.idAtProviders for product in products] == ["1", "2"]
+        assert {product.name for product in products} == {"New Product"}
+        assert products[0].dateModifiedAtLastProvider == datetime(2018, 1, 1)
+        assert local_provider.createdObjects == 1
+        assert local_provider.updatedObjects == 1
+
     @patch("tests.local_providers.provider_test_utils.TestLocalProvider.__next__")
     def test_does_not_update_existing_object_when_date_is_older_than_last_modified_date(self, next_function):
         # Given
@@ -28,6 +28,11 @@ class TestLocalProvider(LocalProvider):
         pass
 
 
+class TestBulkLocalProvider(TestLocalProvider):
+    name = "LocalProvider Test Bulk"
+    bulk_mode = True
+
+
 class TestLocalProviderWithApiErrors(LocalProvider):
     name = "LocalProvider Test"
     can_create = True
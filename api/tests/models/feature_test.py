@@ -1,17 +1,21 @@
 import enum
+import time
 from unittest.mock import patch
 
 import flask
 import pytest
 
 from pcapi.core.testing import assert_num_queries
+from pcapi.core.testing import override_settings
 from pcapi.models import db
 from pcapi.models.feature import FEATURES_DISABLED_BY_DEFAULT
 from pcapi.models.feature import Feature
+from pcapi.models.feature import FeatureCache
 from pcapi.models.feature import FeatureToggle
 from pcapi.models.feature import check_feature_flags_completeness
 from pcapi.models.feature import clean_feature_flags
 from pcapi.models.feature import install_feature_flags
+from pcapi.models.feature import notify_features_changed
 from pcapi.repository import repository
 
 
@@ -69,6 +73,32 @@ class FeatureToggleTest:
         finally:
             flask._request_ctx_stack.push(context)
 
+    @override_settings(FEATURE_FLAGS_CACHE_REFRESH_INTERVAL=60)
+    @patch("pcapi.models.feature.FEATURES_CHANGED_POLL_INTERVAL", 0)
+    def test_is_active_with_process_cache(self, app):
+        feature = Feature.query.filter_by(name=FeatureToggle.SYNCHRONIZE_ALLOCINE.name).first()
+        feature.isActive = True
+        repository.save(feature)
+        context = flask._request_ctx_stack.pop()
+
+        try:
+            with patch("pcapi.models.feature.feature_cache", FeatureCache()) as cache:
+                with assert_num_queries(1):
+                    assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+                    assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+                    assert not FeatureToggle.DISABLE_CGR_EXTERNAL_BOOKINGS.is_active()
+                assert cache.saved_reads == 2
+
+                feature.isActive = False
+                repository.save(feature)
+                assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()  # not refreshed yet
+
+                notify_features_changed()
+                time.sleep(0.1)  # let the notification reach the subscriber
+                assert not FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+        finally:
+            flask._request_ctx_stack.push(context)
+
     def test_one_request_for_all_flags(self):
         with assert_num_queries(1):
             FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
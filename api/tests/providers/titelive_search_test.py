@@ -359,6 +359,76 @@ class TiteliveSearchTest:
 
         assert offers_models.Product.query.count() == 0
 
+    def test_titelive_music_sync_logs_synced_pages(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        page_events = providers_models.LocalProviderEvent.query.filter(
+            providers_models.LocalProviderEvent.type == providers_models.LocalProviderEventType.SyncPartEnd
+        ).all()
+        assert [event.payload for event in page_events] == ["music : from 2022-12-01 page 1"]
+        assert TiteliveMusicSearch().get_last_synced_page(datetime.date(2022, 12, 1)) is None
+
+    def test_titelive_music_sync_resumes_after_last_synced_page(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=3", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=4", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        titelive_epagine_provider = providers_repository.get_provider_by_name(
+            providers_constants.TITELIVE_EPAGINE_PROVIDER_NAME
+        )
+        providers_factories.LocalProviderEventFactory(
+            provider=titelive_epagine_provider,
+            type=providers_models.LocalProviderEventType.SyncEnd,
+            date=datetime.datetime(2022, 12, 2),
+            payload=titelive.TiteliveBase.MUSIC.value,
+        )
+        providers_factories.LocalProviderEventFactory(
+            provider=titelive_epagine_provider,
+            type=providers_models.LocalProviderEventType.SyncPartEnd,
+            payload=f"{titelive.TiteliveBase.MUSIC.value} : from 2022-12-01 page 1",
+        )
+
+        TiteliveMusicSearch().synchronize_products()
+
+        search_requests = [request for request in requests_mock.request_history if request.path.endswith("/search")]
+        assert "1" not in {request.qs["page"][0] for request in search_requests}
+        assert offers_models.Product.query.count() == 3
+        assert TiteliveMusicSearch().get_last_synced_page(datetime.date(2022, 12, 1)) is None
+
+    def test_titelive_music_sync_does_not_resume_sync_of_another_date(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        titelive_epagine_provider = providers_repository.get_provider_by_name(
+            providers_constants.TITELIVE_EPAGINE_PROVIDER_NAME
+        )
+        providers_factories.LocalProviderEventFactory(
+            provider=titelive_epagine_provider,
+            type=providers_models.LocalProviderEventType.SyncPartEnd,
+            payload=f"{titelive.TiteliveBase.MUSIC.value} : from 2022-11-01 page 1",
+        )
+
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        search_requests = [request for request in requests_mock.request_history if request.path.endswith("/search")]
+        assert "1" in {request.qs["page"][0] for request in search_requests}
+        assert offers_models.Product.query.count() == 3
+
 
 @override_settings(TITELIVE_EPAGINE_API_USERNAME="test@example.com")
 @override_settings(TITELIVE_EPAGINE_API_PASSWORD="qwerty123")
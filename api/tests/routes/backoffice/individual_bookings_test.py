@@ -1283,6 +1283,7 @@ class GetIndividualBookingCSVDownloadTest(GetEndpointHelper):
             assert response.status_code == 200
 
         assert len(response.data.split(b"\n")) == 4
+        response.close()  # close the temporary export file
 
 
 class GetIndividualBookingXLSXDownloadTest(GetEndpointHelper):
@@ -1294,6 +1295,7 @@ class GetIndividualBookingXLSXDownloadTest(GetEndpointHelper):
 
     def reader_from_response(self, response):
         wb = openpyxl.load_workbook(BytesIO(response.data))
+        response.close()  # close the temporary export file
         return wb.active
 
     @pytest.mark.parametrize("is_oa_as_data_source_ff_active", (True, False))
@@ -3290,6 +3290,7 @@ class DownloadBookingsCSVTest(GetEndpointHelper):
             assert response.status_code == 200
 
         assert len(response.data.split(b"\n")) == 1 + 3 + 1
+        response.close()  # close the temporary export file
 
 
 class DownloadBookingsXLSXTest(GetEndpointHelper):
@@ -3302,6 +3303,7 @@ class DownloadBookingsXLSXTest(GetEndpointHelper):
 
     def reader_from_response(self, response):
         wb = openpyxl.load_workbook(BytesIO(response.data))
+        response.close()  # close the temporary export file
         return wb.active
 
     @pytest.mark.parametrize("is_oa_as_data_source_ff_active", (False, True))
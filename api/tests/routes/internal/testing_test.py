@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from flask import url_for
 import pytest
 
@@ -11,7 +13,8 @@ pytestmark = pytest.mark.usefixtures("db_session")
 
 class FeaturesToggleTest:
     @override_features(ENABLE_NATIVE_APP_RECAPTCHA=False)
-    def test_set_features(self, client):
+    @patch("pcapi.models.feature.notify_features_changed")
+    def test_set_features(self, mocked_notify_features_changed, client):
         response = client.patch(
             "/testing/features",
             json={
@@ -27,6 +30,7 @@ class FeaturesToggleTest:
         assert response.status_code == 204
         feature = Feature.query.filter_by(name="ENABLE_NATIVE_APP_RECAPTCHA").one()
         assert feature.isActive
+        mocked_notify_features_changed.assert_called_once_with()
 
 
 def test_create_adage_jwt_fake_token(client):
@@ -140,6 +140,19 @@ class CollectiveOffersGetEducationalInstitutionTest(PublicAPIEndpointBaseHelper)
             },
         ]
 
+    def test_search_educational_institutions_name_without_accents(self, client: TestClient):
+        plain_api_key, _ = self.setup_provider()
+        educational_institution1 = educational_factories.EducationalInstitutionFactory(name="Collège Hélène Boucher")
+        educational_factories.EducationalInstitutionFactory(name="Lycée Victor Hugo")
+
+        with testing.assert_num_queries(self.num_queries):
+            response = client.with_explicit_token(plain_api_key).get(
+                self.endpoint_url, params={"name": "college helene-boucher"}
+            )
+            assert response.status_code == 200
+
+        assert [institution["id"] for institution in response.json] == [educational_institution1.id]
+
     def test_search_educational_institutions_city(self, client: TestClient):
         plain_api_key, _ = self.setup_provider()
         educational_institution1 = educational_factories.EducationalInstitutionFactory(city="pouet")